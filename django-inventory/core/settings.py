@@ -13,6 +13,7 @@ https://docs.djangoproject.com/en/5.1/ref/settings/
 import os
 from pathlib import Path
 
+from django.core.exceptions import ImproperlyConfigured
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -41,11 +42,13 @@ INSTALLED_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    "django.contrib.postgres",
     "inventory",
     "nested_admin",
 ]
 
 MIDDLEWARE = [
+    "inventory.profiling.QueryProfileMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -53,6 +56,7 @@ MIDDLEWARE = [
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
+    "routers.inventory_router.InventoryPrimaryPinMiddleware",
 ]
 
 ROOT_URLCONF = "core.urls"
@@ -95,11 +99,115 @@ DATABASES = {
     },
 }
 
+# Connection reuse for inventory_db. "persistent" keeps each worker's
+# connection open for DB_CONN_MAX_AGE seconds, "pool" hands connections out
+# from psycopg 3's pool, "off" reconnects per request. The connection reuse
+# benchmarks measure the mode configured, with TEST_DB_ENGINE=postgresql.
+DB_POOL_MODE = os.getenv("DB_POOL_MODE", "persistent")
+
+if DB_POOL_MODE == "persistent":
+    DATABASES["inventory_db"]["CONN_MAX_AGE"] = int(os.getenv("DB_CONN_MAX_AGE", "60"))
+    DATABASES["inventory_db"]["CONN_HEALTH_CHECKS"] = os.getenv(
+        "DB_CONN_HEALTH_CHECKS", "true"
+    ).lower() in ("1", "true", "yes")
+elif DB_POOL_MODE == "pool":
+    try:
+        from psycopg_pool import ConnectionPool
+    except ImportError as exc:
+        raise ImproperlyConfigured(
+            "DB_POOL_MODE=pool requires psycopg[pool] from requirements.txt"
+        ) from exc
+
+    DATABASES["inventory_db"]["OPTIONS"] = {
+        "pool": {
+            "min_size": int(os.getenv("DB_POOL_MIN_SIZE", "2")),
+            "max_size": int(os.getenv("DB_POOL_MAX_SIZE", "10")),
+            "timeout": float(os.getenv("DB_POOL_TIMEOUT", "10")),
+            "max_idle": float(os.getenv("DB_POOL_MAX_IDLE", "300")),
+            "check": ConnectionPool.check_connection,
+        }
+    }
+elif DB_POOL_MODE != "off":
+    raise ImproperlyConfigured(f"Unknown DB_POOL_MODE '{DB_POOL_MODE}'")
+
+# Read replicas of inventory_db, as comma separated host[:port] entries with
+# optional matching weights, e.g. DB_REPLICA_HOSTS=replica-a,replica-b:6432
+# and DB_REPLICA_WEIGHTS=2,1.
+INVENTORY_DB_REPLICAS = {}
+
+_replica_hosts = [h.strip() for h in os.getenv("DB_REPLICA_HOSTS", "").split(",")]
+_replica_weights = [w.strip() for w in os.getenv("DB_REPLICA_WEIGHTS", "").split(",")]
+for _number, _host in enumerate(filter(None, _replica_hosts), start=1):
+    _host, _, _port = _host.partition(":")
+    _weight = _replica_weights[_number - 1] if _number <= len(_replica_weights) else ""
+    DATABASES[f"inventory_replica_{_number}"] = {
+        **DATABASES["inventory_db"],
+        "HOST": _host,
+        "PORT": _port or DATABASES["inventory_db"]["PORT"],
+        "TEST": {"MIRROR": "inventory_db"},
+    }
+    INVENTORY_DB_REPLICAS[f"inventory_replica_{_number}"] = int(_weight or 1)
+
+# Replicas further behind the primary than this many seconds are skipped.
+INVENTORY_REPLICA_MAX_LAG = float(os.getenv("DB_REPLICA_MAX_LAG", "5"))
+INVENTORY_REPLICA_LAG_CHECK_INTERVAL = float(os.getenv("DB_REPLICA_LAG_CHECK", "5"))
+
+# How long a client keeps reading from the primary after it wrote.
+INVENTORY_PRIMARY_PIN_SECONDS = int(os.getenv("DB_PRIMARY_PIN_SECONDS", "5"))
+
 DATABASE_ROUTERS = [
     "routers.default_router.DefaultAppRouter",
     "routers.inventory_router.InventoryAppRouter",
 ]
 
+# Read-through cache for category trees and product detail payloads
+# (inventory.cache), stored in the CACHES alias below.
+INVENTORY_CACHE_ALIAS = os.getenv("INVENTORY_CACHE_ALIAS", "default")
+INVENTORY_CACHE_TIMEOUT = int(os.getenv("INVENTORY_CACHE_TIMEOUT", "3600"))
+
+# Seconds before a process notices seasonal events changed elsewhere
+# (inventory.events.current_events).
+INVENTORY_EVENT_RECHECK_SECONDS = int(os.getenv("INVENTORY_EVENT_RECHECK", "5"))
+
+# Seconds before a process notices completions changed elsewhere
+# (inventory.autocomplete.get_prefix_index).
+INVENTORY_AUTOCOMPLETE_RECHECK_SECONDS = int(
+    os.getenv("INVENTORY_AUTOCOMPLETE_RECHECK", "5")
+)
+
+# Share of requests whose queries are profiled per database alias
+# (inventory.profiling), reported in a Server-Timing header and logged to
+# "inventory.profiling" together with the SLOWEST statements and the query
+# shapes repeated at least DUPLICATES times.
+INVENTORY_QUERY_PROFILE_RATE = float(os.getenv("INVENTORY_QUERY_PROFILE_RATE", "0"))
+INVENTORY_QUERY_PROFILE_SLOWEST = int(os.getenv("INVENTORY_QUERY_PROFILE_SLOWEST", "5"))
+INVENTORY_QUERY_PROFILE_DUPLICATES = int(
+    os.getenv("INVENTORY_QUERY_PROFILE_DUPLICATES", "2")
+)
+
+# Product search (inventory.search): the PostgreSQL text search config of
+# the search vectors. Outside PostgreSQL, the trigram similarity a misspelled
+# word needs to match (PostgreSQL applies pg_trgm.word_similarity_threshold
+# instead) and how long the in-process index is cached at most.
+INVENTORY_SEARCH_CONFIG = os.getenv("INVENTORY_SEARCH_CONFIG", "english")
+INVENTORY_SEARCH_SIMILARITY = float(os.getenv("INVENTORY_SEARCH_SIMILARITY", "0.3"))
+INVENTORY_SEARCH_TIMEOUT = int(os.getenv("INVENTORY_SEARCH_TIMEOUT", "300"))
+
+# Incremental stock_status runs (inventory.stock.recompute_stock_status)
+# also revisit products updated this many seconds before the previous run
+# started, for transactions still open at the time.
+INVENTORY_STOCK_WATERMARK_OVERLAP = int(os.getenv("INVENTORY_STOCK_OVERLAP", "60"))
+
+# Low-stock report (inventory.stock.low_stock): product lines at or below
+# THRESHOLD units, or the threshold of the nearest category slug in
+# THRESHOLDS whose subtree the product belongs to.
+INVENTORY_LOW_STOCK_THRESHOLD = int(os.getenv("INVENTORY_LOW_STOCK_THRESHOLD", "5"))
+INVENTORY_LOW_STOCK_THRESHOLDS = {}
+
+# The nested product editor posts about six fields per product line and per
+# image, more than Django's default of 1000 for large products.
+DATA_UPLOAD_MAX_NUMBER_FIELDS = int(os.getenv("DATA_UPLOAD_MAX_NUMBER_FIELDS", "10000"))
+
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
 
@@ -136,6 +244,17 @@ USE_TZ = True
 
 STATIC_URL = "static/"
 
+MEDIA_URL = "media/"
+MEDIA_ROOT = os.getenv("MEDIA_ROOT", BASE_DIR / "media")
+
+# WebP derivatives rendered for every ProductImage (inventory.images), as
+# kind -> longest edge in pixels, by the generate_image_derivatives command.
+# ON_SAVE also renders them after each image save, in the saving process.
+INVENTORY_IMAGE_DERIVATIVES = {"thumbnail": 160, "listing": 480, "zoom": 1600}
+INVENTORY_IMAGE_DERIVATIVES_ON_SAVE = os.getenv(
+    "INVENTORY_IMAGE_DERIVATIVES_ON_SAVE", "false"
+).lower() in ("1", "true", "yes")
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.1/ref/settings/#default-auto-field
 
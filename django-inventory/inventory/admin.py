@@ -1,5 +1,10 @@
 import nested_admin
+from django import forms
 from django.contrib import admin
+from django.contrib.admin.utils import NotRelationField, get_fields_from_path
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db import router, transaction
+from django.db.models import Prefetch
 
 from .models import (
     Attribute,
@@ -11,22 +16,239 @@ from .models import (
     ProductType,
     SeasonalEvent,
 )
+from .signals import bulk_upserted
 
 admin.site.register(ProductLine)
 
 
+class RelatedListMixin:
+    """
+    Join the related objects shown on the changelist instead of fetching them
+    once per row. Paths come from foreign keys in list_display and from the
+    ``ordering`` lookup of display methods (``@admin.display(ordering=...)``).
+    """
+
+    def get_list_select_related(self, request):
+        list_select_related = super().get_list_select_related(request)
+        if list_select_related is True:
+            return True
+
+        paths = set(list_select_related or ())
+        for name in self.get_list_display(request):
+            paths.update(self._related_paths(name))
+        return tuple(sorted(paths)) or False
+
+    def _related_paths(self, name):
+        if callable(name):
+            attr = name
+        elif hasattr(self, name):
+            attr = getattr(self, name)
+        else:
+            try:
+                field = self.model._meta.get_field(name)
+            except FieldDoesNotExist:
+                attr = getattr(self.model, name, None)
+            else:
+                if field.many_to_one or field.one_to_one:
+                    return [name]
+                return []
+
+        ordering = getattr(attr, "admin_order_field", None)
+        if not isinstance(ordering, str):
+            return []
+
+        lookup = ordering.lstrip("-")
+        try:
+            fields = get_fields_from_path(self.model, lookup)
+        except (FieldDoesNotExist, NotRelationField):
+            return []
+
+        related = []
+        for part, field in zip(lookup.split("__"), fields):
+            if not (field.many_to_one or field.one_to_one):
+                break
+            related.append(part)
+        return ["__".join(related)] if related else []
+
+
+class LoadedRowField(forms.ModelChoiceField):
+    """Inline primary key field resolved from the rows its formset loaded."""
+
+    def __init__(self, formset, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.formset = formset
+
+    def to_python(self, value):
+        if value not in self.empty_values:
+            pk = self.formset.model._meta.pk
+            try:
+                row = self.formset._existing_object(pk.to_python(value))
+            except ValidationError:
+                row = None
+            if row is not None:
+                return row
+        return super().to_python(value)
+
+
+class PrefetchedInlineFormSet(nested_admin.NestedInlineFormSet):
+    """
+    Nested inline formset reading its rows from the parent row's prefetch
+    cache when the parent inline prefetched them, and loading them with its
+    own queryset's prefetches otherwise, so each nesting level of the editor
+    costs one query however many parent rows there are.
+    """
+
+    def get_queryset(self):
+        if not hasattr(self, "_rows"):
+            rows = self._prefetched_rows()
+            if rows is None:
+                queryset = super().get_queryset()
+                lookups = self.queryset._prefetch_related_lookups
+                if lookups and not queryset._prefetch_related_lookups:
+                    queryset = queryset.prefetch_related(*lookups)
+                rows = list(queryset)
+            self._rows = rows
+        return self._rows
+
+    def _prefetched_rows(self):
+        cache = getattr(self.instance, "_prefetched_objects_cache", {})
+        rows = cache.get(self.fk.remote_field.get_accessor_name())
+        if rows is None or not self.is_bound:
+            return rows
+        # Like nested_admin, keep only the rows the bound forms refer to.
+        pk_name = self.model._meta.pk.name
+        posted = {
+            self.data.get(f"{self.add_prefix(i)}-{pk_name}")
+            for i in range(self.initial_form_count())
+        }
+        return [row for row in rows if str(row.pk) in posted]
+
+    def add_fields(self, form, index):
+        super().add_fields(form, index)
+        field = form.fields.get(self._pk_field.name)
+        if type(field) is forms.ModelChoiceField:
+            form.fields[self._pk_field.name] = LoadedRowField(
+                self,
+                field.queryset,
+                initial=field.initial,
+                required=False,
+                widget=field.widget,
+            )
+
+
+class InlineRowForm(forms.ModelForm):
+    def validate_unique(self):
+        # Values a saved row keeps were unique when it was saved; only check
+        # what the form changes instead of one query per unique field.
+        exclude = self._get_validation_exclusions()
+        if not self.instance._state.adding:
+            exclude |= set(self.fields) - set(self.changed_data)
+        try:
+            self.instance.validate_unique(exclude=exclude)
+        except ValidationError as e:
+            self._update_errors(e)
+
+
+class BulkInlineSaveMixin:
+    """
+    Save every inline formset of the change form, nested ones included, with
+    one delete, bulk_create and bulk_update per model instead of a save()
+    per form. Unchanged forms are skipped, rows under a deleted parent are
+    left to its cascade, and bulk_upserted is sent for the rows written
+    since the bulk writes bypass post_save.
+    """
+
+    def save_related(self, request, form, formsets, change):
+        form.save_m2m()
+        by_model = {}
+        for formset in formsets:
+            by_model.setdefault(formset.model, []).append(formset)
+
+        deleted = set()
+        with transaction.atomic(using=router.db_for_write(self.model)):
+            # Formsets come parents first, so parents get their keys before
+            # their children are created.
+            for model, model_formsets in by_model.items():
+                self.save_inline_rows(model, model_formsets, deleted)
+
+    def save_inline_rows(self, model, formsets, deleted):
+        using = router.db_for_write(model)
+        names = {f.name for f in model._meta.concrete_fields if not f.primary_key}
+        doomed, new, changed, fields, saved_forms = [], [], [], set(), []
+        for formset in formsets:
+            formset.new_objects = []
+            formset.changed_objects = []
+            formset.deleted_objects = []
+            if (type(formset.instance), formset.instance.pk) in deleted:
+                continue
+            for row_form in formset.initial_forms:
+                obj = row_form.instance
+                if formset.can_delete and formset._should_delete_form(row_form):
+                    doomed.append(obj)
+                    formset.deleted_objects.append(obj)
+                elif row_form.has_changed():
+                    changed.append(obj)
+                    fields.update(names.intersection(row_form.changed_data))
+                    formset.changed_objects.append((obj, row_form.changed_data))
+                    saved_forms.append(row_form)
+            for row_form in formset.extra_forms:
+                if not row_form.has_changed() or (
+                    formset.can_delete and formset._should_delete_form(row_form)
+                ):
+                    continue
+                setattr(row_form.instance, formset.fk.name, formset.instance)
+                new.append(row_form.instance)
+                formset.new_objects.append(row_form.instance)
+                saved_forms.append(row_form)
+
+        rows = model._base_manager.using(using)
+        if doomed:
+            rows.filter(pk__in=[obj.pk for obj in doomed]).delete()
+            deleted.update((model, obj.pk) for obj in doomed)
+        if new:
+            rows.bulk_create(new)
+        if changed and fields:
+            update_fields = [model._meta.get_field(name) for name in sorted(fields)]
+            for obj in changed:
+                for field in update_fields:
+                    # bulk_update() skips pre_save(), which commits uploads.
+                    setattr(obj, field.attname, field.pre_save(obj, False))
+            rows.bulk_update(changed, [field.name for field in update_fields])
+        for row_form in saved_forms:
+            row_form._save_m2m()
+        if new or changed:
+            bulk_upserted.send(
+                sender=model, pks=[obj.pk for obj in new + changed], using=using
+            )
+
+
 class ProductImageInline(nested_admin.NestedStackedInline):
     model = ProductImage
+    form = InlineRowForm
+    formset = PrefetchedInlineFormSet
     extra = 1
 
 
 class ProductLineInline(nested_admin.NestedStackedInline):
     model = ProductLine
+    form = InlineRowForm
+    formset = PrefetchedInlineFormSet
     inlines = [ProductImageInline]
     extra = 1
 
+    def get_queryset(self, request):
+        return (
+            super()
+            .get_queryset(request)
+            .prefetch_related(
+                Prefetch("productimage_set", ProductImage.objects.order_by("pk"))
+            )
+        )
+
 
-class ProductAdmin(nested_admin.NestedModelAdmin):
+class ProductAdmin(
+    BulkInlineSaveMixin, RelatedListMixin, nested_admin.NestedModelAdmin
+):
     inlines = [ProductLineInline]
 
     list_display = (
@@ -46,7 +268,7 @@ class ProductAdmin(nested_admin.NestedModelAdmin):
 admin.site.register(Product, ProductAdmin)
 
 
-class SeasonalEventsAdmin(admin.ModelAdmin):
+class SeasonalEventsAdmin(RelatedListMixin, admin.ModelAdmin):
     list_display = ("name", "start_date", "end_date")
 
 
@@ -58,7 +280,7 @@ class AttributeValueInline(admin.TabularInline):
     extra = 1
 
 
-class AttributeAdmin(admin.ModelAdmin):
+class AttributeAdmin(RelatedListMixin, admin.ModelAdmin):
     inlines = [AttributeValueInline]
 
 
@@ -71,8 +293,28 @@ class ChildTypeInline(admin.TabularInline):
     extra = 1
 
 
-class ParentTypeAdmin(admin.ModelAdmin):
+class ParentTypeAdmin(RelatedListMixin, admin.ModelAdmin):
     inlines = [ChildTypeInline]
+    list_display = (
+        "name",
+        "level",
+        "parent_name",
+    )
+    readonly_fields = ("level", "subtypes")
+
+    @admin.display(description="parent", ordering="parent__name")
+    def parent_name(self, obj):
+        return obj.parent.name if obj.parent else None
+
+    @admin.display(description="all subtypes")
+    def subtypes(self, obj):
+        if obj.pk is None:
+            return ""
+        return ", ".join(
+            ProductType.objects.descendants(obj)
+            .order_by("level", "name")
+            .values_list("name", flat=True)
+        )
 
 
 admin.site.register(ProductType, ParentTypeAdmin)
@@ -84,13 +326,14 @@ class ChildCategoryInline(admin.TabularInline):
     extra = 1
 
 
-class ParentCategoryAdmin(admin.ModelAdmin):
+class ParentCategoryAdmin(RelatedListMixin, admin.ModelAdmin):
     inlines = [ChildCategoryInline]
     list_display = (
         "name",
         "parent_name",
     )
 
+    @admin.display(description="parent", ordering="parent__name")
     def parent_name(self, obj):
         return obj.parent.name if obj.parent else None
 
@@ -4,3 +4,14 @@ from django.apps import AppConfig
 class InventoryConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "inventory"
+
+    def ready(self):
+        from . import (  # noqa F401
+            autocomplete,
+            cache,
+            events,
+            images,
+            listing,
+            search,
+            stock,
+        )
@@ -0,0 +1,275 @@
+import bisect
+import sys
+import threading
+import time
+from array import array
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_delete, post_init, post_save, pre_save
+from django.dispatch import receiver
+
+from .cache import bump_sequence, get_sequence
+from .models import AttributeValue, Category, Product
+from .signals import bulk_upserted
+
+# Indexed models with the kind they are reported as, the field completed and
+# the rows that take part.
+SOURCES = {
+    "product": (Product, "name", {"is_active": True}),
+    "category": (Category, "name", {"is_active": True}),
+    "value": (AttributeValue, "attribute_value", {}),
+}
+KINDS = tuple(SOURCES)
+
+
+def _key(text):
+    return text.casefold()
+
+
+class PrefixIndex:
+    """
+    Completions in one list sorted case-insensitively, with the kind and id
+    of each held in parallel typed arrays rather than per entry objects. A
+    prefix query is a bisect to the first completion at or after the prefix
+    followed by a scan of the next ``limit`` matching ones, so the top
+    completions come back in alphabetical order, shortest first among those
+    sharing a stem.
+
+    Queries and in-place changes hold a lock, so a query never sees the
+    three sequences out of step while another thread changes them.
+    """
+
+    __slots__ = ("texts", "kinds", "ids", "_lock")
+
+    def __init__(self, entries=()):
+        entries = sorted(entries, key=lambda entry: _key(entry[2]))
+        self.texts = [text for _, _, text in entries]
+        self.kinds = array("B", (KINDS.index(kind) for kind, _, _ in entries))
+        self.ids = array("q", (pk for _, pk, _ in entries))
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, using=None):
+        def entries():
+            for kind, (model, field, filters) in SOURCES.items():
+                rows = model.objects.filter(**filters)
+                if using:
+                    rows = rows.using(using)
+                for pk, text in rows.values_list("pk", field).iterator():
+                    if text:
+                        yield kind, pk, text
+
+        return cls(entries())
+
+    def __len__(self):
+        return len(self.texts)
+
+    def complete(self, prefix, limit=10, kinds=None):
+        """
+        Up to ``limit`` completions of ``prefix`` as (kind, id, text) tuples,
+        from the ``kinds`` given (all of them by default).
+        """
+        prefix = _key(prefix.strip())
+        if not prefix or limit < 1:
+            return []
+        wanted = None if kinds is None else {KINDS.index(kind) for kind in kinds}
+        results = []
+        with self._lock:
+            position = bisect.bisect_left(self.texts, prefix, key=_key)
+            while position < len(self.texts) and len(results) < limit:
+                text = self.texts[position]
+                if not _key(text).startswith(prefix):
+                    break
+                kind = self.kinds[position]
+                if wanted is None or kind in wanted:
+                    results.append((KINDS[kind], self.ids[position], text))
+                position += 1
+        return results
+
+    def add(self, kind, pk, text):
+        with self._lock:
+            position = bisect.bisect_right(self.texts, _key(text), key=_key)
+            self.texts.insert(position, text)
+            self.kinds.insert(position, KINDS.index(kind))
+            self.ids.insert(position, pk)
+
+    def discard(self, kind, pk, text):
+        key = _key(text)
+        kind = KINDS.index(kind)
+        with self._lock:
+            position = bisect.bisect_left(self.texts, key, key=_key)
+            while position < len(self.texts) and _key(self.texts[position]) == key:
+                if self.kinds[position] == kind and self.ids[position] == pk:
+                    del self.texts[position]
+                    del self.kinds[position]
+                    del self.ids[position]
+                    return
+                position += 1
+
+    def memory_bytes(self):
+        """Bytes held by the index: its containers and completion strings."""
+        return (
+            sys.getsizeof(self.texts)
+            + sum(map(sys.getsizeof, self.texts))
+            + sys.getsizeof(self.kinds)
+            + sys.getsizeof(self.ids)
+        )
+
+
+class _Snapshot:
+    __slots__ = ("sequence", "index", "checked_at")
+
+    def __init__(self, sequence, index):
+        self.sequence = sequence
+        self.index = index
+        self.checked_at = time.monotonic()
+
+
+_snapshot = None
+
+
+def get_prefix_index():
+    """
+    The process-local PrefixIndex. Changes made by this process are applied
+    to it in place as they commit; changes made elsewhere, and bulk writes,
+    retire it, which is noticed within INVENTORY_AUTOCOMPLETE_RECHECK_SECONDS.
+    """
+    global _snapshot
+    snapshot = _snapshot
+    recheck = getattr(settings, "INVENTORY_AUTOCOMPLETE_RECHECK_SECONDS", 5)
+    if snapshot is None or time.monotonic() - snapshot.checked_at >= recheck:
+        sequence = get_sequence("autocomplete", "all")
+        if snapshot is None or snapshot.sequence != sequence:
+            snapshot = _Snapshot(sequence, PrefixIndex.load())
+        else:
+            snapshot.checked_at = time.monotonic()
+        _snapshot = snapshot
+    return snapshot.index
+
+
+def autocomplete(prefix, limit=10, kinds=None):
+    """Completions of ``prefix`` as dicts, answered from memory."""
+    return [
+        {"kind": kind, "id": pk, "text": text}
+        for kind, pk, text in get_prefix_index().complete(prefix, limit, kinds)
+    ]
+
+
+def invalidate_autocomplete(using=None):
+    def invalidate():
+        global _snapshot
+        _snapshot = None
+        bump_sequence("autocomplete", "all")
+
+    transaction.on_commit(invalidate, using=using)
+
+
+def _update_on_commit(kind, pk, old, new, using):
+    if old == new:
+        return
+
+    def update():
+        global _snapshot
+        sequence = bump_sequence("autocomplete", "all")
+        snapshot = _snapshot
+        if snapshot is None:
+            return
+        if sequence != snapshot.sequence + 1:
+            # Changes were made elsewhere since the index was loaded or last
+            # updated: reload it on the next query.
+            _snapshot = None
+            return
+        if old:
+            snapshot.index.discard(kind, pk, old)
+        if new:
+            snapshot.index.add(kind, pk, new)
+        snapshot.sequence = sequence
+
+    transaction.on_commit(update, using=using)
+
+
+def _indexed_text(kind, instance):
+    _, field, filters = SOURCES[kind]
+    if any(getattr(instance, name) != value for name, value in filters.items()):
+        return None
+    return getattr(instance, field) or None
+
+
+def _indexed_fields_saved(kind, update_fields):
+    _, field, filters = SOURCES[kind]
+    return update_fields is None or not update_fields.isdisjoint({field, *filters})
+
+
+def _loaded_text(kind, instance):
+    _, field, filters = SOURCES[kind]
+    if all(name in instance.__dict__ for name in (field, *filters)):
+        return _indexed_text(kind, instance)
+    return _UNKNOWN
+
+
+def _stored_text(kind, pk, using):
+    model, field, filters = SOURCES[kind]
+    return (
+        model.objects.using(using)
+        .filter(pk=pk, **filters)
+        .values_list(field, flat=True)
+        .first()
+    ) or None
+
+
+_KIND = {model: kind for kind, (model, _, _) in SOURCES.items()}
+_UNKNOWN = object()
+
+
+@receiver(post_init, sender=Product)
+@receiver(post_init, sender=Category)
+@receiver(post_init, sender=AttributeValue)
+def _remember_loaded_text(sender, instance, **kwargs):
+    # Deferred fields are left alone rather than loaded here.
+    instance._autocomplete_loaded = _loaded_text(_KIND[sender], instance)
+
+
+@receiver(pre_save, sender=Product)
+@receiver(pre_save, sender=Category)
+@receiver(pre_save, sender=AttributeValue)
+def _remember_indexed_text(sender, instance, using, update_fields, **kwargs):
+    # The completion to replace is only known before the row changes, and
+    # only looked up when the instance no longer holds the text it loaded.
+    kind = _KIND[sender]
+    if not _indexed_fields_saved(kind, update_fields):
+        return
+    if instance._state.adding:
+        instance._autocomplete_text = None
+    elif instance._autocomplete_loaded == _indexed_text(kind, instance):
+        instance._autocomplete_text = instance._autocomplete_loaded
+    else:
+        instance._autocomplete_text = _stored_text(kind, instance.pk, using)
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_save, sender=Category)
+@receiver(post_save, sender=AttributeValue)
+def _indexed_model_saved(sender, instance, using, update_fields, **kwargs):
+    kind = _KIND[sender]
+    if not _indexed_fields_saved(kind, update_fields):
+        return
+    text = _indexed_text(kind, instance)
+    _update_on_commit(
+        kind, instance.pk, getattr(instance, "_autocomplete_text", None), text, using
+    )
+    instance._autocomplete_loaded = text
+
+
+@receiver(post_delete, sender=Product)
+@receiver(post_delete, sender=Category)
+@receiver(post_delete, sender=AttributeValue)
+def _indexed_model_deleted(sender, instance, using, **kwargs):
+    kind = _KIND[sender]
+    _update_on_commit(kind, instance.pk, _indexed_text(kind, instance), None, using)
+
+
+@receiver(bulk_upserted, sender=Product)
+@receiver(bulk_upserted, sender=Category)
+def _bulk_upserted(sender, pks, using, **kwargs):
+    invalidate_autocomplete(using)
@@ -0,0 +1,88 @@
+import io
+
+from django.db import connections, router
+
+
+def insert_rows(model, rows, using=None, batch_size=5000):
+    """
+    Insert plain dict rows for ``model`` in as few statements as possible.
+
+    PostgreSQL databases receive each batch through ``COPY ... FROM STDIN``;
+    every other backend falls back to ``bulk_create``. Generated primary keys
+    are not returned, callers look rows up again by their natural key.
+    """
+    using = using or router.db_for_write(model)
+    rows = list(rows)
+    if not rows:
+        return 0
+
+    if connections[using].vendor == "postgresql":
+        for start in range(0, len(rows), batch_size):
+            copy_rows(model, rows[start : start + batch_size], using)
+    else:
+        model.objects.using(using).bulk_create(
+            (model(**row) for row in rows), batch_size=batch_size
+        )
+    return len(rows)
+
+
+def upsert_rows(model, rows, using=None, batch_size=5000):
+    """
+    Insert plain dict rows for ``model``, overwriting the rows already stored
+    under the same primary key, and return the set of keys written. Unlike
+    deleting and inserting again, concurrent writers of the same keys never
+    collide on the primary key.
+    """
+    using = using or router.db_for_write(model)
+    rows = list(rows)
+    if not rows:
+        return set()
+
+    pk = model._meta.pk
+    model.objects.using(using).bulk_create(
+        (model(**row) for row in rows),
+        batch_size=batch_size,
+        update_conflicts=True,
+        unique_fields=[pk.name],
+        update_fields=[
+            field.name
+            for field in map(model._meta.get_field, rows[0])
+            if not field.primary_key
+        ],
+    )
+    return {row[pk.attname] for row in rows}
+
+
+def copy_rows(model, rows, using):
+    connection = connections[using]
+    # COPY bypasses Field.pre_save(), so rows must carry every non-null
+    # column themselves, auto_now timestamps included.
+    fields = [model._meta.get_field(name) for name in rows[0]]
+
+    buffer = io.StringIO()
+    for row in rows:
+        buffer.write(
+            "\t".join(
+                _copy_value(field.get_db_prep_save(row[name], connection))
+                for name, field in zip(rows[0], fields)
+            )
+        )
+        buffer.write("\n")
+
+    table = connection.ops.quote_name(model._meta.db_table)
+    columns = ", ".join(connection.ops.quote_name(field.column) for field in fields)
+    sql = f"COPY {table} ({columns}) FROM STDIN"
+    with connection.cursor() as cursor, cursor.cursor.copy(sql) as copy:
+        copy.write(buffer.getvalue())
+
+
+def _copy_value(value):
+    if value is None:
+        return "\\N"
+    return (
+        str(value)
+        .replace("\\", "\\\\")
+        .replace("\t", "\\t")
+        .replace("\n", "\\n")
+        .replace("\r", "\\r")
+    )
@@ -0,0 +1,403 @@
+import asyncio
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models.signals import (
+    m2m_changed,
+    post_delete,
+    post_save,
+    pre_delete,
+    pre_save,
+)
+from django.dispatch import receiver
+
+from .catalog import aget_record, iter_catalog
+from .models import (
+    Attribute,
+    AttributeValue,
+    Category,
+    CategoryClosure,
+    Product,
+    ProductImage,
+    ProductLine,
+)
+from .signals import bulk_upserted, stock_changed
+
+PREFIX = "inventory"
+
+
+def _cache():
+    return caches[getattr(settings, "INVENTORY_CACHE_ALIAS", "default")]
+
+
+def _timeout():
+    return getattr(settings, "INVENTORY_CACHE_TIMEOUT", 3600)
+
+
+def _version_key(kind, pk):
+    return f"{PREFIX}:version:{kind}:{pk}"
+
+
+def get_version(kind, pk):
+    """
+    Current version token of one cached object. Tokens are random rather than
+    counters, so an evicted version key can never bring back an old entry.
+    """
+    cache = _cache()
+    key = _version_key(kind, pk)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, uuid.uuid4().hex, None)
+        version = cache.get(key)
+    return version
+
+
+async def aget_version(kind, pk):
+    cache = _cache()
+    key = _version_key(kind, pk)
+    version = await cache.aget(key)
+    if version is None:
+        await cache.aadd(key, uuid.uuid4().hex, None)
+        version = await cache.aget(key)
+    return version
+
+
+def bump_versions(kind, pks):
+    """
+    Invalidate every cached payload of the given objects at once, returning
+    their new version tokens by pk.
+    """
+    versions = {pk: uuid.uuid4().hex for pk in pks}
+    _cache().set_many(
+        {_version_key(kind, pk): version for pk, version in versions.items()}, None
+    )
+    return versions
+
+
+def _sequence_key(kind, pk):
+    return f"{PREFIX}:sequence:{kind}:{pk}"
+
+
+def _sequence_start():
+    return uuid.uuid4().int >> 80
+
+
+def get_sequence(kind, pk):
+    """
+    Current value of the change counter of one object. Counters start at a
+    random value, so one evicted and started again does not repeat the
+    values seen before.
+    """
+    cache = _cache()
+    key = _sequence_key(kind, pk)
+    value = cache.get(key)
+    if value is None:
+        cache.add(key, _sequence_start(), None)
+        value = cache.get(key)
+    return value
+
+
+def bump_sequence(kind, pk):
+    """Advance the change counter of one object atomically, returning it."""
+    cache = _cache()
+    key = _sequence_key(kind, pk)
+    try:
+        return cache.incr(key)
+    except ValueError:
+        cache.add(key, _sequence_start(), None)
+        return cache.incr(key)
+
+
+def get_or_build(key, build, timeout=None):
+    """
+    Read-through lookup that lets a single caller rebuild an entry. Entries
+    outlive their refresh time by a grace period during which other callers
+    keep getting the stale payload instead of piling onto the database; on a
+    cold miss they wait briefly for the rebuilding caller.
+    """
+    cache = _cache()
+    timeout = timeout or _timeout()
+    lock_key = f"{key}:lock"
+    lock_timeout = getattr(settings, "INVENTORY_CACHE_LOCK_TIMEOUT", 10)
+
+    entry = cache.get(key)
+    if entry is not None and time.time() < entry[1]:
+        return entry[0]
+    token = uuid.uuid4().hex
+    locked = cache.add(lock_key, token, lock_timeout)
+    if not locked:
+        if entry is not None:
+            return entry[0]
+        deadline = time.monotonic() + lock_timeout
+        while time.monotonic() < deadline:
+            time.sleep(0.05)
+            entry = cache.get(key)
+            if entry is not None:
+                return entry[0]
+        # The rebuilding caller is overdue: build too, leaving its lock be.
+
+    try:
+        value = build()
+        if value is not None:
+            cache.set(key, (value, time.time() + timeout), timeout * 2)
+        return value
+    finally:
+        # A build outliving the lock timeout may find another caller's lock.
+        if locked and cache.get(lock_key) == token:
+            cache.delete(lock_key)
+
+
+async def aget_or_build(key, abuild, timeout=None):
+    """get_or_build() for coroutine builders, waiting without a thread."""
+    cache = _cache()
+    timeout = timeout or _timeout()
+    lock_key = f"{key}:lock"
+    lock_timeout = getattr(settings, "INVENTORY_CACHE_LOCK_TIMEOUT", 10)
+
+    entry = await cache.aget(key)
+    if entry is not None and time.time() < entry[1]:
+        return entry[0]
+    token = uuid.uuid4().hex
+    locked = await cache.aadd(lock_key, token, lock_timeout)
+    if not locked:
+        if entry is not None:
+            return entry[0]
+        deadline = time.monotonic() + lock_timeout
+        while time.monotonic() < deadline:
+            await asyncio.sleep(0.05)
+            entry = await cache.aget(key)
+            if entry is not None:
+                return entry[0]
+        # The rebuilding caller is overdue: build too, leaving its lock be.
+
+    try:
+        value = await abuild()
+        if value is not None:
+            await cache.aset(key, (value, time.time() + timeout), timeout * 2)
+        return value
+    finally:
+        if locked and await cache.aget(lock_key) == token:
+            await cache.adelete(lock_key)
+
+
+def get_product_detail(product_id):
+    """Nested product payload (lines, attribute values, images) or None."""
+    version = get_version("product", product_id)
+
+    def build():
+        queryset = Product.objects.filter(pk=product_id)
+        return next(iter_catalog(queryset, chunk_size=1), None)
+
+    return get_or_build(f"{PREFIX}:product:{product_id}:{version}", build)
+
+
+async def aget_product_detail(product_id):
+    """Async get_product_detail(), sharing its cache entries."""
+    version = await aget_version("product", product_id)
+    return await aget_or_build(
+        f"{PREFIX}:product:{product_id}:{version}", lambda: aget_record(product_id)
+    )
+
+
+def get_category_tree(root_id=None):
+    """
+    Active categories below ``root_id`` (the whole forest when None) as nested
+    dicts with their children, built from one closure table query.
+    """
+    version = get_version("category", root_id or "root")
+
+    def build():
+        categories = Category.objects.filter(is_active=True)
+        if root_id is not None:
+            categories = categories.descendants(root_id, include_self=True)
+        nodes = {
+            row["id"]: {**row, "children": []}
+            for row in categories.order_by("level", "name").values(
+                "id", "name", "slug", "level", "parent_id"
+            )
+        }
+        roots = []
+        for node in nodes.values():
+            parent = nodes.get(node["parent_id"])
+            if parent is not None and node["id"] != root_id:
+                parent["children"].append(node)
+            else:
+                roots.append(node)
+        return roots
+
+    return get_or_build(f"{PREFIX}:category:{root_id or 'root'}:{version}", build)
+
+
+def invalidate_products(product_ids, using=None):
+    product_ids = set(product_ids)
+    if product_ids:
+        transaction.on_commit(
+            lambda: bump_versions("product", product_ids), using=using
+        )
+
+
+def invalidate_categories(category_ids, using=None):
+    category_ids = set(category_ids) | {"root"}
+    transaction.on_commit(lambda: bump_versions("category", category_ids), using=using)
+
+
+def invalidate_facets(using=None):
+    # Facet indexes span whole category subtrees, so any membership change
+    # retires all of them. Stock moves leave membership alone.
+    transaction.on_commit(lambda: bump_versions("facets", ["all"]), using=using)
+
+
+def _category_ancestor_ids(category_id, using):
+    return set(
+        CategoryClosure.objects.using(using)
+        .filter(descendant_id=category_id)
+        .values_list("ancestor_id", flat=True)
+    )
+
+
+@receiver(pre_save, sender=Category)
+@receiver(pre_delete, sender=Category)
+def _remember_category_ancestors(sender, instance, using, **kwargs):
+    # A reparented or deleted category drops out of its old ancestors'
+    # subtrees, which are only known before the closure rows change.
+    instance._cached_ancestor_ids = (
+        set() if instance._state.adding else _category_ancestor_ids(instance.pk, using)
+    )
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def _category_changed(sender, instance, using, **kwargs):
+    ancestor_ids = getattr(instance, "_cached_ancestor_ids", set())
+    if kwargs.get("signal") is post_save:
+        # Category.save() links the category below its new parent only after
+        # post_save, so its new ancestors are read through the parent's rows.
+        if instance.parent_id is not None:
+            ancestor_ids |= _category_ancestor_ids(instance.parent_id, using)
+        invalidate_products(
+            Product.objects.using(using)
+            .filter(category=instance)
+            .values_list("id", flat=True),
+            using,
+        )
+    invalidate_categories(ancestor_ids | {instance.pk}, using)
+    invalidate_facets(using)
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+def _product_changed(sender, instance, using, **kwargs):
+    invalidate_products([instance.pk], using)
+    invalidate_facets(using)
+
+
+@receiver(post_save, sender=ProductLine)
+@receiver(post_delete, sender=ProductLine)
+def _product_line_changed(sender, instance, using, **kwargs):
+    invalidate_products([instance.product_id], using)
+    invalidate_facets(using)
+
+
+@receiver(post_save, sender=ProductImage)
+@receiver(post_delete, sender=ProductImage)
+def _product_image_changed(sender, instance, using, **kwargs):
+    invalidate_products(
+        ProductLine.objects.using(using)
+        .filter(pk=instance.product_line_id)
+        .values_list("product_id", flat=True),
+        using,
+    )
+
+
+@receiver(post_save, sender=AttributeValue)
+@receiver(pre_delete, sender=AttributeValue)
+def _attribute_value_changed(sender, instance, using, **kwargs):
+    invalidate_products(
+        ProductLine.objects.using(using)
+        .filter(attribute_values=instance)
+        .values_list("product_id", flat=True),
+        using,
+    )
+    invalidate_facets(using)
+
+
+@receiver(post_save, sender=Attribute)
+def _attribute_changed(sender, instance, using, **kwargs):
+    invalidate_products(
+        ProductLine.objects.using(using)
+        .filter(attribute_values__attribute=instance)
+        .values_list("product_id", flat=True),
+        using,
+    )
+    invalidate_facets(using)
+
+
+@receiver(m2m_changed, sender=ProductLine.attribute_values.through)
+def _line_attribute_values_changed(
+    sender, instance, action, reverse, pk_set, using, **kwargs
+):
+    if action not in ("post_add", "post_remove", "pre_clear"):
+        return
+    invalidate_facets(using)
+    if not reverse:
+        invalidate_products([instance.product_id], using)
+        return
+
+    lines = ProductLine.objects.using(using)
+    if action == "pre_clear":
+        lines = lines.filter(attribute_values=instance)
+    else:
+        lines = lines.filter(pk__in=pk_set)
+    invalidate_products(lines.values_list("product_id", flat=True), using)
+
+
+@receiver(stock_changed)
+def _stock_changed(sender, product_ids, using, **kwargs):
+    invalidate_products(product_ids, using)
+
+
+@receiver(bulk_upserted, sender=Product)
+def _products_upserted(sender, pks, using, **kwargs):
+    invalidate_products(pks, using)
+    invalidate_facets(using)
+
+
+@receiver(bulk_upserted, sender=ProductLine)
+def _product_lines_upserted(sender, pks, using, **kwargs):
+    invalidate_products(
+        ProductLine.objects.using(using)
+        .filter(pk__in=pks)
+        .values_list("product_id", flat=True),
+        using,
+    )
+    invalidate_facets(using)
+
+
+@receiver(bulk_upserted, sender=ProductImage)
+def _product_images_upserted(sender, pks, using, **kwargs):
+    invalidate_products(
+        ProductLine.objects.using(using)
+        .filter(productimage__pk__in=pks)
+        .values_list("product_id", flat=True),
+        using,
+    )
+
+
+@receiver(bulk_upserted, sender=Category)
+def _categories_upserted(sender, pks, using, **kwargs):
+    ancestor_ids = set(
+        CategoryClosure.objects.using(using)
+        .filter(descendant_id__in=pks)
+        .values_list("ancestor_id", flat=True)
+    )
+    invalidate_categories(ancestor_ids | set(pks), using)
+    invalidate_products(
+        Product.objects.using(using)
+        .filter(category_id__in=pks)
+        .values_list("id", flat=True),
+        using,
+    )
+    invalidate_facets(using)
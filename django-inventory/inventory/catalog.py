@@ -0,0 +1,297 @@
+import asyncio
+import csv
+import itertools
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+from .models import Product, ProductImage, ProductLine, ProductLine_AttributeValue
+
+CSV_COLUMNS = [
+    "pid",
+    "name",
+    "slug",
+    "description",
+    "category",
+    "is_active",
+    "is_digital",
+    "stock_status",
+    "line_sku",
+    "line_price",
+    "line_stock_qty",
+    "line_is_active",
+    "line_order",
+    "line_weight",
+    "attributes",
+    "images",
+]
+
+TRUE_VALUES = {"1", "t", "true", "y", "yes"}
+
+
+def read_jsonl(stream):
+    """One product per line, with its lines, attributes and images nested."""
+    for number, line in enumerate(stream, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield json.loads(line)
+        except json.JSONDecodeError as exc:
+            raise ValueError(f"Line {number}: {exc}") from exc
+
+
+def read_csv(stream):
+    """
+    One product line per row. Consecutive rows sharing a ``pid`` belong to the
+    same product, whose columns are read from the first of them. Attributes
+    are written as ``colour=red;size=m`` and images as ``path|alt text;...``.
+    """
+    rows = csv.DictReader(stream)
+    for pid, group in itertools.groupby(rows, key=lambda row: row["pid"]):
+        group = list(group)
+        first = group[0]
+        yield {
+            "pid": pid,
+            "name": first["name"],
+            "slug": first.get("slug") or None,
+            "description": first.get("description") or None,
+            "category": first.get("category") or None,
+            "is_active": parse_bool(first.get("is_active")),
+            "is_digital": parse_bool(first.get("is_digital")),
+            "stock_status": first.get("stock_status") or None,
+            "lines": [_csv_line(row) for row in group if row.get("line_price")],
+        }
+
+
+def _csv_line(row):
+    attributes = dict(
+        pair.split("=", 1) for pair in (row.get("attributes") or "").split(";") if pair
+    )
+    images = [
+        dict(zip(("url", "alternative_text"), image.split("|", 1)), order=order)
+        for order, image in enumerate((row.get("images") or "").split(";"), start=1)
+        if image
+    ]
+    return {
+        "sku": row.get("line_sku") or None,
+        "price": row["line_price"],
+        "stock_qty": int(row.get("line_stock_qty") or 0),
+        "is_active": parse_bool(row.get("line_is_active")),
+        "order": int(row["line_order"]),
+        "weight": float(row["line_weight"]),
+        "attributes": attributes,
+        "images": images,
+    }
+
+
+def parse_bool(value):
+    if isinstance(value, bool):
+        return value
+    return str(value or "").strip().lower() in TRUE_VALUES
+
+
+PRODUCT_VALUES = (
+    "id",
+    "pid",
+    "name",
+    "slug",
+    "description",
+    "is_active",
+    "is_digitial",
+    "stock_status",
+    "category__slug",
+)
+
+
+def iter_catalog(queryset=None, using=None, chunk_size=1000):
+    """
+    Yield one nested record per product, in the shape read_jsonl() reads.
+
+    Products are walked in primary key order with keyset pagination, so every
+    chunk costs the same however deep the export is. Each chunk's lines,
+    images and attribute values are loaded with one query apiece from
+    values() rows, and streamed through server-side cursors where the
+    backend has them.
+    """
+    if queryset is None:
+        queryset = Product.objects.all()
+    if using:
+        queryset = queryset.using(using)
+
+    last_id = 0
+    while True:
+        products = list(
+            queryset.filter(id__gt=last_id)
+            .order_by("id")
+            .values(*PRODUCT_VALUES)[:chunk_size]
+        )
+        if not products:
+            return
+        last_id = products[-1]["id"]
+        product_ids = [product["id"] for product in products]
+        yield from assemble_records(
+            products,
+            line_rows(product_ids, queryset.db).iterator(chunk_size=chunk_size),
+            attribute_rows(product_ids, queryset.db).iterator(chunk_size=chunk_size),
+            image_rows(product_ids, queryset.db).iterator(chunk_size=chunk_size),
+        )
+
+
+async def aget_record(product_id, using=None):
+    """
+    Async twin of a single-product iter_catalog(): the product row first,
+    then its lines, attribute values and images requested concurrently.
+    """
+    products = Product.objects.filter(pk=product_id)
+    if using:
+        products = products.using(using)
+    try:
+        product = await products.values(*PRODUCT_VALUES).aget()
+    except Product.DoesNotExist:
+        return None
+
+    product_ids = [product["id"]]
+    lines, attributes, images = await asyncio.gather(
+        _alist(line_rows(product_ids, products.db)),
+        _alist(attribute_rows(product_ids, products.db)),
+        _alist(image_rows(product_ids, products.db)),
+    )
+    return next(assemble_records([product], lines, attributes, images))
+
+
+async def _alist(queryset):
+    return [row async for row in queryset]
+
+
+def line_rows(product_ids, using):
+    return (
+        ProductLine.objects.using(using)
+        .filter(product_id__in=product_ids)
+        .order_by("product_id", "order", "id")
+        .values(
+            "id",
+            "product_id",
+            "sku",
+            "price",
+            "stock_qty",
+            "is_active",
+            "order",
+            "weight",
+        )
+    )
+
+
+def attribute_rows(product_ids, using):
+    return (
+        ProductLine_AttributeValue.objects.using(using)
+        .filter(product_line__product_id__in=product_ids)
+        .order_by("id")
+        .values_list(
+            "product_line_id",
+            "attribute_value__attribute__name",
+            "attribute_value__attribute_value",
+        )
+    )
+
+
+def image_rows(product_ids, using):
+    return (
+        ProductImage.objects.using(using)
+        .filter(product_line__product_id__in=product_ids)
+        .order_by("product_line_id", "order", "id")
+        .values("product_line_id", "url", "alternative_text", "order")
+    )
+
+
+def assemble_records(products, lines, attributes, images):
+    """
+    Nest line, attribute and image rows under their products. The attribute
+    and image rows are only consumed when the products have lines at all,
+    which spares those queries when they are passed as lazy iterators.
+    """
+    records = {}
+    lines_by_product = {product["id"]: [] for product in products}
+    for line in lines:
+        record = {
+            "sku": line["sku"],
+            "price": line["price"],
+            "stock_qty": line["stock_qty"],
+            "is_active": line["is_active"],
+            "order": line["order"],
+            "weight": line["weight"],
+            "attributes": {},
+            "images": [],
+        }
+        records[line["id"]] = record
+        lines_by_product[line["product_id"]].append(record)
+
+    if records:
+        for line_id, name, value in attributes:
+            records[line_id]["attributes"][name] = value
+
+        for image in images:
+            records[image.pop("product_line_id")]["images"].append(image)
+
+    for product in products:
+        yield {
+            "pid": product["pid"],
+            "name": product["name"],
+            "slug": product["slug"],
+            "description": product["description"],
+            "category": product["category__slug"],
+            "is_active": product["is_active"],
+            "is_digital": product["is_digitial"],
+            "stock_status": product["stock_status"],
+            "lines": lines_by_product[product["id"]],
+        }
+
+
+def write_jsonl(records, stream):
+    count = 0
+    for count, record in enumerate(records, start=1):
+        stream.write(json.dumps(record, cls=DjangoJSONEncoder) + "\n")
+    return count
+
+
+def write_csv(records, stream):
+    writer = csv.DictWriter(stream, CSV_COLUMNS)
+    writer.writeheader()
+    count = 0
+    for count, record in enumerate(records, start=1):
+        product = {
+            "pid": record["pid"],
+            "name": record["name"],
+            "slug": record["slug"],
+            "description": record["description"],
+            "category": record["category"],
+            "is_active": record["is_active"],
+            "is_digital": record["is_digital"],
+            "stock_status": record["stock_status"],
+        }
+        if not record["lines"]:
+            writer.writerow(product)
+        for line in record["lines"]:
+            writer.writerow(
+                {
+                    **product,
+                    "line_sku": line["sku"],
+                    "line_price": line["price"],
+                    "line_stock_qty": line["stock_qty"],
+                    "line_is_active": line["is_active"],
+                    "line_order": line["order"],
+                    "line_weight": line["weight"],
+                    "attributes": ";".join(
+                        f"{name}={value}" for name, value in line["attributes"].items()
+                    ),
+                    "images": ";".join(
+                        f"{image['url']}|{image['alternative_text']}"
+                        for image in line["images"]
+                    ),
+                }
+            )
+    return count
+
+
+READERS = {"jsonl": read_jsonl, "csv": read_csv}
+WRITERS = {"jsonl": write_jsonl, "csv": write_csv}
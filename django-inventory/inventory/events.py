@@ -0,0 +1,121 @@
+import bisect
+import time
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .cache import bump_versions, get_version
+from .models import SeasonalEvent
+
+EVENT_FIELDS = ("id", "name", "start_date", "end_date")
+
+
+class EventSchedule:
+    """
+    Seasonal events cut at every start and end into segments, each holding
+    the events running throughout it. ``segments[i]`` covers
+    ``[boundaries[i], boundaries[i + 1])``, so a point lookup is one bisect
+    and a range lookup a slice.
+    """
+
+    __slots__ = ("boundaries", "segments")
+
+    def __init__(self, events):
+        starts, ends = {}, {}
+        for event in events:
+            if event["start_date"] < event["end_date"]:
+                starts.setdefault(event["start_date"], []).append(event)
+                ends.setdefault(event["end_date"], []).append(event)
+
+        self.boundaries = sorted(starts.keys() | ends.keys())
+        self.segments = []
+        running = {}
+        for boundary in self.boundaries:
+            for event in ends.get(boundary, ()):
+                del running[event["id"]]
+            for event in starts.get(boundary, ()):
+                running[event["id"]] = event
+            self.segments.append(
+                tuple(
+                    sorted(running.values(), key=lambda e: (e["start_date"], e["id"]))
+                )
+            )
+
+    @classmethod
+    def load(cls, since, using=None):
+        """Schedule of every event that has not ended by ``since``."""
+        events = SeasonalEvent.objects.filter(end_date__gt=since)
+        if using:
+            events = events.using(using)
+        return cls(events.values(*EVENT_FIELDS))
+
+    def active_at(self, moment):
+        position = bisect.bisect_right(self.boundaries, moment) - 1
+        return self.segments[position] if position >= 0 else ()
+
+    def overlapping(self, start, end):
+        first = max(bisect.bisect_right(self.boundaries, start) - 1, 0)
+        last = bisect.bisect_left(self.boundaries, end)
+        events = {}
+        for segment in self.segments[first:last]:
+            for event in segment:
+                events.setdefault(event["id"], event)
+        return sorted(events.values(), key=lambda e: (e["start_date"], e["id"]))
+
+    def next_boundary(self, moment):
+        position = bisect.bisect_right(self.boundaries, moment)
+        if position < len(self.boundaries):
+            return self.boundaries[position]
+        return None
+
+
+class _Snapshot:
+    __slots__ = ("version", "schedule", "checked_at")
+
+    def __init__(self, version, schedule):
+        self.version = version
+        self.schedule = schedule
+        self.checked_at = time.monotonic()
+
+
+_snapshot = None
+
+
+def current_events():
+    """
+    Events running now, as dicts of EVENT_FIELDS, from a process-local
+    schedule. The schedule holds every upcoming boundary, so the answer turns
+    over when an event starts or ends without touching the database; it is
+    reloaded only when an event is saved or deleted, which other processes
+    notice within INVENTORY_EVENT_RECHECK_SECONDS.
+    """
+    global _snapshot
+    now = timezone.now()
+    snapshot = _snapshot
+    recheck = getattr(settings, "INVENTORY_EVENT_RECHECK_SECONDS", 5)
+    if snapshot is None or time.monotonic() - snapshot.checked_at >= recheck:
+        version = get_version("events", "all")
+        if snapshot is None or snapshot.version != version:
+            snapshot = _Snapshot(version, EventSchedule.load(now))
+        else:
+            snapshot.checked_at = time.monotonic()
+        _snapshot = snapshot
+    return snapshot.schedule.active_at(now)
+
+
+def invalidate_events(using=None):
+    def invalidate():
+        global _snapshot
+        _snapshot = None
+        bump_versions("events", ["all"])
+
+    transaction.on_commit(invalidate, using=using)
+
+
+@receiver(post_save, sender=SeasonalEvent)
+@receiver(post_delete, sender=SeasonalEvent)
+def _seasonal_event_changed(sender, instance, using, **kwargs):
+    invalidate_events(using)
@@ -0,0 +1,131 @@
+from django.conf import settings
+
+from .cache import PREFIX, get_or_build, get_version
+from .models import ProductLine
+
+
+class FacetIndex:
+    """
+    Attribute value membership of the active product lines in one category
+    subtree, stored as one bitmap (a Python int) per attribute value where
+    bit ``i`` stands for ``line_ids[i]``. Filtering and facet counting are
+    then bitwise ANDs/ORs and popcounts, with no self-joins per attribute.
+    """
+
+    __slots__ = ("line_ids", "members", "values")
+
+    def __init__(self, rows):
+        positions = {}
+        value_positions = {}
+        self.line_ids = []
+        self.values = {}
+        for line_id, value_id, attribute, value in rows:
+            position = positions.get(line_id)
+            if position is None:
+                position = positions[line_id] = len(self.line_ids)
+                self.line_ids.append(line_id)
+            if value_id is not None:
+                self.values[(attribute, value)] = value_id
+                value_positions.setdefault(value_id, []).append(position)
+
+        size = (len(self.line_ids) + 7) // 8
+        self.members = {}
+        for value_id, value_list in value_positions.items():
+            bitmap = bytearray(size)
+            for position in value_list:
+                bitmap[position >> 3] |= 1 << (position & 7)
+            self.members[value_id] = int.from_bytes(bitmap, "little")
+
+    @classmethod
+    def build(cls, category=None, using=None):
+        lines = ProductLine.objects.filter(is_active=True, product__is_active=True)
+        if using:
+            lines = lines.using(using)
+        if category is not None:
+            lines = lines.filter(product__category__ancestor_links__ancestor=category)
+        return cls(
+            lines.order_by("id").values_list(
+                "id",
+                "attribute_values__id",
+                "attribute_values__attribute__name",
+                "attribute_values__attribute_value",
+            )
+        )
+
+    def search(self, filters):
+        """
+        Match ``filters`` ({attribute: [values]}): any listed value of an
+        attribute, every listed attribute. Facet counts for an attribute
+        ignore that attribute's own filter so alternatives stay visible.
+        """
+        everything = (1 << len(self.line_ids)) - 1
+        selected = {}
+        for attribute, values in filters.items():
+            if not values:
+                continue
+            bitmap = 0
+            for value in values:
+                value_id = self.values.get((attribute, str(value)))
+                bitmap |= self.members.get(value_id, 0)
+            selected[attribute] = bitmap
+
+        matches = everything
+        for bitmap in selected.values():
+            matches &= bitmap
+
+        facets = {}
+        bases = {}
+        for (attribute, value), value_id in self.values.items():
+            base = bases.get(attribute)
+            if base is None:
+                base = everything
+                for other, bitmap in selected.items():
+                    if other != attribute:
+                        base &= bitmap
+                bases[attribute] = base
+            count = (self.members[value_id] & base).bit_count()
+            if count or str(value) in map(str, filters.get(attribute, ())):
+                facets.setdefault(attribute, {})[value] = count
+
+        return FacetResult(self, matches, facets)
+
+
+class FacetResult:
+    __slots__ = ("index", "bitmap", "facets")
+
+    def __init__(self, index, bitmap, facets):
+        self.index = index
+        self.bitmap = bitmap
+        self.facets = facets
+
+    @property
+    def count(self):
+        return self.bitmap.bit_count()
+
+    @property
+    def line_ids(self):
+        bits = bin(self.bitmap)[:1:-1]
+        return [self.index.line_ids[i] for i, bit in enumerate(bits) if bit == "1"]
+
+    def lines(self):
+        return ProductLine.objects.filter(id__in=self.line_ids).order_by("id")
+
+
+def get_facet_index(category=None):
+    """FacetIndex for a category subtree, cached until membership changes."""
+    category_id = getattr(category, "pk", category)
+    version = get_version("facets", "all")
+    return get_or_build(
+        f"{PREFIX}:facets:{category_id or 'all'}:{version}",
+        lambda: FacetIndex.build(category_id),
+        timeout=getattr(settings, "INVENTORY_FACET_TIMEOUT", 300),
+    )
+
+
+def facet_search(filters, category=None):
+    """
+    Product lines in ``category`` (and its subcategories) matching
+    ``filters`` with per attribute value counts. Costs at most one query,
+    to build the index on a cache miss.
+    """
+    return get_facet_index(category).search(filters)
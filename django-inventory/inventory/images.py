@@ -0,0 +1,214 @@
+import io
+import logging
+import os
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import PurePosixPath
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import router, transaction
+from django.db.models import Count, F, Q
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from PIL import Image, ImageOps
+
+from .models import ProductImage, ProductImageDerivative
+from .signals import bulk_upserted
+
+logger = logging.getLogger(__name__)
+
+# Derivative kind -> longest edge in pixels.
+DEFAULT_SIZES = {
+    ProductImageDerivative.THUMBNAIL: 160,
+    ProductImageDerivative.LISTING: 480,
+    ProductImageDerivative.ZOOM: 1600,
+}
+
+
+def derivative_sizes():
+    return getattr(settings, "INVENTORY_IMAGE_DERIVATIVES", DEFAULT_SIZES)
+
+
+def render(data, sizes, quality=80):
+    """
+    Fit the image in ``data`` into each of ``sizes`` ({kind: edge}) and
+    encode it as WebP, returning {kind: (bytes, width, height)}. Sizes are
+    rendered largest first, each one downsampled from the previous rather
+    than from the original, and images are never upscaled. Runs in worker
+    processes, so it touches nothing but Pillow.
+    """
+    with Image.open(io.BytesIO(data)) as original:
+        alpha = original.mode in ("RGBA", "LA", "PA") or "transparency" in (
+            original.info
+        )
+        image = ImageOps.exif_transpose(original).convert("RGBA" if alpha else "RGB")
+
+    rendered = {}
+    for kind, edge in sorted(sizes.items(), key=lambda item: -item[1]):
+        image.thumbnail((edge, edge), Image.Resampling.LANCZOS)
+        buffer = io.BytesIO()
+        image.save(buffer, "WEBP", quality=quality)
+        rendered[kind] = (buffer.getvalue(), image.width, image.height)
+    return rendered
+
+
+def _render_job(job):
+    pk, data, sizes, quality = job
+    try:
+        return pk, render(data, sizes, quality)
+    except (OSError, ValueError, Image.DecompressionBombError):
+        return pk, None
+
+
+def pending_images(queryset=None):
+    """Images missing a derivative kind, or whose original has changed since."""
+    if queryset is None:
+        queryset = ProductImage.objects.all()
+    kinds = list(derivative_sizes())
+    fresh = Count(
+        "derivatives",
+        filter=Q(derivatives__kind__in=kinds, derivatives__source_name=F("url")),
+    )
+    return queryset.exclude(url="").alias(fresh=fresh).filter(fresh__lt=len(kinds))
+
+
+class DerivativeGenerator:
+    """
+    Render derivatives for batches of images. Originals are read and results
+    written on the calling process through the storage API; only the Pillow
+    work is farmed out to a pool of ``workers`` processes (inline when 1).
+    """
+
+    def __init__(self, using=None, workers=1, batch_size=100, quality=80):
+        self.using = using or router.db_for_write(ProductImageDerivative)
+        self.workers = workers
+        self.batch_size = batch_size
+        self.quality = quality
+        self.sizes = dict(derivative_sizes())
+        self.storage = ProductImageDerivative._meta.get_field("file").storage
+        self.counts = Counter()
+
+    def run(self, images):
+        images = images.using(self.using).order_by("pk")
+        executor = ProcessPoolExecutor(self.workers) if self.workers > 1 else None
+        try:
+            last_pk = 0
+            while batch := list(images.filter(pk__gt=last_pk)[: self.batch_size]):
+                last_pk = batch[-1].pk
+                self.process_batch(batch, executor)
+        finally:
+            if executor is not None:
+                executor.shutdown()
+        return self.counts
+
+    def process_batch(self, batch, executor=None):
+        sources = {}
+        jobs = []
+        for image in batch:
+            try:
+                with image.url.storage.open(image.url.name, "rb") as source:
+                    jobs.append((image.pk, source.read(), self.sizes, self.quality))
+            except FileNotFoundError:
+                self.counts["missing"] += 1
+                continue
+            sources[image.pk] = image.url.name
+
+        results = (executor.map if executor else map)(_render_job, jobs)
+        rows = []
+        for pk, rendered in results:
+            if rendered is None:
+                self.counts["failed"] += 1
+                continue
+            stem = PurePosixPath(sources[pk]).stem
+            for kind, (data, width, height) in rendered.items():
+                # Saved alongside the current file, which stays in place
+                # until the row pointing at it has been replaced.
+                name = f"derivatives/{pk}/{stem}-{kind}.webp"
+                rows.append(
+                    ProductImageDerivative(
+                        image_id=pk,
+                        kind=kind,
+                        file=self.storage.save(name, ContentFile(data)),
+                        width=width,
+                        height=height,
+                        source_name=sources[pk],
+                    )
+                )
+            self.counts["images"] += 1
+
+        try:
+            stale = self._replace_rows(rows)
+        except Exception:
+            for row in rows:
+                self.storage.delete(row.file.name)
+            raise
+        for name in stale:
+            self.storage.delete(name)
+        self.counts["derivatives"] += len(rows)
+
+    def _replace_rows(self, rows):
+        """Upsert ``rows``, returning the file names they replace."""
+        if not rows:
+            return set()
+        derivatives = ProductImageDerivative.objects.using(self.using)
+        keys = Q()
+        for row in rows:
+            keys |= Q(image_id=row.image_id, kind=row.kind)
+        with transaction.atomic(using=self.using):
+            old_names = set(derivatives.filter(keys).values_list("file", flat=True))
+            derivatives.bulk_create(
+                rows,
+                update_conflicts=True,
+                unique_fields=["image", "kind"],
+                update_fields=["file", "width", "height", "source_name"],
+            )
+        return old_names - {row.file.name for row in rows}
+
+
+def generate_derivatives(images=None, using=None, workers=None, force=False):
+    """
+    Bring derivatives up to date for ``images`` (every image by default),
+    skipping those already rendered from their current original unless
+    ``force`` is set. Returns counts of what was done.
+    """
+    if images is None:
+        images = ProductImage.objects.all()
+    if not force:
+        images = pending_images(images)
+    if workers is None:
+        workers = os.cpu_count() or 1
+    return DerivativeGenerator(using, workers=workers).run(images)
+
+
+@receiver(post_save, sender=ProductImage)
+def _product_image_saved(sender, instance, using, **kwargs):
+    _render_on_commit([instance.pk], using)
+
+
+@receiver(bulk_upserted, sender=ProductImage)
+def _product_images_upserted(sender, pks, using, **kwargs):
+    _render_on_commit(pks, using)
+
+
+def _render_on_commit(pks, using):
+    # Off by default: rendering holds up the request that saved the image.
+    # generate_image_derivatives catches up on whatever is pending instead.
+    if not getattr(settings, "INVENTORY_IMAGE_DERIVATIVES_ON_SAVE", False):
+        return
+    images = ProductImage.objects.filter(pk__in=pks)
+
+    def render_pending():
+        # The save has committed; a failure here must not surface as one.
+        try:
+            generate_derivatives(images, using=using, workers=1)
+        except Exception:
+            logger.exception("Rendering derivatives of images %s failed", pks)
+
+    transaction.on_commit(render_pending, using=using)
+
+
+@receiver(post_delete, sender=ProductImageDerivative)
+def _derivative_deleted(sender, instance, using, **kwargs):
+    name = instance.file.name
+    transaction.on_commit(lambda: instance.file.storage.delete(name), using=using)
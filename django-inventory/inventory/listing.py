@@ -0,0 +1,181 @@
+import logging
+
+from django.db import router, transaction
+from django.db.models import F, OuterRef, Subquery
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .bulk import insert_rows, upsert_rows
+from .models import (
+    Category,
+    Product,
+    ProductImage,
+    ProductLine,
+    ProductListing,
+)
+from .signals import bulk_upserted, stock_changed
+
+logger = logging.getLogger(__name__)
+
+
+def listing_rows(products):
+    """
+    ProductListing rows for the active products in ``products`` as dicts,
+    computed in one query with correlated subqueries for the cheapest active
+    line and its first image.
+    """
+    for row in _listing_values(products):
+        row["category_id"] = row.pop("category")
+        yield row
+
+
+def _listing_values(products):
+    cheapest = ProductLine.objects.filter(
+        product=OuterRef("pk"), is_active=True
+    ).order_by("price", "order", "id")
+    first_image = ProductImage.objects.filter(
+        product_line=OuterRef("line_id")
+    ).order_by("order", "id")
+    return (
+        products.filter(is_active=True)
+        .annotate(line_id=Subquery(cheapest.values("id")[:1]))
+        .values(
+            "pid",
+            "name",
+            "slug",
+            "stock_status",
+            "category",
+            product_id=F("id"),
+            category_name=F("category__name"),
+            category_slug=F("category__slug"),
+            sku=Subquery(cheapest.values("sku")[:1]),
+            price=Subquery(cheapest.values("price")[:1]),
+            image=Subquery(first_image.values("url")[:1]),
+        )
+    )
+
+
+def refresh_listing(product_ids, using=None):
+    """
+    Recompute the listing rows of ``product_ids`` in two statements, plus a
+    DELETE when some of them are no longer listed, and return how many are
+    listed.
+    """
+    product_ids = set(product_ids)
+    if not product_ids:
+        return 0
+    using = using or router.db_for_write(ProductListing)
+    with transaction.atomic(using=using):
+        listed = upsert_rows(
+            ProductListing,
+            listing_rows(Product.objects.using(using).filter(pk__in=product_ids)),
+            using,
+        )
+        if unlisted := product_ids - listed:
+            ProductListing.objects.using(using).filter(product_id__in=unlisted).delete()
+    return len(listed)
+
+
+def rebuild_listing(using=None, batch_size=5000):
+    """Recompute the whole listing table, ``batch_size`` products at a time."""
+    using = using or router.db_for_write(ProductListing)
+    products = Product.objects.using(using).order_by("id")
+    count = 0
+    with transaction.atomic(using=using):
+        ProductListing.objects.using(using).all().delete()
+        last_id = 0
+        while ids := list(
+            products.filter(id__gt=last_id).values_list("id", flat=True)[:batch_size]
+        ):
+            last_id = ids[-1]
+            count += insert_rows(
+                ProductListing,
+                listing_rows(products.filter(id__gte=ids[0], id__lte=last_id)),
+                using,
+                batch_size,
+            )
+    return count
+
+
+def _listed_in(category_ids, using):
+    return (
+        ProductListing.objects.using(using)
+        .filter(category_id__in=category_ids)
+        .values_list("product_id", flat=True)
+    )
+
+
+@receiver(post_save, sender=Product)
+def _product_saved(sender, instance, using, **kwargs):
+    refresh_listing([instance.pk], using)
+
+
+@receiver(post_save, sender=ProductLine)
+@receiver(post_delete, sender=ProductLine)
+def _product_line_changed(sender, instance, using, **kwargs):
+    refresh_listing([instance.product_id], using)
+
+
+@receiver(post_save, sender=ProductImage)
+@receiver(post_delete, sender=ProductImage)
+def _product_image_changed(sender, instance, using, **kwargs):
+    refresh_listing(
+        ProductLine.objects.using(using)
+        .filter(pk=instance.product_line_id)
+        .values_list("product_id", flat=True),
+        using,
+    )
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def _category_changed(sender, instance, using, **kwargs):
+    refresh_listing(_listed_in([instance.pk], using), using)
+
+
+@receiver(stock_changed)
+def _stock_changed(sender, product_ids, status_changed, using, **kwargs):
+    # Listings show the stock status, not the quantities, and are refreshed
+    # after the stock move commits so its row locks are not held meanwhile.
+    if not status_changed:
+        return
+
+    def refresh():
+        # The stock move has committed; a failure here must not surface as
+        # one. rebuild_product_listing catches up on it instead.
+        try:
+            refresh_listing(status_changed, using)
+        except Exception:
+            logger.exception("Refreshing the listings of %s failed", status_changed)
+
+    transaction.on_commit(refresh, using=using)
+
+
+@receiver(bulk_upserted, sender=Product)
+def _products_upserted(sender, pks, using, **kwargs):
+    refresh_listing(pks, using)
+
+
+@receiver(bulk_upserted, sender=ProductLine)
+def _product_lines_upserted(sender, pks, using, **kwargs):
+    refresh_listing(
+        ProductLine.objects.using(using)
+        .filter(pk__in=pks)
+        .values_list("product_id", flat=True),
+        using,
+    )
+
+
+@receiver(bulk_upserted, sender=ProductImage)
+def _product_images_upserted(sender, pks, using, **kwargs):
+    refresh_listing(
+        ProductLine.objects.using(using)
+        .filter(productimage__pk__in=pks)
+        .values_list("product_id", flat=True),
+        using,
+    )
+
+
+@receiver(bulk_upserted, sender=Category)
+def _categories_upserted(sender, pks, using, **kwargs):
+    refresh_listing(_listed_in(pks, using), using)
@@ -0,0 +1,45 @@
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import router
+
+from inventory.catalog import WRITERS, iter_catalog
+from inventory.models import Product
+
+
+class Command(BaseCommand):
+    help = "Stream products, product lines, attribute values and images to a file"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "path", nargs="?", default="-", help="Output file, stdout by default"
+        )
+        parser.add_argument(
+            "--format",
+            choices=sorted(WRITERS),
+            help="File format, guessed from the file extension by default",
+        )
+        parser.add_argument("--chunk-size", type=int, default=1000)
+        parser.add_argument(
+            "--database", help="Database alias, inventory's read database by default"
+        )
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        file_format = options["format"] or (
+            "jsonl" if path == "-" else Path(path).suffix.lstrip(".").lower()
+        )
+        if file_format not in WRITERS:
+            raise CommandError(f"Unsupported catalog format '{file_format}'")
+
+        records = iter_catalog(
+            using=options["database"] or router.db_for_read(Product),
+            chunk_size=options["chunk_size"],
+        )
+        if path == "-":
+            WRITERS[file_format](records, self.stdout)
+            return
+
+        with open(path, "w", newline="", encoding="utf-8") as stream:
+            count = WRITERS[file_format](records, stream)
+        self.stderr.write(f"products: {count}")
@@ -0,0 +1,96 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import router
+from django.utils.text import slugify
+
+from inventory.models import Product
+from inventory.synthetic import CatalogGenerator
+
+
+class Command(BaseCommand):
+    help = "Generate a deterministic synthetic catalog for load tests"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--products", type=int, default=10000)
+        parser.add_argument("--lines-per-product", type=int, default=3)
+        parser.add_argument("--images-per-line", type=int, default=2)
+        parser.add_argument("--categories", type=int, default=200)
+        parser.add_argument(
+            "--category-depth",
+            type=int,
+            default=3,
+            help="Levels in the category tree, at most 11 (Category.level 0-10)",
+        )
+        parser.add_argument("--product-types", type=int, default=20)
+        parser.add_argument("--attributes", type=int, default=10)
+        parser.add_argument("--values-per-attribute", type=int, default=20)
+        parser.add_argument("--attributes-per-line", type=int, default=3)
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument(
+            "--prefix",
+            default="synthetic",
+            help="Prefix of every generated name, unique per run in one database",
+        )
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument(
+            "--skip-listing",
+            action="store_true",
+            help="Leave the product listing table to rebuild_product_listing",
+        )
+        parser.add_argument(
+            "--skip-search",
+            action="store_true",
+            help="Leave the product search documents to rebuild_product_search",
+        )
+        parser.add_argument(
+            "--database", help="Database alias, inventory's write database by default"
+        )
+
+    def handle(self, *args, **options):
+        prefix = slugify(options["prefix"])
+        using = options["database"] or router.db_for_write(Product)
+        if Product.objects.using(using).filter(pid__startswith=f"{prefix}-").exists():
+            raise CommandError(
+                f"Products with prefix '{prefix}' exist, pick another one"
+            )
+
+        started = time.monotonic()
+
+        def progress(counts):
+            rows = sum(counts.values())
+            elapsed = time.monotonic() - started
+            self.stderr.write(
+                f"{counts['products']} products, {rows} rows, "
+                f"{rows / elapsed if elapsed else 0:.0f} rows/s"
+            )
+
+        generator = CatalogGenerator(
+            seed=options["seed"],
+            prefix=prefix,
+            using=using,
+            batch_size=options["batch_size"],
+            progress=progress if options["verbosity"] > 1 else None,
+        )
+        try:
+            counts = generator.generate(
+                categories=options["categories"],
+                category_depth=options["category_depth"],
+                product_types=options["product_types"],
+                products=options["products"],
+                lines_per_product=options["lines_per_product"],
+                attributes=options["attributes"],
+                values_per_attribute=options["values_per_attribute"],
+                attributes_per_line=options["attributes_per_line"],
+                images_per_line=options["images_per_line"],
+                listing=not options["skip_listing"],
+                search=not options["skip_search"],
+            )
+        except ValueError as exc:
+            raise CommandError(exc) from exc
+
+        for name, count in sorted(counts.items()):
+            self.stdout.write(f"{name}: {count}")
+        self.stderr.write(
+            f"{sum(counts.values())} rows in {time.monotonic() - started:.1f}s"
+        )
@@ -0,0 +1,41 @@
+import os
+
+from django.core.management.base import BaseCommand
+from django.db import router
+
+from inventory.images import DerivativeGenerator, pending_images
+from inventory.models import ProductImage, ProductImageDerivative
+
+
+class Command(BaseCommand):
+    help = "Render thumbnail, listing and zoom WebP derivatives of product images"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=os.cpu_count() or 1,
+            help="Rendering processes, one per CPU by default",
+        )
+        parser.add_argument("--batch-size", type=int, default=100)
+        parser.add_argument(
+            "--force",
+            action="store_true",
+            help="Re-render images whose derivatives are already up to date",
+        )
+        parser.add_argument(
+            "--database", help="Database alias, inventory's write database by default"
+        )
+
+    def handle(self, *args, **options):
+        using = options["database"] or router.db_for_write(ProductImageDerivative)
+        images = ProductImage.objects.all()
+        if not options["force"]:
+            images = pending_images(images)
+
+        generator = DerivativeGenerator(
+            using, workers=options["workers"], batch_size=options["batch_size"]
+        )
+        counts = generator.run(images)
+        for name, count in sorted(counts.items()):
+            self.stdout.write(f"{name}: {count}")
@@ -0,0 +1,296 @@
+import itertools
+import uuid
+from collections import Counter
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import router, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from inventory.autocomplete import invalidate_autocomplete
+from inventory.bulk import insert_rows
+from inventory.catalog import READERS, parse_bool
+from inventory.listing import refresh_listing
+from inventory.models import (
+    Attribute,
+    AttributeValue,
+    Category,
+    Product,
+    ProductImage,
+    ProductLine,
+    ProductLine_AttributeValue,
+)
+from inventory.search import refresh_search
+
+
+def _attribute_pairs(line):
+    # Attribute names are stored lowercase by the inventory_attribute trigger.
+    for name, value in line.get("attributes", {}).items():
+        yield name.strip().lower(), str(value)
+
+
+class CatalogImporter:
+    """
+    Write nested product records in batches. Foreign keys are resolved
+    through lookup maps that are filled with one query per batch for the
+    keys they do not know yet, so the statement count per batch is constant.
+    Existing products (by pid) keep their fields but get the lines of their
+    records that are new; existing lines (by sku) are left untouched, as are
+    repeats of a pid or sku within a batch after its first record. New
+    products get their slug, or one derived from their name, with a numeric
+    suffix where it is already taken. New products whose name is already
+    taken, in the database or earlier in the batch, are skipped with their
+    lines and counted as duplicate names.
+    """
+
+    def __init__(self, using, batch_size=1000):
+        self.using = using
+        self.batch_size = batch_size
+        self.categories = {}
+        self.attributes = {}
+        self.attribute_values = {}
+        self.counts = Counter()
+
+    def run(self, records):
+        records = iter(records)
+        while batch := list(itertools.islice(records, self.batch_size)):
+            with transaction.atomic(using=self.using):
+                self.import_batch(batch)
+        return self.counts
+
+    def import_batch(self, batch):
+        first = {}
+        for record in batch:
+            first.setdefault(record["pid"], record)
+        batch = list(first.values())
+        self._resolve_categories({r["category"] for r in batch if r.get("category")})
+        self._resolve_attribute_values(
+            {
+                pair
+                for record in batch
+                for line in record.get("lines", ())
+                for pair in _attribute_pairs(line)
+            }
+        )
+        products = self._write_products(batch)
+        batch = [record for record in batch if record["pid"] in products]
+        lines = self._write_lines(batch, products)
+        self._write_line_attribute_values(lines)
+        self._write_images(lines)
+        # The rows above went in without model signals.
+        refresh_listing(products.values(), self.using)
+        refresh_search(products.values(), self.using)
+        invalidate_autocomplete(self.using)
+
+    def _lookup(self, queryset, cache, keys, key_field):
+        missing = set(keys) - cache.keys()
+        if missing:
+            cache.update(
+                queryset.using(self.using)
+                .filter(**{f"{key_field}__in": missing})
+                .values_list(key_field, "id")
+            )
+        return cache
+
+    def _resolve_categories(self, slugs):
+        self._lookup(Category.objects, self.categories, slugs, "slug")
+        self.counts["unknown categories"] += len(slugs - self.categories.keys())
+
+    def _resolve_attribute_values(self, pairs):
+        names = {name for name, _ in pairs}
+        self._lookup(Attribute.objects, self.attributes, names, "name")
+        new_attributes = names - self.attributes.keys()
+        if new_attributes:
+            insert_rows(Attribute, ({"name": n} for n in new_attributes), self.using)
+            self._lookup(Attribute.objects, self.attributes, new_attributes, "name")
+            self.counts["attributes"] += len(new_attributes)
+
+        wanted = {(self.attributes[name], value) for name, value in pairs}
+        self._load_attribute_values(wanted - self.attribute_values.keys())
+        new_values = wanted - self.attribute_values.keys()
+        if new_values:
+            insert_rows(
+                AttributeValue,
+                (
+                    {"attribute_id": attribute_id, "attribute_value": value}
+                    for attribute_id, value in new_values
+                ),
+                self.using,
+            )
+            self._load_attribute_values(new_values)
+            self.counts["attribute values"] += len(new_values)
+
+    def _load_attribute_values(self, pairs):
+        if not pairs:
+            return
+        rows = AttributeValue.objects.using(self.using).filter(
+            attribute_id__in={attribute_id for attribute_id, _ in pairs},
+            attribute_value__in={value for _, value in pairs},
+        )
+        for attribute_id, value, pk in rows.values_list(
+            "attribute_id", "attribute_value", "id"
+        ):
+            self.attribute_values[(attribute_id, value)] = pk
+
+    def _write_products(self, batch):
+        pids = {record["pid"] for record in batch}
+        products = {}
+        names = set()
+        for pid, name, pk in (
+            Product.objects.using(self.using)
+            .filter(Q(pid__in=pids) | Q(name__in={r["name"] for r in batch}))
+            .values_list("pid", "name", "id")
+        ):
+            names.add(name)
+            if pid in pids:
+                products[pid] = pk
+
+        now = timezone.now()
+        new_records = []
+        for record in batch:
+            if record["pid"] in products:
+                continue
+            if record["name"] in names:
+                self.counts["duplicate names"] += 1
+                continue
+            names.add(record["name"])
+            new_records.append(record)
+        slugs = Product.objects.using(self.using).free_slugs(
+            record.get("slug") or record["name"] for record in new_records
+        )
+        new_rows = {}
+        for record, slug in zip(new_records, slugs):
+            new_rows[record["pid"]] = {
+                "pid": record["pid"],
+                "name": record["name"],
+                "slug": slug,
+                "description": record.get("description"),
+                "is_digitial": parse_bool(record.get("is_digital")),
+                "is_active": parse_bool(record.get("is_active")),
+                "stock_status": record.get("stock_status") or Product.OUT_OF_STOCK,
+                "category_id": self.categories.get(record.get("category")),
+                "seasonal_event_id": None,
+                "created_at": now,
+                "updated_at": now,
+            }
+
+        if new_rows:
+            insert_rows(Product, new_rows.values(), self.using)
+            products.update(
+                Product.objects.using(self.using)
+                .filter(pid__in=new_rows.keys())
+                .values_list("pid", "id")
+            )
+            self.counts["products"] += len(new_rows)
+        return products
+
+    def _write_lines(self, batch, products):
+        lines = [
+            (products[record["pid"]], line)
+            for record in batch
+            for line in record.get("lines", ())
+        ]
+        for _, line in lines:
+            line["sku"] = (
+                uuid.UUID(str(line["sku"])) if line.get("sku") else uuid.uuid4()
+            )
+
+        skus = [line["sku"] for _, line in lines]
+        seen = set(
+            ProductLine.objects.using(self.using)
+            .filter(sku__in=skus)
+            .values_list("sku", flat=True)
+        )
+        new_lines = []
+        for product_id, line in lines:
+            if line["sku"] not in seen:
+                seen.add(line["sku"])
+                new_lines.append((product_id, line))
+        if not new_lines:
+            return []
+
+        insert_rows(
+            ProductLine,
+            (
+                {
+                    "sku": line["sku"],
+                    "price": line["price"],
+                    "stock_qty": int(line.get("stock_qty") or 0),
+                    "is_active": parse_bool(line.get("is_active")),
+                    "order": line["order"],
+                    "weight": line["weight"],
+                    "product_id": product_id,
+                }
+                for product_id, line in new_lines
+            ),
+            self.using,
+        )
+        ids = dict(
+            ProductLine.objects.using(self.using)
+            .filter(sku__in=[line["sku"] for _, line in new_lines])
+            .values_list("sku", "id")
+        )
+        self.counts["product lines"] += len(new_lines)
+        return [(ids[line["sku"]], line) for _, line in new_lines]
+
+    def _write_line_attribute_values(self, lines):
+        rows = [
+            {
+                "product_line_id": line_id,
+                "attribute_value_id": self.attribute_values[
+                    (self.attributes[name], value)
+                ],
+            }
+            for line_id, line in lines
+            for name, value in _attribute_pairs(line)
+        ]
+        self.counts["line attribute values"] += insert_rows(
+            ProductLine_AttributeValue, rows, self.using
+        )
+
+    def _write_images(self, lines):
+        rows = [
+            {
+                "product_line_id": line_id,
+                "url": image["url"],
+                "alternative_text": image.get("alternative_text", ""),
+                "order": image.get("order", position),
+            }
+            for line_id, line in lines
+            for position, image in enumerate(line.get("images", ()), start=1)
+        ]
+        self.counts["images"] += insert_rows(ProductImage, rows, self.using)
+
+
+class Command(BaseCommand):
+    help = "Import products, product lines, attribute values and images in bulk"
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="CSV or JSONL catalog file")
+        parser.add_argument(
+            "--format",
+            choices=sorted(READERS),
+            help="File format, guessed from the file extension by default",
+        )
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument(
+            "--database", help="Database alias, inventory's write database by default"
+        )
+
+    def handle(self, *args, **options):
+        path = Path(options["path"])
+        file_format = options["format"] or path.suffix.lstrip(".").lower()
+        if file_format not in READERS:
+            raise CommandError(f"Unsupported catalog format '{file_format}'")
+
+        using = options["database"] or router.db_for_write(Product)
+        importer = CatalogImporter(using, batch_size=options["batch_size"])
+        with path.open(newline="", encoding="utf-8") as stream:
+            try:
+                counts = importer.run(READERS[file_format](stream))
+            except ValueError as exc:
+                raise CommandError(exc) from exc
+
+        for name, count in sorted(counts.items()):
+            self.stdout.write(f"{name}: {count}")
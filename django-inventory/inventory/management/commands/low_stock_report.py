@@ -0,0 +1,33 @@
+import csv
+
+from django.core.management.base import BaseCommand
+from django.db import router
+
+from inventory.models import ProductLine
+from inventory.stock import low_stock
+
+COLUMNS = ["sku", "pid", "name", "category", "stock_qty", "threshold"]
+
+
+class Command(BaseCommand):
+    help = "Write the product lines running low on stock as CSV"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--threshold",
+            type=int,
+            help="Units at or below which a line is low, "
+            "INVENTORY_LOW_STOCK_THRESHOLD by default",
+        )
+        parser.add_argument(
+            "--database", help="Database alias, inventory's read database by default"
+        )
+
+    def handle(self, *args, **options):
+        rows = low_stock(
+            threshold=options["threshold"],
+            using=options["database"] or router.db_for_read(ProductLine),
+        )
+        writer = csv.DictWriter(self.stdout, fieldnames=COLUMNS, lineterminator="\n")
+        writer.writeheader()
+        writer.writerows(rows.iterator())
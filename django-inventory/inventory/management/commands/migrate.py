@@ -8,6 +8,11 @@ class Command(MigrateCommand):
     help = "Run migrations with app name and database"
 
     def handle(self, *args, **options):
+        # The guards only apply to manual runs; the test runner calls migrate
+        # programmatically for every test database.
+        if not self._called_from_command_line:
+            return super().handle(*args, **options)
+
         app_label = options.get("app_label")
         if not app_label:
             raise CommandError("No app has been specified")
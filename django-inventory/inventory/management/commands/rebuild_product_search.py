@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+from django.db import router
+
+from inventory.models import ProductSearch
+from inventory.search import rebuild_search
+
+
+class Command(BaseCommand):
+    help = "Recompute the product search documents from scratch"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument(
+            "--database", help="Database alias, inventory's write database by default"
+        )
+
+    def handle(self, *args, **options):
+        using = options["database"] or router.db_for_write(ProductSearch)
+        count = rebuild_search(using, batch_size=options["batch_size"])
+        self.stdout.write(f"search documents: {count}")
@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+from django.db import router
+
+from inventory.models import Product
+from inventory.stock import recompute_stock_status
+
+
+class Command(BaseCommand):
+    help = "Derive stock_status from stock for products touched since the last run"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--full",
+            action="store_true",
+            help="Check every product, not just new changes",
+        )
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument(
+            "--database", help="Database alias, inventory's write database by default"
+        )
+
+    def handle(self, *args, **options):
+        count = recompute_stock_status(
+            using=options["database"] or router.db_for_write(Product),
+            full=options["full"],
+            batch_size=options["batch_size"],
+        )
+        self.stdout.write(f"products updated: {count}")
@@ -0,0 +1,77 @@
+# Generated by Django 5.1.1 on 2026-10-18 18:01
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def build_closure(apps, schema_editor):
+    Category = apps.get_model("inventory", "Category")
+    CategoryClosure = apps.get_model("inventory", "CategoryClosure")
+    db_alias = schema_editor.connection.alias
+
+    parents = dict(Category.objects.using(db_alias).values_list("id", "parent_id"))
+    links = []
+    for node in parents:
+        ancestor, depth = node, 0
+        while ancestor is not None:
+            links.append(
+                CategoryClosure(ancestor_id=ancestor, descendant_id=node, depth=depth)
+            )
+            ancestor, depth = parents.get(ancestor), depth + 1
+    CategoryClosure.objects.using(db_alias).bulk_create(links, batch_size=5000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("inventory", "0002_initial"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="CategoryClosure",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("depth", models.IntegerField()),
+                (
+                    "ancestor",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="descendant_links",
+                        to="inventory.category",
+                    ),
+                ),
+                (
+                    "descendant",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="ancestor_links",
+                        to="inventory.category",
+                    ),
+                ),
+            ],
+            options={
+                "db_table": "inventory_category_closure",
+                "indexes": [
+                    models.Index(
+                        fields=["descendant", "depth"], name="category_closure_desc_idx"
+                    )
+                ],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("ancestor", "descendant"),
+                        name="category_closure_unique",
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(build_closure, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 5.1.1 on 2026-10-18 18:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("inventory", "0003_category_closure"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="category",
+            index=models.Index(
+                condition=models.Q(("is_active", True)),
+                fields=["parent"],
+                name="category_active_children_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="product",
+            index=models.Index(
+                condition=models.Q(("is_active", True)),
+                fields=["category", "id"],
+                name="product_active_category_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="product",
+            index=models.Index(
+                fields=["stock_status", "is_active"], name="product_stock_status_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="productimage",
+            index=models.Index(
+                fields=["product_line", "order"], name="product_image_order_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="productline",
+            index=models.Index(
+                condition=models.Q(("is_active", True)),
+                fields=["product", "order"],
+                name="product_line_active_order_idx",
+            ),
+        ),
+    ]
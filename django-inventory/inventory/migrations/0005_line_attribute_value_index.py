@@ -0,0 +1,20 @@
+# Generated by Django 5.1.1 on 2026-10-18 18:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("inventory", "0004_catalog_filter_indexes"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="productline_attributevalue",
+            index=models.Index(
+                fields=["product_line", "attribute_value"],
+                name="line_attribute_value_idx",
+            ),
+        ),
+    ]
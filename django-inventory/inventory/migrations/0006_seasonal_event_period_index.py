@@ -0,0 +1,27 @@
+# Generated by Django 5.1.1 on 2026-10-18 18:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("inventory", "0005_line_attribute_value_index"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="seasonalevent",
+            index=models.Index(
+                fields=["end_date", "start_date"], name="seasonal_event_end_idx"
+            ),
+        ),
+        migrations.RunSQL(
+            """
+                CREATE INDEX seasonal_event_period_idx
+                ON inventory_seasonal_event
+                USING gist (tstzrange(start_date, end_date));
+            """,
+            reverse_sql="DROP INDEX seasonal_event_period_idx;",
+        ),
+    ]
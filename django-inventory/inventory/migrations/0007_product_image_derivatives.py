@@ -0,0 +1,60 @@
+# Generated by Django 5.1.1 on 2026-10-18 18:21
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("inventory", "0006_seasonal_event_period_index"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ProductImageDerivative",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "kind",
+                    models.CharField(
+                        choices=[
+                            ("thumbnail", "Thumbnail"),
+                            ("listing", "Listing"),
+                            ("zoom", "Zoom"),
+                        ],
+                        max_length=20,
+                    ),
+                ),
+                ("file", models.ImageField(max_length=255, upload_to="")),
+                ("width", models.IntegerField()),
+                ("height", models.IntegerField()),
+                ("source_name", models.CharField(max_length=255)),
+                (
+                    "image",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="derivatives",
+                        to="inventory.productimage",
+                    ),
+                ),
+            ],
+            options={
+                "db_table": "inventory_product_image_derivative",
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("image", "kind"),
+                        name="product_image_derivative_kind_uniq",
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,73 @@
+# Generated by Django 5.1.1 on 2026-10-18 18:23
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("inventory", "0007_product_image_derivatives"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ProductListing",
+            fields=[
+                (
+                    "product",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="listing",
+                        serialize=False,
+                        to="inventory.product",
+                    ),
+                ),
+                ("pid", models.CharField(max_length=255)),
+                ("name", models.CharField(max_length=200)),
+                ("slug", models.SlugField(db_index=False, max_length=220)),
+                (
+                    "stock_status",
+                    models.CharField(
+                        choices=[
+                            ("IS", "In Stock"),
+                            ("OOS", "Out of Stock"),
+                            ("BO", "Back Ordered"),
+                        ],
+                        max_length=3,
+                    ),
+                ),
+                ("category_name", models.CharField(max_length=100, null=True)),
+                (
+                    "category_slug",
+                    models.SlugField(db_index=False, max_length=100, null=True),
+                ),
+                ("sku", models.UUIDField(null=True)),
+                (
+                    "price",
+                    models.DecimalField(decimal_places=2, max_digits=5, null=True),
+                ),
+                ("image", models.ImageField(null=True, upload_to="")),
+                (
+                    "category",
+                    models.ForeignKey(
+                        db_constraint=False,
+                        null=True,
+                        on_delete=django.db.models.deletion.DO_NOTHING,
+                        related_name="+",
+                        to="inventory.category",
+                    ),
+                ),
+            ],
+            options={
+                "db_table": "inventory_product_listing",
+                "indexes": [
+                    models.Index(
+                        fields=["category", "product"],
+                        name="product_listing_category_idx",
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,91 @@
+# Generated by Django 5.1.1 on 2026-10-18 18:44
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def build_closure(apps, schema_editor):
+    ProductType = apps.get_model("inventory", "ProductType")
+    ProductTypeClosure = apps.get_model("inventory", "ProductTypeClosure")
+    db_alias = schema_editor.connection.alias
+
+    parents = dict(ProductType.objects.using(db_alias).values_list("id", "parent_id"))
+    links, levels = [], {}
+    for node in parents:
+        ancestor, depth = node, 0
+        while ancestor is not None:
+            links.append(
+                ProductTypeClosure(
+                    ancestor_id=ancestor, descendant_id=node, depth=depth
+                )
+            )
+            ancestor, depth = parents.get(ancestor), depth + 1
+        levels[node] = depth - 1
+    ProductTypeClosure.objects.using(db_alias).bulk_create(links, batch_size=5000)
+    ProductType.objects.using(db_alias).bulk_update(
+        [ProductType(id=node, level=level) for node, level in levels.items()],
+        ["level"],
+        batch_size=5000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("inventory", "0008_product_listing"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="producttype",
+            name="level",
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.CreateModel(
+            name="ProductTypeClosure",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("depth", models.IntegerField()),
+                (
+                    "ancestor",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="descendant_links",
+                        to="inventory.producttype",
+                    ),
+                ),
+                (
+                    "descendant",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="ancestor_links",
+                        to="inventory.producttype",
+                    ),
+                ),
+            ],
+            options={
+                "db_table": "inventory_product_type_closure",
+                "indexes": [
+                    models.Index(
+                        fields=["descendant", "depth"],
+                        name="product_type_closure_desc_idx",
+                    )
+                ],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("ancestor", "descendant"),
+                        name="product_type_closure_unique",
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(build_closure, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 5.1.1 on 2026-10-18 18:49
+
+import django.contrib.postgres.search
+import django.db.models.deletion
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("inventory", "0009_product_type_closure"),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.CreateModel(
+            name="ProductSearch",
+            fields=[
+                (
+                    "product",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="search",
+                        serialize=False,
+                        to="inventory.product",
+                    ),
+                ),
+                ("name", models.CharField(max_length=200)),
+                ("category", models.CharField(blank=True, max_length=100)),
+                ("attributes", models.TextField(blank=True)),
+                ("description", models.TextField(blank=True)),
+                ("vector", django.contrib.postgres.search.SearchVectorField(null=True)),
+            ],
+            options={
+                "db_table": "inventory_product_search",
+            },
+        ),
+        migrations.RunSQL(
+            """
+                CREATE INDEX product_search_vector_idx
+                ON inventory_product_search
+                USING gin (vector);
+                CREATE INDEX product_search_name_trgm_idx
+                ON inventory_product_search
+                USING gin (name gin_trgm_ops);
+            """,
+            reverse_sql="""
+                DROP INDEX product_search_name_trgm_idx;
+                DROP INDEX product_search_vector_idx;
+            """,
+        ),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 5.1.1 on 2026-10-18 18:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("inventory", "0010_product_search"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Watermark",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("name", models.CharField(max_length=100, unique=True)),
+                ("value", models.DateTimeField()),
+            ],
+            options={
+                "db_table": "inventory_watermark",
+            },
+        ),
+        migrations.AddIndex(
+            model_name="product",
+            index=models.Index(fields=["updated_at"], name="product_updated_at_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="productline",
+            index=models.Index(
+                condition=models.Q(("is_active", True)),
+                fields=["stock_qty"],
+                name="product_line_active_stock_idx",
+            ),
+        ),
+    ]
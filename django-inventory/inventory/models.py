@@ -1,10 +1,186 @@
 import uuid
 
-from django.db import models
-from django.db.models import Q
+from django.contrib.postgres.search import SearchVectorField
+from django.db import connections, models, router, transaction
+from django.db.models import Case, Exists, F, Func, OuterRef, Q, Subquery, Value, When
 from django.forms import ValidationError
 from django.utils.text import slugify
 
+from .signals import bulk_upserted, stock_changed
+
+
+class SlugUpsertQuerySet(models.QuerySet):
+    """
+    Create-or-update in batches keyed on the unique ``upsert_key`` field, with
+    one INSERT ... ON CONFLICT DO UPDATE per batch. Blank slugs are derived
+    from the names: rows that already exist keep their slug, new ones get
+    slugify(name) with -2, -3, ... appended in batch order until it is free
+    in both the batch and the table, checked with a single query per batch.
+    """
+
+    upsert_key = "slug"
+
+    def upsert(self, objs, update_fields=None, batch_size=1000):
+        self._for_write = True
+        objs = list(objs)
+        if update_fields is None:
+            update_fields = [
+                field.name
+                for field in self.model._meta.concrete_fields
+                if not field.primary_key
+                and field.name != self.upsert_key
+                and not getattr(field, "auto_now_add", False)
+            ]
+
+        for start in range(0, len(objs), batch_size):
+            batch = objs[start : start + batch_size]
+            with transaction.atomic(using=self.db):
+                self._write_batch(batch, update_fields)
+            self._upserted([obj.pk for obj in batch])
+        return objs
+
+    def _write_batch(self, batch, update_fields):
+        self._assign_slugs(batch)
+        self.bulk_create(
+            batch,
+            update_conflicts=True,
+            unique_fields=[self.upsert_key],
+            update_fields=update_fields,
+        )
+
+    def _upserted(self, pks):
+        bulk_upserted.send(sender=self.model, pks=pks, using=self.db)
+
+    def free_slugs(self, bases):
+        """
+        A slug for each new row in ``bases``, in order: the base itself, or
+        with -2, -3, ... appended until it is free both in the table and among
+        the slugs handed out before it. Blank bases fall back to the model
+        name. Taken slugs are looked up with a single query.
+        """
+        bases = [self._slug_base(base) for base in bases]
+        if not bases:
+            return []
+        taken = set(
+            self.filter(self._slug_lookup(set(bases))).values_list("slug", flat=True)
+        )
+        slugs = []
+        for base in bases:
+            slug = self._free_slug(base, taken)
+            taken.add(slug)
+            slugs.append(slug)
+        return slugs
+
+    def _slug_base(self, text):
+        max_length = self.model._meta.get_field("slug").max_length
+        return (slugify(text) or self.model._meta.model_name)[:max_length]
+
+    def _slug_lookup(self, bases):
+        lookup = Q(slug__in=bases)
+        for base in bases:
+            lookup |= Q(slug__startswith=f"{base}-")
+        return lookup
+
+    def _assign_slugs(self, batch):
+        blank = [(obj, self._slug_base(obj.name)) for obj in batch if not obj.slug]
+        if not blank:
+            return
+
+        lookup = self._slug_lookup({base for _, base in blank})
+        if self.upsert_key != "slug":
+            keys = {getattr(obj, self.upsert_key) for obj, _ in blank}
+            lookup |= Q(**{f"{self.upsert_key}__in": keys})
+
+        existing = {}
+        taken = {obj.slug for obj in batch if obj.slug}
+        for key, slug in self.filter(lookup).values_list(self.upsert_key, "slug"):
+            existing[key] = slug
+            taken.add(slug)
+
+        for obj, base in blank:
+            slug = None
+            if self.upsert_key != "slug":
+                slug = existing.get(getattr(obj, self.upsert_key))
+            if slug is None:
+                slug = self._free_slug(base, taken)
+                taken.add(slug)
+            obj.slug = slug
+
+    def _free_slug(self, base, taken):
+        max_length = self.model._meta.get_field("slug").max_length
+        slug, number = base, 1
+        while slug in taken:
+            number += 1
+            suffix = f"-{number}"
+            slug = f"{base[: max_length - len(suffix)]}{suffix}"
+        return slug
+
+
+class CategoryQuerySet(SlugUpsertQuerySet):
+    def descendants(self, category, include_self=False):
+        return self.filter(
+            ancestor_links__ancestor=category,
+            ancestor_links__depth__gte=0 if include_self else 1,
+        )
+
+    def ancestors(self, category, include_self=False):
+        return self.filter(
+            descendant_links__descendant=category,
+            descendant_links__depth__gte=0 if include_self else 1,
+        ).order_by("-descendant_links__depth")
+
+    def products_in_subtree(self, category):
+        return Product.objects.using(self.db).filter(
+            category__ancestor_links__ancestor=category
+        )
+
+    def upsert(self, objs, update_fields=None, batch_size=1000):
+        """
+        SlugUpsertQuerySet.upsert() keyed on slug, so only categories that
+        carry one can be updated. Closure rows are added for new categories
+        and moved for reparented ones in each batch's transaction; parents
+        must come before their children or be saved already.
+        """
+        self._for_write = True
+        objs = list(objs)
+        moved_from = set(
+            CategoryClosure.objects.using(self.db)
+            .filter(descendant__slug__in=[obj.slug for obj in objs if obj.slug])
+            .values_list("ancestor_id", flat=True)
+        )
+        objs = super().upsert(objs, update_fields, batch_size)
+        bulk_upserted.send(
+            sender=self.model,
+            pks=moved_from | {obj.pk for obj in objs},
+            using=self.db,
+        )
+        return objs
+
+    def _write_batch(self, batch, update_fields):
+        self._assign_slugs(batch)
+        stored = dict(
+            self.filter(slug__in=[obj.slug for obj in batch]).values_list(
+                "slug", "parent_id"
+            )
+        )
+        super()._write_batch(batch, update_fields)
+        closure = CategoryClosure.objects
+        closure.insert_nodes([obj for obj in batch if obj.slug not in stored], self.db)
+        if "parent" in update_fields or "parent_id" in update_fields:
+            for obj in batch:
+                if obj.slug in stored and stored[obj.slug] != obj.parent_id:
+                    closure.parent_changed(obj, self.db)  # rejects cycles
+                    closure.move_subtree(obj, self.db)
+
+    def _upserted(self, pks):
+        # Sent once for the whole upsert, with the categories moved from.
+        pass
+
+    async def achildren(self, parent=None):
+        """Active direct children of ``parent`` (roots when None) as dicts."""
+        children = self.filter(parent=parent, is_active=True).order_by("name")
+        return [row async for row in children.values("id", "name", "slug", "level")]
+
 
 class Category(models.Model):
     name = models.CharField(
@@ -15,16 +191,34 @@ class Category(models.Model):
     parent = models.ForeignKey("self", on_delete=models.PROTECT, null=True, blank=True)
     level = models.IntegerField(default=100)
 
+    objects = CategoryQuerySet.as_manager()
+
     class Meta:
         verbose_name = "Inventory Category"
         verbose_name_plural = "Categories"
 
         constraints = [models.CheckConstraint(check=~Q(name=""), name="name_not_empty")]
+        indexes = [
+            models.Index(
+                fields=["parent"],
+                condition=Q(is_active=True),
+                name="category_active_children_idx",
+            ),
+        ]
 
     def save(self, *args, **kwargs):
         if not self.slug:
             self.slug = slugify(self.name)
-        super().save(*args, **kwargs)
+
+        using = kwargs.get("using") or router.db_for_write(type(self), instance=self)
+        adding = self._state.adding
+        with transaction.atomic(using=using):
+            moved = not adding and CategoryClosure.objects.parent_changed(self, using)
+            super().save(*args, **kwargs)
+            if adding:
+                CategoryClosure.objects.insert_node(self, using)
+            elif moved:
+                CategoryClosure.objects.move_subtree(self, using)
 
     def clean(self):
         super().clean()
@@ -35,31 +229,464 @@ class Category(models.Model):
         return self.name
 
 
+class ClosureManager(models.Manager):
+    """
+    Maintains a closure table: one (ancestor, descendant, depth) row for
+    every node and each of its ancestors, itself included at depth 0. The
+    table's ``ancestor`` and ``descendant`` point at a model with a
+    ``parent`` self-FK, whose save() keeps the rows current.
+    """
+
+    def __init__(self, node_name):
+        super().__init__()
+        self.node_name = node_name
+
+    @property
+    def node_model(self):
+        return self.model._meta.get_field("descendant").related_model
+
+    def parent_changed(self, node, using):
+        rows = self.using(using).filter(descendant=node, depth=1)
+        if rows.filter(ancestor_id=node.parent_id).exists():
+            return False
+        if node.parent_id is None and not rows.exists():
+            return False
+        if (
+            self.using(using)
+            .filter(ancestor=node, descendant_id=node.parent_id)
+            .exists()
+        ):
+            raise ValidationError(
+                {"parent": f"A {self.node_name} cannot be moved below itself."}
+            )
+        return True
+
+    def insert_node(self, node, using):
+        self.insert_nodes([node], using)
+
+    def insert_nodes(self, nodes, using):
+        """
+        Link new leaf ``nodes`` below their parents with one query for the
+        parents' ancestry and one bulk insert. A parent among ``nodes`` must
+        come before its children.
+        """
+        if not nodes:
+            return
+        ancestry = {}
+        for ancestor_id, descendant_id, depth in (
+            self.using(using)
+            .filter(descendant_id__in={node.parent_id for node in nodes} - {None})
+            .values_list("ancestor_id", "descendant_id", "depth")
+        ):
+            ancestry.setdefault(descendant_id, []).append((ancestor_id, depth))
+
+        links = []
+        for node in nodes:
+            ancestors = [(node.pk, 0)] + [
+                (ancestor_id, depth + 1)
+                for ancestor_id, depth in ancestry.get(node.parent_id, ())
+            ]
+            ancestry[node.pk] = ancestors
+            links += [
+                self.model(ancestor_id=ancestor_id, descendant_id=node.pk, depth=depth)
+                for ancestor_id, depth in ancestors
+            ]
+        self.using(using).bulk_create(links)
+
+    def move_subtree(self, node, using):
+        subtree = self.using(using).filter(ancestor=node)
+        nodes = list(subtree.values_list("descendant_id", "depth"))
+        subtree_ids = subtree.values("descendant_id")
+        self.using(using).filter(descendant_id__in=subtree_ids).exclude(
+            ancestor_id__in=subtree_ids
+        ).delete()
+        if node.parent_id is None:
+            return
+        parents = self.using(using).filter(descendant_id=node.parent_id)
+        self.using(using).bulk_create(
+            self.model(
+                ancestor_id=ancestor_id,
+                descendant_id=descendant_id,
+                depth=ancestor_depth + descendant_depth + 1,
+            )
+            for ancestor_id, ancestor_depth in parents.values_list(
+                "ancestor_id", "depth"
+            )
+            for descendant_id, descendant_depth in nodes
+        )
+
+    def rebuild(self, using=None, batch_size=5000):
+        """
+        Recompute every closure row from the nodes' parent, for data written
+        without going through save() (bulk_create, raw SQL).
+        """
+        using = using or router.db_for_write(self.model)
+        parents = dict(
+            self.node_model.objects.using(using)
+            .values_list("id", "parent_id")
+            .iterator()
+        )
+        with transaction.atomic(using=using):
+            self.using(using).all().delete()
+            self.using(using).bulk_create(
+                (
+                    self.model(ancestor_id=ancestor_id, descendant_id=node, depth=depth)
+                    for node in parents
+                    for depth, ancestor_id in enumerate(_ancestry(node, parents))
+                ),
+                batch_size=batch_size,
+            )
+
+
+def _ancestry(node, parents):
+    seen = set()
+    while node is not None and node not in seen:
+        seen.add(node)
+        yield node
+        node = parents.get(node)
+
+
+class CategoryClosure(models.Model):
+    ancestor = models.ForeignKey(
+        Category, on_delete=models.CASCADE, related_name="descendant_links"
+    )
+    descendant = models.ForeignKey(
+        Category, on_delete=models.CASCADE, related_name="ancestor_links"
+    )
+    depth = models.IntegerField()
+
+    objects = ClosureManager("category")
+
+    class Meta:
+        db_table = "inventory_category_closure"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["ancestor", "descendant"], name="category_closure_unique"
+            )
+        ]
+        indexes = [
+            models.Index(
+                fields=["descendant", "depth"], name="category_closure_desc_idx"
+            )
+        ]
+
+
+class SeasonalEventQuerySet(models.QuerySet):
+    """
+    Events run from start_date up to, but not including, end_date. On
+    PostgreSQL both lookups are range operators on tstzrange(start_date,
+    end_date), the expression behind the seasonal_event_period_idx GiST
+    index; other backends compare the columns directly.
+    """
+
+    def active_at(self, moment):
+        if self._is_postgresql():
+            return self._with_period().filter(period__contains=moment)
+        return self.filter(start_date__lte=moment, end_date__gt=moment)
+
+    def overlapping(self, start, end):
+        if self._is_postgresql():
+            return self._with_period().filter(period__overlap=(start, end))
+        return self.filter(start_date__lt=end, end_date__gt=start)
+
+    def _is_postgresql(self):
+        return connections[self.db].vendor == "postgresql"
+
+    def _with_period(self):
+        from django.contrib.postgres.fields import DateTimeRangeField
+
+        return self.alias(
+            period=Func(
+                F("start_date"),
+                F("end_date"),
+                function="tstzrange",
+                output_field=DateTimeRangeField(),
+            )
+        )
+
+
 class SeasonalEvent(models.Model):
     id = models.BigAutoField(primary_key=True)
     start_date = models.DateTimeField()
     end_date = models.DateTimeField()
     name = models.CharField(max_length=100, unique=True)
 
+    objects = SeasonalEventQuerySet.as_manager()
+
     class Meta:
         db_table = "inventory_seasonal_event"
+        indexes = [
+            models.Index(
+                fields=["end_date", "start_date"], name="seasonal_event_end_idx"
+            ),
+        ]
 
     def __str__(self) -> str:
         return self.name
 
 
+class ProductTypeQuerySet(models.QuerySet):
+    def descendants(self, product_type, include_self=False):
+        return self.filter(
+            ancestor_links__ancestor=product_type,
+            ancestor_links__depth__gte=0 if include_self else 1,
+        )
+
+    def ancestors(self, product_type, include_self=False):
+        return self.filter(
+            descendant_links__descendant=product_type,
+            descendant_links__depth__gte=0 if include_self else 1,
+        ).order_by("-descendant_links__depth")
+
+    def products_in_subtree(self, product_type):
+        """
+        Products of ``product_type`` or any of its subtypes, each once however
+        many of their types fall in the subtree.
+        """
+        return Product.objects.using(self.db).filter(
+            pk__in=Product_ProductType.objects.using(self.db)
+            .filter(product_type__ancestor_links__ancestor=product_type)
+            .values("product_id")
+        )
+
+    def derive_levels(self):
+        """Set ``level`` from the closure rows: a type's depth below its root."""
+        return self.update(
+            level=Subquery(
+                ProductTypeClosure.objects.filter(descendant=OuterRef("pk"))
+                .order_by("-depth")
+                .values("depth")[:1]
+            )
+        )
+
+
 class ProductType(models.Model):
     name = models.CharField(max_length=100)
-    level = models.IntegerField(null=False)
+    # Derived from the parent on save, never taken from user input.
+    level = models.IntegerField(null=False, default=0, editable=False)
     parent = models.ForeignKey("self", on_delete=models.PROTECT, null=True, blank=True)
 
+    objects = ProductTypeQuerySet.as_manager()
+
     class Meta:
         db_table = "inventory_product_type"
 
+    def save(self, *args, **kwargs):
+        using = kwargs.get("using") or router.db_for_write(type(self), instance=self)
+        adding = self._state.adding
+        with transaction.atomic(using=using):
+            moved = not adding and ProductTypeClosure.objects.parent_changed(
+                self, using
+            )
+            if adding or moved:
+                self.level = (
+                    0
+                    if self.parent_id is None
+                    else ProductTypeClosure.objects.using(using)
+                    .filter(descendant_id=self.parent_id)
+                    .count()
+                )
+            super().save(*args, **kwargs)
+            if adding:
+                ProductTypeClosure.objects.insert_node(self, using)
+            elif moved:
+                ProductTypeClosure.objects.move_subtree(self, using)
+                ProductType.objects.using(using).descendants(self).derive_levels()
+
     def __str__(self):
         return self.name
 
 
+class ProductTypeClosure(models.Model):
+    ancestor = models.ForeignKey(
+        ProductType, on_delete=models.CASCADE, related_name="descendant_links"
+    )
+    descendant = models.ForeignKey(
+        ProductType, on_delete=models.CASCADE, related_name="ancestor_links"
+    )
+    depth = models.IntegerField()
+
+    objects = ClosureManager("product type")
+
+    class Meta:
+        db_table = "inventory_product_type_closure"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["ancestor", "descendant"],
+                name="product_type_closure_unique",
+            )
+        ]
+        indexes = [
+            models.Index(
+                fields=["descendant", "depth"], name="product_type_closure_desc_idx"
+            )
+        ]
+
+
+class InsufficientStock(Exception):
+    def __init__(self, keys):
+        self.keys = list(keys)
+        super().__init__(f"Insufficient stock for {', '.join(map(str, self.keys))}")
+
+
+class StockQuerySet(models.QuerySet):
+    """
+    Stock moves as single conditional UPDATE statements, so concurrent
+    checkouts never read-modify-write ``stock_qty`` and never oversell.
+    """
+
+    stock_key = "id"
+    # The field naming the product whose stock_status a row counts towards.
+    product_key = "product_id"
+
+    def reserve(self, quantities):
+        """
+        Take ``quantities`` ({key: qty}) out of stock for every key or for
+        none of them, raising InsufficientStock with the keys that fell short.
+        """
+        needed = self._quantities(quantities)
+        keys = {f"{self.stock_key}__in": list(quantities)}
+        using = self._write_db()
+        rows = self.using(using)
+        try:
+            with transaction.atomic(using=using):
+                updated = rows.filter(**keys, stock_qty__gte=needed).update(
+                    stock_qty=F("stock_qty") - needed
+                )
+                if updated != len(quantities):
+                    # Leaving the block undoes the rows that had enough.
+                    raise InsufficientStock([])
+                self._stock_changed(quantities, using)
+        except InsufficientStock:
+            enough = rows.filter(**keys, stock_qty__gte=needed).values_list(
+                self.stock_key, flat=True
+            )
+            enough = {str(key) for key in enough}
+            raise InsufficientStock(
+                key for key in quantities if str(key) not in enough
+            ) from None
+        return updated
+
+    def release(self, quantities):
+        """Put previously reserved ``quantities`` back into stock."""
+        needed = self._quantities(quantities)
+        using = self._write_db()
+        with transaction.atomic(using=using):
+            updated = (
+                self.using(using)
+                .filter(**{f"{self.stock_key}__in": list(quantities)})
+                .update(stock_qty=F("stock_qty") + needed)
+            )
+            self._stock_changed(quantities, using)
+        return updated
+
+    async def astock(self, keys):
+        """Units held per key in ``keys``; unknown keys are left out."""
+        rows = self.filter(**{f"{self.stock_key}__in": list(keys)}).values_list(
+            self.stock_key, "stock_qty"
+        )
+        return {str(key): qty async for key, qty in rows}
+
+    def _write_db(self):
+        # QuerySet.db is the read alias until the queryset writes, which may
+        # be a replica; stock moves and their transaction need the primary.
+        return self._db or router.db_for_write(self.model, **self._hints)
+
+    def _quantities(self, quantities):
+        if not quantities or any(qty <= 0 for qty in quantities.values()):
+            raise ValueError("Quantities must be positive")
+        return Case(
+            *(
+                When(**{self.stock_key: key}, then=Value(qty))
+                for key, qty in quantities.items()
+            ),
+            output_field=models.IntegerField(),
+        )
+
+    def _stock_changed(self, quantities, using):
+        product_ids = self._product_ids(quantities, using)
+        products = Product.objects.using(using).filter(id__in=product_ids)
+        # Only products whose status flips are written, so reservations of
+        # different lines of one product do not queue on its row lock.
+        flipped = list(products.stock_drifted().values_list("id", flat=True))
+        if flipped:
+            products.filter(id__in=flipped).refresh_stock_status()
+        stock_changed.send(
+            sender=self.model,
+            product_ids=product_ids,
+            status_changed=flipped,
+            using=using,
+        )
+
+    def _product_ids(self, quantities, using):
+        if self.product_key == self.stock_key:
+            return list(quantities)
+        return list(
+            self.using(using)
+            .filter(**{f"{self.stock_key}__in": list(quantities)})
+            .values_list(self.product_key, flat=True)
+            .distinct()
+        )
+
+
+class ProductQuerySet(SlugUpsertQuerySet):
+    upsert_key = "pid"
+
+    def derived_stock_status(self):
+        """
+        The stock_status a product's stock calls for: in stock while any
+        active product line or the StockControl row has units left, otherwise
+        out of stock, except for products already marked back ordered.
+        """
+        has_stock = Exists(
+            ProductLine.objects.filter(
+                product=OuterRef("pk"), is_active=True, stock_qty__gt=0
+            )
+        ) | Exists(
+            StockControl.objects.filter(stock_product=OuterRef("pk"), stock_qty__gt=0)
+        )
+        return Case(
+            When(has_stock, then=Value(Product.IN_STOCK)),
+            When(
+                stock_status=Product.BACKORDERED,
+                then=Value(Product.BACKORDERED),
+            ),
+            default=Value(Product.OUT_OF_STOCK),
+            output_field=models.CharField(),
+        )
+
+    def refresh_stock_status(self):
+        """Derive stock_status from the stock actually held, in one UPDATE."""
+        return self.update(stock_status=self.derived_stock_status())
+
+    def stock_drifted(self):
+        """Products whose stored stock_status differs from the derived one."""
+        return self.alias(derived_stock_status=self.derived_stock_status()).exclude(
+            stock_status=F("derived_stock_status")
+        )
+
+    def search(self, text, page=1, per_page=20):
+        """
+        Page ``page`` of the active products matching ``text``, best first,
+        each with a ``rank`` attribute. See inventory.search.
+        """
+        from .search import search_products
+
+        return search_products(self, text, page, per_page)
+
+    def in_season(self, start, end=None):
+        """
+        Products whose seasonal event is running at ``start``, or at any point
+        between ``start`` and ``end``.
+        """
+        events = SeasonalEvent.objects.using(self.db)
+        if end is None:
+            events = events.active_at(start)
+        else:
+            events = events.overlapping(start, end)
+        return self.filter(seasonal_event__in=events.values("id"))
+
+
 class Product(models.Model):
     IN_STOCK = "IS"
     OUT_OF_STOCK = "OOS"
@@ -97,6 +724,21 @@ class Product(models.Model):
         blank=False,
     )
 
+    objects = ProductQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["category", "id"],
+                condition=Q(is_active=True),
+                name="product_active_category_idx",
+            ),
+            models.Index(
+                fields=["stock_status", "is_active"], name="product_stock_status_idx"
+            ),
+            models.Index(fields=["updated_at"], name="product_updated_at_idx"),
+        ]
+
     def save(self, *args, **kwargs):
         if not self.slug:
             self.slug = slugify(self.name)
@@ -125,6 +767,10 @@ class AttributeValue(models.Model):
         return f"{self.attribute.name}: {self.attribute_value}"
 
 
+class ProductLineQuerySet(StockQuerySet):
+    stock_key = "sku"
+
+
 class ProductLine(models.Model):
     price = models.DecimalField(decimal_places=2, max_digits=5)
     sku = models.UUIDField(default=uuid.uuid4, unique=True)
@@ -139,8 +785,22 @@ class ProductLine(models.Model):
         related_name="attribute_values",
     )
 
+    objects = ProductLineQuerySet.as_manager()
+
     class Meta:
         db_table = "inventory_product_line"
+        indexes = [
+            models.Index(
+                fields=["product", "order"],
+                condition=Q(is_active=True),
+                name="product_line_active_order_idx",
+            ),
+            models.Index(
+                fields=["stock_qty"],
+                condition=Q(is_active=True),
+                name="product_line_active_stock_idx",
+            ),
+        ]
 
 
 class ProductImage(models.Model):
@@ -151,19 +811,149 @@ class ProductImage(models.Model):
 
     class Meta:
         db_table = "inventory_product_image"
+        indexes = [
+            models.Index(
+                fields=["product_line", "order"], name="product_image_order_idx"
+            ),
+        ]
+
+
+class ProductImageDerivative(models.Model):
+    """
+    A resized WebP rendition of a ProductImage, written by inventory.images.
+    ``source_name`` is the original's storage name it was rendered from, so
+    replacing the original makes the derivative stale.
+    """
+
+    THUMBNAIL = "thumbnail"
+    LISTING = "listing"
+    ZOOM = "zoom"
+
+    KINDS = {
+        THUMBNAIL: "Thumbnail",
+        LISTING: "Listing",
+        ZOOM: "Zoom",
+    }
+
+    image = models.ForeignKey(
+        ProductImage, on_delete=models.CASCADE, related_name="derivatives"
+    )
+    kind = models.CharField(max_length=20, choices=KINDS)
+    file = models.ImageField(max_length=255)
+    width = models.IntegerField()
+    height = models.IntegerField()
+    source_name = models.CharField(max_length=255)
+
+    class Meta:
+        db_table = "inventory_product_image_derivative"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["image", "kind"], name="product_image_derivative_kind_uniq"
+            ),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.image_id} {self.kind}"
 
 
 class ProductLine_AttributeValue(models.Model):
     attribute_value = models.ForeignKey(AttributeValue, on_delete=models.CASCADE)
     product_line = models.ForeignKey(ProductLine, on_delete=models.CASCADE)
 
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["product_line", "attribute_value"],
+                name="line_attribute_value_idx",
+            ),
+        ]
+
 
 class Product_ProductType(models.Model):
     product = models.ForeignKey(Product, on_delete=models.CASCADE)
     product_type = models.ForeignKey(ProductType, on_delete=models.CASCADE)
 
 
+class StockControlQuerySet(StockQuerySet):
+    stock_key = "stock_product_id"
+    product_key = "stock_product_id"
+
+
 class StockControl(models.Model):
     stock_qty = models.IntegerField()
     name = models.CharField(max_length=100)
     stock_product = models.OneToOneField(Product, on_delete=models.CASCADE)
+
+    objects = StockControlQuerySet.as_manager()
+
+
+class ProductListing(models.Model):
+    """
+    Product card read model: one row per active product with its category,
+    cheapest active line and that line's first image. Written only by
+    inventory.listing, from model signals or a full rebuild.
+    """
+
+    product = models.OneToOneField(
+        Product, on_delete=models.CASCADE, primary_key=True, related_name="listing"
+    )
+    pid = models.CharField(max_length=255)
+    name = models.CharField(max_length=200)
+    slug = models.SlugField(max_length=220, db_index=False)
+    stock_status = models.CharField(max_length=3, choices=Product.STOCK_STATUS)
+    category = models.ForeignKey(
+        Category,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        null=True,
+        related_name="+",
+    )
+    category_name = models.CharField(max_length=100, null=True)
+    category_slug = models.SlugField(max_length=100, null=True, db_index=False)
+    sku = models.UUIDField(null=True)
+    price = models.DecimalField(decimal_places=2, max_digits=5, null=True)
+    image = models.ImageField(null=True)
+
+    class Meta:
+        db_table = "inventory_product_listing"
+        indexes = [
+            models.Index(
+                fields=["category", "product"], name="product_listing_category_idx"
+            ),
+        ]
+
+
+class Watermark(models.Model):
+    """How far an incremental job got, as the time its last run started."""
+
+    name = models.CharField(max_length=100, unique=True)
+    value = models.DateTimeField()
+
+    class Meta:
+        db_table = "inventory_watermark"
+
+    def __str__(self):
+        return f"{self.name}: {self.value.isoformat()}"
+
+
+class ProductSearch(models.Model):
+    """
+    Search document of one active product, its text split by weight: the
+    name (A), the category name (B), the attribute values of its lines (C)
+    and the description (D). On PostgreSQL ``vector`` holds the weighted
+    tsvector behind the product_search_vector_idx GIN index; elsewhere it
+    stays empty and inventory.search keeps an inverted index in process.
+    Written only by inventory.search.
+    """
+
+    product = models.OneToOneField(
+        Product, on_delete=models.CASCADE, primary_key=True, related_name="search"
+    )
+    name = models.CharField(max_length=200)
+    category = models.CharField(max_length=100, blank=True)
+    attributes = models.TextField(blank=True)
+    description = models.TextField(blank=True)
+    vector = SearchVectorField(null=True)
+
+    class Meta:
+        db_table = "inventory_product_search"
@@ -0,0 +1,172 @@
+import heapq
+import logging
+import random
+import re
+import time
+from collections import Counter
+from contextlib import ExitStack
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+_LITERAL = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b|%s")
+_PLACEHOLDER_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)")
+_SPACE = re.compile(r"\s+")
+
+
+def fingerprint(sql):
+    """
+    ``sql`` with its literals and placeholders replaced by ``?`` and IN lists
+    collapsed, so queries differing only in their arguments match.
+    """
+    sql = _LITERAL.sub("?", sql)
+    sql = _PLACEHOLDER_LIST.sub("(...)", sql)
+    return _SPACE.sub(" ", sql).strip()
+
+
+class AliasProfile:
+    __slots__ = ("queries", "duration", "fingerprints", "slowest")
+
+    def __init__(self):
+        self.queries = 0
+        self.duration = 0.0
+        self.fingerprints = Counter()
+        self.slowest = []
+
+
+class QueryProfile:
+    """
+    An execute wrapper recording, per database alias, how many queries ran,
+    how long they took, how often each query shape repeated and the
+    ``slowest`` statements.
+    """
+
+    def __init__(self, slowest=5):
+        self.slowest = slowest
+        self.aliases = {}
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.record(context["connection"].alias, sql, time.perf_counter() - start)
+
+    def record(self, alias, sql, duration):
+        profile = self.aliases.get(alias)
+        if profile is None:
+            profile = self.aliases[alias] = AliasProfile()
+        profile.queries += 1
+        profile.duration += duration
+        profile.fingerprints[fingerprint(sql)] += 1
+        if len(profile.slowest) < self.slowest:
+            heapq.heappush(profile.slowest, (duration, sql))
+        elif self.slowest and duration > profile.slowest[0][0]:
+            heapq.heapreplace(profile.slowest, (duration, sql))
+
+    def install(self):
+        """Wrap every connection of the calling thread until the stack closes."""
+        stack = ExitStack()
+        for alias in connections:
+            stack.enter_context(connections[alias].execute_wrapper(self))
+        return stack
+
+    def server_timing(self):
+        return ", ".join(
+            f'db-{alias};dur={profile.duration * 1000:.1f};desc="{profile.queries} '
+            f'queries"'
+            for alias, profile in sorted(self.aliases.items())
+        )
+
+    def summary(self, duplicates=2):
+        """
+        Per-alias totals as plain data, listing the query shapes that ran at
+        least ``duplicates`` times (the N+1 suspects).
+        """
+        return {
+            alias: {
+                "queries": profile.queries,
+                "duration_ms": round(profile.duration * 1000, 3),
+                "duplicates": [
+                    {"fingerprint": shape, "count": count}
+                    for shape, count in profile.fingerprints.most_common()
+                    if count >= duplicates
+                ],
+                "slowest": [
+                    {"sql": sql, "duration_ms": round(duration * 1000, 3)}
+                    for duration, sql in sorted(profile.slowest, reverse=True)
+                ],
+            }
+            for alias, profile in sorted(self.aliases.items())
+        }
+
+
+class QueryProfileMiddleware:
+    """
+    Profile the queries of a sample of INVENTORY_QUERY_PROFILE_RATE of the
+    requests (0 turns it off, 1 profiles all of them), reporting each
+    database alias in a Server-Timing header and an ``inventory.profiling``
+    log record. Requests left out of the sample cost one random draw.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not self._sampled():
+            return self.get_response(request)
+        profile = self._profile()
+        with profile.install():
+            response = self.get_response(request)
+        return self._report(request, response, profile)
+
+    async def __acall__(self, request):
+        if not self._sampled():
+            return await self.get_response(request)
+        profile = self._profile()
+        # The async ORM runs queries on the request's thread-sensitive
+        # executor, whose connections are the ones to wrap.
+        stack = await sync_to_async(profile.install)()
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(stack.close)()
+        return self._report(request, response, profile)
+
+    def _sampled(self):
+        rate = getattr(settings, "INVENTORY_QUERY_PROFILE_RATE", 0)
+        return rate > 0 and (rate >= 1 or random.random() < rate)
+
+    def _profile(self):
+        return QueryProfile(getattr(settings, "INVENTORY_QUERY_PROFILE_SLOWEST", 5))
+
+    def _report(self, request, response, profile):
+        if profile.aliases:
+            timing = profile.server_timing()
+            if response.has_header("Server-Timing"):
+                timing = f"{response['Server-Timing']}, {timing}"
+            response["Server-Timing"] = timing
+        duplicates = getattr(settings, "INVENTORY_QUERY_PROFILE_DUPLICATES", 2)
+        logger.info(
+            "%s %s: %s queries",
+            request.method,
+            request.path,
+            sum(alias.queries for alias in profile.aliases.values()),
+            extra={
+                "method": request.method,
+                "path": request.path,
+                "status": response.status_code,
+                "databases": profile.summary(duplicates),
+            },
+        )
+        return response
@@ -0,0 +1,382 @@
+"""
+Ranked full-text product search over the ProductSearch documents.
+
+PostgreSQL matches the weighted ``vector`` column (GIN indexed) against a
+web-search style query and falls back on trigram word similarity of the
+name for typos, ranking and paginating in one query. Other backends match
+against a SearchIndex built in process from the same documents and cached
+until they change, then narrow its matches to the searched products a
+chunk at a time until the page is filled. Documents are refreshed from
+model signals as products, categories and attribute values change.
+"""
+
+import re
+from collections import Counter
+
+from django.conf import settings
+from django.contrib.postgres.search import (
+    SearchQuery,
+    SearchRank,
+    SearchVector,
+    TrigramWordSimilarity,
+)
+from django.db import connections, router, transaction
+from django.db.models import F, Q
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from .bulk import insert_rows, upsert_rows
+from .cache import PREFIX, bump_versions, get_or_build, get_version
+from .models import AttributeValue, Category, Product, ProductLine, ProductSearch
+from .signals import bulk_upserted
+
+# Document fields with their tsvector weight and PostgreSQL's default
+# ts_rank() multiplier for it, which the in-process index uses as well.
+WEIGHTS = {
+    "name": ("A", 1.0),
+    "category": ("B", 0.4),
+    "attributes": ("C", 0.2),
+    "description": ("D", 0.1),
+}
+
+_WORD = re.compile(r"\w+")
+
+
+def _config():
+    return getattr(settings, "INVENTORY_SEARCH_CONFIG", "english")
+
+
+def _similarity():
+    return getattr(settings, "INVENTORY_SEARCH_SIMILARITY", 0.3)
+
+
+def tokenize(text):
+    return _WORD.findall(text.lower())
+
+
+def trigrams(word):
+    """The trigrams of ``word`` padded the way pg_trgm pads it."""
+    padded = f"  {word} "
+    return {padded[i : i + 3] for i in range(len(padded) - 2)}
+
+
+def search_rows(products):
+    """ProductSearch rows for the active products in ``products`` as dicts."""
+    rows = list(
+        products.filter(is_active=True).values(
+            "name",
+            "description",
+            product_id=F("id"),
+            category_name=F("category__name"),
+        )
+    )
+    attributes = {}
+    if rows:
+        for product_id, value in (
+            ProductLine.objects.using(products.db)
+            .filter(
+                product_id__in=[row["product_id"] for row in rows],
+                attribute_values__isnull=False,
+            )
+            .values_list("product_id", "attribute_values__attribute_value")
+            .order_by("product_id", "attribute_values__attribute_value")
+            .distinct()
+        ):
+            attributes.setdefault(product_id, []).append(value)
+
+    for row in rows:
+        yield {
+            "product_id": row["product_id"],
+            "name": row["name"],
+            "category": row["category_name"] or "",
+            "attributes": " ".join(attributes.get(row["product_id"], ())),
+            "description": row["description"] or "",
+        }
+
+
+def search_vector():
+    config = _config()
+    vector = None
+    for field, (weight, _) in WEIGHTS.items():
+        part = SearchVector(field, weight=weight, config=config)
+        vector = part if vector is None else vector + part
+    return vector
+
+
+def _write_vectors(documents):
+    if connections[documents.db].vendor == "postgresql":
+        documents.update(vector=search_vector())
+
+
+def invalidate_search_index(using):
+    transaction.on_commit(lambda: bump_versions("search", [using]), using=using)
+
+
+def refresh_search(product_ids, using=None):
+    """Recompute the search documents of ``product_ids``, returning how many."""
+    product_ids = set(product_ids)
+    if not product_ids:
+        return 0
+    using = using or router.db_for_write(ProductSearch)
+    documents = ProductSearch.objects.using(using)
+    with transaction.atomic(using=using):
+        indexed = upsert_rows(
+            ProductSearch,
+            search_rows(Product.objects.using(using).filter(pk__in=product_ids)),
+            using,
+        )
+        if unindexed := product_ids - indexed:
+            documents.filter(product_id__in=unindexed).delete()
+        if indexed:
+            _write_vectors(documents.filter(product_id__in=indexed))
+    invalidate_search_index(using)
+    return len(indexed)
+
+
+def rebuild_search(using=None, batch_size=5000):
+    """Recompute every search document, ``batch_size`` products at a time."""
+    using = using or router.db_for_write(ProductSearch)
+    products = Product.objects.using(using).order_by("id")
+    count = 0
+    with transaction.atomic(using=using):
+        ProductSearch.objects.using(using).all().delete()
+        last_id = 0
+        while ids := list(
+            products.filter(id__gt=last_id).values_list("id", flat=True)[:batch_size]
+        ):
+            last_id = ids[-1]
+            count += insert_rows(
+                ProductSearch,
+                search_rows(products.filter(id__gte=ids[0], id__lte=last_id)),
+                using,
+                batch_size,
+            )
+        _write_vectors(ProductSearch.objects.using(using).all())
+    invalidate_search_index(using)
+    return count
+
+
+class SearchIndex:
+    """
+    Inverted index of the search documents: each lowercased word maps to the
+    products containing it, scored by the weights of the fields it appears
+    in. Query words missing from the vocabulary match the words sharing
+    enough trigrams with them instead, scaled by that similarity. There is
+    no stemming or stop word list, unlike PostgreSQL's text search configs.
+    """
+
+    __slots__ = ("postings", "trigrams")
+
+    def __init__(self, rows):
+        self.postings = {}
+        for product_id, *fields in rows:
+            for text, (_, weight) in zip(fields, WEIGHTS.values()):
+                for word in tokenize(text):
+                    scores = self.postings.setdefault(word, {})
+                    scores[product_id] = scores.get(product_id, 0) + weight
+        self.trigrams = {}
+        for word in self.postings:
+            for trigram in trigrams(word):
+                self.trigrams.setdefault(trigram, []).append(word)
+
+    @classmethod
+    def build(cls, using=None):
+        documents = ProductSearch.objects.all()
+        if using:
+            documents = documents.using(using)
+        return cls(documents.order_by("product_id").values_list("product_id", *WEIGHTS))
+
+    def search(self, text):
+        """(product_id, score) pairs matching every word of ``text``, best first."""
+        scores = None
+        for word in tokenize(text):
+            matches = self._matches(word)
+            if scores is None:
+                scores = dict(matches)
+            else:
+                scores = {
+                    product_id: score + matches[product_id]
+                    for product_id, score in scores.items()
+                    if product_id in matches
+                }
+            if not scores:
+                return []
+        return sorted((scores or {}).items(), key=lambda item: (-item[1], item[0]))
+
+    def _matches(self, word):
+        exact = self.postings.get(word)
+        if exact is not None:
+            return exact
+        matches = {}
+        for other, similarity in self._similar(word):
+            for product_id, score in self.postings[other].items():
+                matches[product_id] = max(
+                    matches.get(product_id, 0), score * similarity
+                )
+        return matches
+
+    def _similar(self, word):
+        grams = trigrams(word)
+        shared = Counter(
+            other for trigram in grams for other in self.trigrams.get(trigram, ())
+        )
+        threshold = _similarity()
+        for other, count in shared.items():
+            similarity = count / (len(grams) + len(trigrams(other)) - count)
+            if similarity >= threshold:
+                yield other, similarity
+
+
+def get_search_index(using):
+    """SearchIndex of database ``using``, cached until a document changes."""
+    version = get_version("search", using)
+    return get_or_build(
+        f"{PREFIX}:search:{using}:{version}",
+        lambda: SearchIndex.build(using),
+        timeout=getattr(settings, "INVENTORY_SEARCH_TIMEOUT", 300),
+    )
+
+
+# Index matches checked against the searched queryset per statement.
+INDEX_CHUNK_SIZE = 500
+
+
+def search_products(products, text, page=1, per_page=20):
+    """
+    Page ``page`` (from 1) of the active products in ``products`` matching
+    ``text``, best first, each annotated with its ``rank``.
+    """
+    if not tokenize(text):
+        return []
+    offset = (page - 1) * per_page
+    products = products.filter(is_active=True)
+    if connections[products.db].vendor == "postgresql":
+        query = SearchQuery(text, config=_config(), search_type="websearch")
+        ranked = products.annotate(
+            rank=SearchRank(F("search__vector"), query)
+            + TrigramWordSimilarity(text, "search__name")
+        ).filter(Q(search__vector=query) | Q(search__name__trigram_word_similar=text))
+    else:
+        return _search_index_page(products, text, offset, per_page)
+    return list(ranked.order_by("-rank", "pk")[offset : offset + per_page])
+
+
+def _search_index_page(products, text, offset, per_page):
+    # The index ranks every document; the matches are narrowed to
+    # ``products`` a chunk at a time, keeping each statement under SQLite's
+    # bound parameter limit, until the requested page is filled.
+    matches = get_search_index(products.db).search(text)
+    found = []
+    for start in range(0, len(matches), INDEX_CHUNK_SIZE):
+        chunk = matches[start : start + INDEX_CHUNK_SIZE]
+        in_scope = products.in_bulk([pk for pk, _ in chunk])
+        for pk, score in chunk:
+            if pk in in_scope:
+                in_scope[pk].rank = score
+                found.append(in_scope[pk])
+        if len(found) >= offset + per_page:
+            break
+    return found[offset : offset + per_page]
+
+
+def _products_with_values(value_ids, using):
+    return (
+        ProductLine.objects.using(using)
+        .filter(attribute_values__in=value_ids)
+        .values_list("product_id", flat=True)
+    )
+
+
+# Product fields a search document is built from, by name and attname.
+DOCUMENT_FIELDS = {"name", "description", "category", "category_id", "is_active"}
+
+
+@receiver(post_save, sender=Product)
+def _product_saved(sender, instance, using, update_fields, **kwargs):
+    if update_fields is None or not update_fields.isdisjoint(DOCUMENT_FIELDS):
+        refresh_search([instance.pk], using)
+
+
+@receiver(post_delete, sender=Product)
+def _product_deleted(sender, instance, using, **kwargs):
+    invalidate_search_index(using)
+
+
+@receiver(post_delete, sender=ProductLine)
+def _product_line_deleted(sender, instance, using, **kwargs):
+    refresh_search([instance.product_id], using)
+
+
+@receiver(post_save, sender=Category)
+def _category_saved(sender, instance, using, update_fields, **kwargs):
+    # Documents only carry the category's name.
+    if update_fields is not None and "name" not in update_fields:
+        return
+    refresh_search(
+        Product.objects.using(using)
+        .filter(category=instance)
+        .values_list("id", flat=True),
+        using,
+    )
+
+
+@receiver(post_save, sender=AttributeValue)
+def _attribute_value_saved(sender, instance, using, **kwargs):
+    refresh_search(_products_with_values([instance.pk], using), using)
+
+
+@receiver(pre_delete, sender=AttributeValue)
+def _remember_attribute_value_products(sender, instance, using, **kwargs):
+    # The line links are gone by post_delete.
+    instance._search_product_ids = set(_products_with_values([instance.pk], using))
+
+
+@receiver(post_delete, sender=AttributeValue)
+def _attribute_value_deleted(sender, instance, using, **kwargs):
+    refresh_search(getattr(instance, "_search_product_ids", ()), using)
+
+
+@receiver(m2m_changed, sender=ProductLine.attribute_values.through)
+def _line_attribute_values_changed(
+    sender, instance, action, reverse, pk_set, using, **kwargs
+):
+    if not reverse:
+        if action in ("post_add", "post_remove", "post_clear"):
+            refresh_search([instance.product_id], using)
+    elif action == "pre_clear":
+        # The lines of a cleared attribute value are only known beforehand.
+        instance._search_product_ids = set(_products_with_values([instance.pk], using))
+    elif action == "post_clear":
+        refresh_search(instance._search_product_ids, using)
+    elif action in ("post_add", "post_remove"):
+        refresh_search(
+            ProductLine.objects.using(using)
+            .filter(pk__in=pk_set)
+            .values_list("product_id", flat=True),
+            using,
+        )
+
+
+@receiver(bulk_upserted, sender=Product)
+def _products_upserted(sender, pks, using, **kwargs):
+    refresh_search(pks, using)
+
+
+@receiver(bulk_upserted, sender=ProductLine)
+def _product_lines_upserted(sender, pks, using, **kwargs):
+    refresh_search(
+        ProductLine.objects.using(using)
+        .filter(pk__in=pks)
+        .values_list("product_id", flat=True),
+        using,
+    )
+
+
+@receiver(bulk_upserted, sender=Category)
+def _categories_upserted(sender, pks, using, **kwargs):
+    refresh_search(
+        Product.objects.using(using)
+        .filter(category_id__in=pks)
+        .values_list("id", flat=True),
+        using,
+    )
@@ -0,0 +1,11 @@
+from django.dispatch import Signal
+
+# Sent by the stock reservation querysets after stock_qty moved through a
+# queryset update(), which bypasses post_save. Arguments: product_ids,
+# status_changed (the product_ids whose stock_status was rewritten), using.
+stock_changed = Signal()
+
+# Sent by SlugUpsertQuerySet.upsert() and the admin's bulk inline save for the
+# rows they wrote through bulk_create() or bulk_update(), which bypass
+# post_save. Arguments: pks, using.
+bulk_upserted = Signal()
@@ -0,0 +1,155 @@
+"""
+Set-based stock status upkeep and the low-stock report.
+
+recompute_stock_status() finds the products whose stored stock_status no
+longer matches their stock in one query and rewrites them with one UPDATE
+per batch, either for the whole catalog or only for products touched since
+the previous run. Saving or deleting a product line or StockControl row
+touches its product, so stock edits made outside the reservation querysets
+are picked up by the next incremental run.
+"""
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import router, transaction
+from django.db.models import Case, F, IntegerField, Value, When
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .models import (
+    CategoryClosure,
+    Product,
+    ProductLine,
+    StockControl,
+    Watermark,
+)
+from .signals import bulk_upserted, stock_changed
+
+WATERMARK = "stock_status"
+
+
+def recompute_stock_status(using=None, full=False, batch_size=5000):
+    """
+    Rewrite the stock_status of the products it drifted on and return how
+    many there were. Unless ``full``, only products updated since the last
+    run started (less INVENTORY_STOCK_WATERMARK_OVERLAP seconds, for
+    transactions that were still open then) are looked at.
+    """
+    using = using or router.db_for_write(Product)
+    started = timezone.now()
+    products = Product.objects.using(using)
+    since = (
+        None
+        if full
+        else Watermark.objects.using(using)
+        .filter(name=WATERMARK)
+        .values_list("value", flat=True)
+        .first()
+    )
+    if since is not None:
+        overlap = getattr(settings, "INVENTORY_STOCK_WATERMARK_OVERLAP", 60)
+        products = products.filter(updated_at__gte=since - timedelta(seconds=overlap))
+
+    drifted = list(products.stock_drifted().order_by("id").values_list("id", flat=True))
+    with transaction.atomic(using=using):
+        for start in range(0, len(drifted), batch_size):
+            batch = drifted[start : start + batch_size]
+            Product.objects.using(using).filter(id__in=batch).refresh_stock_status()
+            stock_changed.send(
+                sender=Product, product_ids=batch, status_changed=batch, using=using
+            )
+        Watermark.objects.using(using).update_or_create(
+            name=WATERMARK, defaults={"value": started}
+        )
+    return len(drifted)
+
+
+def _category_thresholds(thresholds, using):
+    """
+    {category id: threshold} for every category in the subtree of a category
+    slug in ``thresholds``, the nearest configured ancestor winning.
+    """
+    nearest = {}
+    for category_id, slug, depth in (
+        CategoryClosure.objects.using(using)
+        .filter(ancestor__slug__in=list(thresholds))
+        .values_list("descendant_id", "ancestor__slug", "depth")
+    ):
+        if category_id not in nearest or depth < nearest[category_id][1]:
+            nearest[category_id] = (thresholds[slug], depth)
+    return {category_id: threshold for category_id, (threshold, _) in nearest.items()}
+
+
+def low_stock(threshold=None, thresholds=None, using=None):
+    """
+    Active lines of active products holding at most their threshold of
+    units, lowest stock first, as dicts. The threshold is ``threshold``
+    (INVENTORY_LOW_STOCK_THRESHOLD by default) unless the product's category
+    falls in the subtree of a category slug in ``thresholds``
+    (INVENTORY_LOW_STOCK_THRESHOLDS by default).
+    """
+    using = using or router.db_for_read(ProductLine)
+    if threshold is None:
+        threshold = getattr(settings, "INVENTORY_LOW_STOCK_THRESHOLD", 5)
+    if thresholds is None:
+        thresholds = getattr(settings, "INVENTORY_LOW_STOCK_THRESHOLDS", {})
+
+    by_threshold = {}
+    for category_id, limit in _category_thresholds(thresholds, using).items():
+        by_threshold.setdefault(limit, []).append(category_id)
+    limit = Case(
+        *(
+            When(product__category_id__in=category_ids, then=Value(limit))
+            for limit, category_ids in sorted(by_threshold.items())
+        ),
+        default=Value(threshold),
+        output_field=IntegerField(),
+    )
+    return (
+        ProductLine.objects.using(using)
+        .filter(is_active=True, product__is_active=True)
+        .annotate(threshold=limit)
+        .filter(stock_qty__lte=F("threshold"))
+        .order_by("stock_qty", "product_id", "order")
+        .values(
+            "sku",
+            "stock_qty",
+            "threshold",
+            pid=F("product__pid"),
+            name=F("product__name"),
+            category=F("product__category__name"),
+        )
+    )
+
+
+def touch_products(product_ids, using):
+    """Move the products' updated_at on, for the next incremental run."""
+    product_ids = set(product_ids)
+    if product_ids:
+        Product.objects.using(using).filter(pk__in=product_ids).update(
+            updated_at=timezone.now()
+        )
+
+
+@receiver(post_save, sender=ProductLine)
+@receiver(post_delete, sender=ProductLine)
+def _product_line_changed(sender, instance, using, **kwargs):
+    touch_products([instance.product_id], using)
+
+
+@receiver(post_save, sender=StockControl)
+@receiver(post_delete, sender=StockControl)
+def _stock_control_changed(sender, instance, using, **kwargs):
+    touch_products([instance.stock_product_id], using)
+
+
+@receiver(bulk_upserted, sender=ProductLine)
+def _product_lines_upserted(sender, pks, using, **kwargs):
+    touch_products(
+        ProductLine.objects.using(using)
+        .filter(pk__in=pks)
+        .values_list("product_id", flat=True),
+        using,
+    )
@@ -0,0 +1,291 @@
+import random
+import uuid
+from collections import Counter
+from datetime import datetime
+from datetime import timezone as dt_timezone
+from decimal import Decimal
+
+from django.db import router, transaction
+from django.utils.text import slugify
+
+from .autocomplete import invalidate_autocomplete
+from .bulk import insert_rows
+from .listing import refresh_listing
+from .models import (
+    Attribute,
+    AttributeValue,
+    Category,
+    CategoryClosure,
+    Product,
+    Product_ProductType,
+    ProductImage,
+    ProductLine,
+    ProductLine_AttributeValue,
+    ProductType,
+    ProductTypeClosure,
+)
+from .search import refresh_search
+
+# Timestamp of every generated row, so the same seed gives the same data.
+EPOCH = datetime(2024, 1, 1, tzinfo=dt_timezone.utc)
+
+
+def level_sizes(count, depth):
+    """
+    Split ``count`` tree nodes over at most ``depth`` levels, each level a
+    constant factor wider than the one above and the last one taking the rest.
+    """
+    if count <= 0:
+        return []
+    width = max(1, round(count ** (1 / max(depth, 1))))
+    sizes = []
+    remaining = count
+    for level in range(depth):
+        size = remaining if level == depth - 1 else min(width ** (level + 1), remaining)
+        sizes.append(size)
+        remaining -= size
+        if not remaining:
+            break
+    return sizes
+
+
+class CatalogGenerator:
+    """
+    Deterministic synthetic catalog: the same seed and sizes always produce
+    the same rows, whatever the batch size, as every product draws from a
+    generator seeded with the seed and its number. Everything goes in
+    through insert_rows (COPY on PostgreSQL) one batch at a time, with one
+    extra query per batch to read back the generated keys. Names carry
+    ``prefix`` so several runs can share a database; only the generated
+    rows' closures, listings and search documents are computed.
+    """
+
+    def __init__(
+        self, seed=0, prefix="synthetic", using=None, batch_size=5000, progress=None
+    ):
+        self.seed = seed
+        self.prefix = slugify(prefix)
+        self.using = using or router.db_for_write(Product)
+        self.batch_size = batch_size
+        self.progress = progress
+        self.counts = Counter()
+
+    def generate(
+        self,
+        categories=50,
+        category_depth=3,
+        product_types=10,
+        products=1000,
+        lines_per_product=3,
+        attributes=5,
+        values_per_attribute=10,
+        attributes_per_line=3,
+        images_per_line=2,
+        listing=True,
+        search=True,
+    ):
+        if not 1 <= category_depth <= 11:
+            raise ValueError("category_depth must be between 1 and 11")
+
+        category_ids = self.categories(categories, category_depth)
+        type_ids = self.product_types(product_types)
+        value_ids = self.attribute_values(attributes, values_per_attribute)
+        for start in range(0, products, self.batch_size):
+            with transaction.atomic(using=self.using):
+                product_ids = self.product_batch(
+                    range(start, min(products, start + self.batch_size)),
+                    category_ids,
+                    type_ids,
+                    value_ids,
+                    lines_per_product,
+                    attributes_per_line,
+                    images_per_line,
+                )
+                if listing:
+                    self.counts["product listings"] += refresh_listing(
+                        product_ids, self.using
+                    )
+                if search:
+                    self.counts["product search documents"] += refresh_search(
+                        product_ids, self.using
+                    )
+            if self.progress:
+                self.progress(self.counts)
+        invalidate_autocomplete(self.using)
+        return self.counts
+
+    def categories(self, count, depth):
+        return self._tree(
+            Category,
+            CategoryClosure,
+            count,
+            depth,
+            lambda name: {"slug": name, "is_active": True},
+        )
+
+    def product_types(self, count):
+        return self._tree(ProductType, ProductTypeClosure, count, 2, lambda name: {})
+
+    def attribute_values(self, attributes, values_per_attribute):
+        """Value ids grouped per attribute."""
+        names = [f"{self.prefix}-attribute-{i}" for i in range(attributes)]
+        self._insert(Attribute, [{"name": name} for name in names])
+        attribute_ids = self._ids(Attribute, "name", names)
+        self._insert(
+            AttributeValue,
+            [
+                {"attribute_id": attribute_id, "attribute_value": f"value-{i}"}
+                for attribute_id in attribute_ids
+                for i in range(values_per_attribute)
+            ],
+        )
+        grouped = {attribute_id: [] for attribute_id in attribute_ids}
+        for attribute_id, value_id in (
+            AttributeValue.objects.using(self.using)
+            .filter(attribute_id__in=attribute_ids)
+            .order_by("attribute_id", "id")
+            .values_list("attribute_id", "id")
+        ):
+            grouped[attribute_id].append(value_id)
+        return [values for values in grouped.values() if values]
+
+    def product_batch(
+        self,
+        numbers,
+        category_ids,
+        type_ids,
+        value_ids,
+        lines_per_product,
+        attributes_per_line,
+        images_per_line,
+    ):
+        rngs, pids, products, stocks = [], [], [], []
+        for number in numbers:
+            rng = random.Random(f"{self.seed}:{number}")
+            rngs.append(rng)
+            # (stock_qty, is_active) of each line.
+            stock = [
+                (rng.randint(1, 500) if rng.random() < 0.7 else 0, rng.random() < 0.9)
+                for _ in range(lines_per_product)
+            ]
+            pid = f"{self.prefix}-{number}"
+            pids.append(pid)
+            stocks.append(stock)
+            products.append(
+                {
+                    "pid": pid,
+                    "name": f"{self.prefix} product {number}",
+                    "slug": f"{self.prefix}-product-{number}",
+                    "description": f"Synthetic product {number}",
+                    "is_digitial": rng.random() < 0.05,
+                    "is_active": rng.random() < 0.9,
+                    "stock_status": (
+                        Product.IN_STOCK
+                        if any(qty for qty, active in stock if active)
+                        else Product.OUT_OF_STOCK
+                    ),
+                    "category_id": rng.choice(category_ids) if category_ids else None,
+                    "seasonal_event_id": None,
+                    "created_at": EPOCH,
+                    "updated_at": EPOCH,
+                }
+            )
+        self._insert(Product, products)
+        product_ids = self._ids(Product, "pid", pids)
+
+        if type_ids:
+            self._insert(
+                Product_ProductType,
+                [
+                    {"product_id": product_id, "product_type_id": rng.choice(type_ids)}
+                    for rng, product_id in zip(rngs, product_ids)
+                ],
+            )
+
+        lines, line_rngs = [], []
+        for rng, pid, product_id, stock in zip(rngs, pids, product_ids, stocks):
+            for order, (stock_qty, is_active) in enumerate(stock, start=1):
+                lines.append(
+                    {
+                        "sku": uuid.uuid5(uuid.NAMESPACE_OID, f"{pid}/{order}"),
+                        "price": Decimal(rng.randint(100, 99999)) / 100,
+                        "stock_qty": stock_qty,
+                        "is_active": is_active,
+                        "order": order,
+                        "weight": round(rng.uniform(0.1, 20), 2),
+                        "product_id": product_id,
+                    }
+                )
+                line_rngs.append(rng)
+        self._insert(ProductLine, lines)
+        skus = [line["sku"] for line in lines]
+        line_ids = self._ids(ProductLine, "sku", skus)
+
+        self._insert(
+            ProductLine_AttributeValue,
+            [
+                {"product_line_id": line_id, "attribute_value_id": rng.choice(values)}
+                for rng, line_id in zip(line_rngs, line_ids)
+                for values in rng.sample(
+                    value_ids, min(attributes_per_line, len(value_ids))
+                )
+            ],
+        )
+        self._insert(
+            ProductImage,
+            [
+                {
+                    "product_line_id": line_id,
+                    "url": f"{self.prefix}/{sku}-{order}.jpg",
+                    "alternative_text": f"image {order}",
+                    "order": order,
+                }
+                for line_id, sku in zip(line_ids, skus)
+                for order in range(1, images_per_line + 1)
+            ],
+        )
+        return product_ids
+
+    def _tree(self, model, closure, count, depth, extra):
+        ids, parents, nodes = [], [None], []
+        for level, size in enumerate(level_sizes(count, depth)):
+            names = [
+                f"{self.prefix}-{model._meta.model_name}-{len(ids) + i}"
+                for i in range(size)
+            ]
+            self._insert(
+                model,
+                [
+                    {
+                        "name": name,
+                        "level": level,
+                        "parent_id": parents[i % len(parents)],
+                        **extra(name),
+                    }
+                    for i, name in enumerate(names)
+                ],
+            )
+            nodes += [
+                model(pk=pk, parent_id=parents[i % len(parents)])
+                for i, pk in enumerate(self._ids(model, "name", names))
+            ]
+            parents = [node.pk for node in nodes[len(ids) :]]
+            ids.extend(parents)
+        closure.objects.insert_nodes(nodes, self.using)
+        return ids
+
+    def _insert(self, model, rows):
+        self.counts[str(model._meta.verbose_name_plural).lower()] += insert_rows(
+            model, rows, self.using, self.batch_size
+        )
+
+    def _ids(self, model, field, keys):
+        """Primary keys of the rows whose ``field`` is in ``keys``, in order."""
+        ids = {}
+        for start in range(0, len(keys), self.batch_size):
+            ids.update(
+                model.objects.using(self.using)
+                .filter(**{f"{field}__in": keys[start : start + self.batch_size]})
+                .values_list(field, "id")
+            )
+        return [ids[key] for key in keys]
@@ -0,0 +1,20 @@
+from django.urls import path
+
+from . import views
+
+app_name = "inventory"
+
+urlpatterns = [
+    path("products/", views.product_list, name="product-list"),
+    path("products/<int:pk>/", views.product_detail, name="product-detail"),
+    path("listing/", views.product_listing, name="product-listing"),
+    path("autocomplete/", views.autocomplete_view, name="autocomplete"),
+    path("product-lines/", views.product_line_list, name="product-line-list"),
+    path("categories/", views.category_list, name="category-list"),
+    path(
+        "categories/<int:pk>/children/",
+        views.category_children,
+        name="category-children",
+    ),
+    path("stock/", views.stock_lookup, name="stock-lookup"),
+]
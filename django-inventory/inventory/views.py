@@ -1,3 +1,269 @@
-from django.shortcuts import render
+import asyncio
+import base64
+import binascii
+import uuid
+from functools import wraps
 
-# Create your views here.
+from django.http import Http404, JsonResponse
+from django.views.decorators.http import require_GET
+
+from .autocomplete import KINDS, autocomplete
+from .cache import aget_product_detail
+from .models import Category, Product, ProductLine, ProductListing, StockControl
+
+MAX_LIMIT = 100
+DEFAULT_LIMIT = 20
+
+# Public field name -> ORM lookup, per resource.
+PRODUCT_FIELDS = {
+    "id": "id",
+    "pid": "pid",
+    "name": "name",
+    "slug": "slug",
+    "description": "description",
+    "is_digital": "is_digitial",
+    "is_active": "is_active",
+    "stock_status": "stock_status",
+    "category": "category_id",
+    "seasonal_event": "seasonal_event_id",
+    "created_at": "created_at",
+    "updated_at": "updated_at",
+}
+PRODUCT_LINE_FIELDS = {
+    "id": "id",
+    "sku": "sku",
+    "price": "price",
+    "stock_qty": "stock_qty",
+    "is_active": "is_active",
+    "order": "order",
+    "weight": "weight",
+    "product": "product_id",
+}
+LISTING_FIELDS = {
+    "id": "product_id",
+    "pid": "pid",
+    "name": "name",
+    "slug": "slug",
+    "stock_status": "stock_status",
+    "category": "category_id",
+    "category_name": "category_name",
+    "category_slug": "category_slug",
+    "sku": "sku",
+    "price": "price",
+    "image": "image",
+}
+CATEGORY_FIELDS = {
+    "id": "id",
+    "name": "name",
+    "slug": "slug",
+    "is_active": "is_active",
+    "parent": "parent_id",
+    "level": "level",
+}
+
+
+class BadRequest(Exception):
+    pass
+
+
+def encode_cursor(last_id):
+    return base64.urlsafe_b64encode(str(last_id).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        return int(base64.urlsafe_b64decode(padded.encode()).decode())
+    except (binascii.Error, UnicodeDecodeError, ValueError) as exc:
+        raise BadRequest("Invalid cursor") from exc
+
+
+def keyset_page(request, queryset, fields):
+    """
+    One page of ``queryset`` as plain dicts. Pages follow the primary key
+    (``?cursor=``) instead of an OFFSET, so every page is an index range scan
+    of the same cost, and ``?fields=`` narrows the SELECT to those columns.
+    """
+    requested = request.GET.get("fields")
+    names = list(fields) if not requested else requested.split(",")
+    unknown = [name for name in names if name not in fields]
+    if unknown:
+        raise BadRequest(f"Unknown fields: {', '.join(unknown)}")
+    if "id" not in names:
+        names.insert(0, "id")
+
+    try:
+        limit = min(int(request.GET.get("limit", DEFAULT_LIMIT)), MAX_LIMIT)
+    except ValueError as exc:
+        raise BadRequest("Invalid limit") from exc
+    if limit < 1:
+        raise BadRequest("Invalid limit")
+
+    cursor = request.GET.get("cursor")
+    if cursor:
+        queryset = queryset.filter(pk__gt=decode_cursor(cursor))
+
+    rows = list(
+        queryset.order_by("pk").values_list(*(fields[name] for name in names))[
+            : limit + 1
+        ]
+    )
+    results = [dict(zip(names, row)) for row in rows[:limit]]
+    next_cursor = encode_cursor(results[-1]["id"]) if len(rows) > limit else None
+    return {"results": results, "next": next_cursor}
+
+
+def _filter_flag(queryset, request, param, lookup):
+    value = request.GET.get(param)
+    if value is None:
+        return queryset
+    if value.lower() not in ("true", "false", "1", "0"):
+        raise BadRequest(f"Invalid {param}")
+    return queryset.filter(**{lookup: value.lower() in ("true", "1")})
+
+
+def _filter_id(queryset, request, param, lookup):
+    value = request.GET.get(param)
+    if value is None:
+        return queryset
+    try:
+        return queryset.filter(**{lookup: int(value)})
+    except ValueError as exc:
+        raise BadRequest(f"Invalid {param}") from exc
+
+
+def _id_list(request, param, parse):
+    values = request.GET.get(param)
+    if not values:
+        return []
+    try:
+        return [parse(value) for value in values.split(",")]
+    except ValueError as exc:
+        raise BadRequest(f"Invalid {param}") from exc
+
+
+def api_view(view):
+    """Serve the dict a view returns as JSON, and its errors as JSON too."""
+
+    @require_GET
+    @wraps(view)
+    def wrapped(request, *args, **kwargs):
+        try:
+            return JsonResponse(view(request, *args, **kwargs))
+        except BadRequest as exc:
+            return JsonResponse({"error": str(exc)}, status=400)
+        except Http404 as exc:
+            return JsonResponse({"error": str(exc)}, status=404)
+
+    return wrapped
+
+
+def async_api_view(view):
+    """
+    api_view() for coroutine views. Served over ASGI they stay on the event
+    loop, so a slow client holds a coroutine rather than a worker thread.
+    """
+
+    @require_GET
+    @wraps(view)
+    async def wrapped(request, *args, **kwargs):
+        try:
+            return JsonResponse(await view(request, *args, **kwargs))
+        except BadRequest as exc:
+            return JsonResponse({"error": str(exc)}, status=400)
+        except Http404 as exc:
+            return JsonResponse({"error": str(exc)}, status=404)
+
+    return wrapped
+
+
+@api_view
+def product_list(request):
+    products = Product.objects.all()
+    products = _filter_flag(products, request, "active", "is_active")
+    products = _filter_id(
+        products, request, "category", "category__ancestor_links__ancestor"
+    )
+    return keyset_page(request, products, PRODUCT_FIELDS)
+
+
+@api_view
+def product_listing(request):
+    """
+    Product cards from the ProductListing read model. ``?category=`` matches
+    the product's own category, so a page is one range scan of
+    product_listing_category_idx.
+    """
+    listings = ProductListing.objects.all()
+    listings = _filter_id(listings, request, "category", "category_id")
+    return keyset_page(request, listings, LISTING_FIELDS)
+
+
+@async_api_view
+async def product_detail(request, pk):
+    detail = await aget_product_detail(pk)
+    if detail is None:
+        raise Http404("No product matches the given query.")
+    return detail
+
+
+@api_view
+def autocomplete_view(request):
+    """
+    Type-ahead completions of ``?q=`` over product, category and attribute
+    value names (``?kind=`` narrows them), answered from memory.
+    """
+    kinds = request.GET.get("kind")
+    kinds = kinds.split(",") if kinds else None
+    if kinds and not set(kinds) <= set(KINDS):
+        raise BadRequest(f"Invalid kind, expected one of {', '.join(KINDS)}")
+    try:
+        limit = min(int(request.GET.get("limit", 10)), MAX_LIMIT)
+    except ValueError as exc:
+        raise BadRequest("Invalid limit") from exc
+    return {"results": autocomplete(request.GET.get("q", ""), limit, kinds)}
+
+
+@api_view
+def product_line_list(request):
+    lines = ProductLine.objects.all()
+    lines = _filter_flag(lines, request, "active", "is_active")
+    lines = _filter_id(lines, request, "product", "product_id")
+    return keyset_page(request, lines, PRODUCT_LINE_FIELDS)
+
+
+@api_view
+def category_list(request):
+    categories = Category.objects.all()
+    categories = _filter_flag(categories, request, "active", "is_active")
+    categories = _filter_id(categories, request, "parent", "parent_id")
+    return keyset_page(request, categories, CATEGORY_FIELDS)
+
+
+@async_api_view
+async def category_children(request, pk):
+    category, children = await asyncio.gather(
+        Category.objects.filter(pk=pk).values(*CATEGORY_FIELDS).afirst(),
+        Category.objects.achildren(pk),
+    )
+    if category is None:
+        raise Http404("No category matches the given query.")
+    return {**category, "children": children}
+
+
+@async_api_view
+async def stock_lookup(request):
+    skus = _id_list(request, "sku", uuid.UUID)
+    product_ids = _id_list(request, "product", int)
+    if not skus and not product_ids:
+        raise BadRequest("Pass sku and/or product")
+
+    lines, products = await asyncio.gather(
+        ProductLine.objects.astock(skus) if skus else asyncio.sleep(0, {}),
+        (
+            StockControl.objects.astock(product_ids)
+            if product_ids
+            else asyncio.sleep(0, {})
+        ),
+    )
+    return {"lines": lines, "products": products}
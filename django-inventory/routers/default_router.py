@@ -10,7 +10,7 @@ class DefaultAppRouter:
 
     def db_for_write(self, model, **hints):
         if model._meta.app_label in ["admin", "auth", "contenttypes", "sessions"]:
-            return None
+            return "django_db"
         return None
 
     def allow_relation(self, obj1, obj2, **hints):
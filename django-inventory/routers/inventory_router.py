@@ -1,12 +1,136 @@
+import itertools
+import re
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import DatabaseError, connections
+
+PRIMARY = "inventory_db"
+PIN_COOKIE = "inventory_primary"
+
+_replica_lag = {}
+
+# Statements that leave the data alone; anything else run on the primary
+# counts as a write.
+_READ_ONLY_SQL = re.compile(
+    r"\s*(SELECT|SAVEPOINT|RELEASE|ROLLBACK|BEGIN|SET|SHOW|EXPLAIN)\b", re.I
+)
+
+
+class _PinScope:
+    """Whether reads in a request or use_primary() block go to the primary."""
+
+    __slots__ = ("pinned", "wrote")
+
+    def __init__(self, pinned):
+        self.pinned = pinned
+        self.wrote = False
+
+
+# Outside a scope writes pin nothing, so a write in a management command,
+# worker or shell does not send that context's later reads to the primary.
+_pin_scope = ContextVar("inventory_pin_scope", default=None)
+
+
+@contextmanager
+def use_primary():
+    """Send every inventory read inside the block to the primary."""
+    scope = _pin_scope.get()
+    if scope is None:
+        token = _pin_scope.set(_PinScope(pinned=True))
+        try:
+            yield
+        finally:
+            _pin_scope.reset(token)
+        return
+    # Inside a request, keep its scope so writes still pin the client.
+    pinned, scope.pinned = scope.pinned, True
+    try:
+        yield
+    finally:
+        scope.pinned = pinned
+
+
+def _primary_pinned():
+    scope = _pin_scope.get()
+    return scope is not None and (scope.pinned or scope.wrote)
+
+
+def _mark_writes(execute, sql, params, many, context):
+    scope = _pin_scope.get()
+    if scope is not None and not scope.wrote and not _READ_ONLY_SQL.match(sql):
+        scope.wrote = True
+    return execute(sql, params, many, context)
+
+
+def _watch_writes():
+    # Connections are per thread, so the router installs the wrapper on the
+    # one about to run the query. It goes first in the list, because
+    # execute_wrapper() blocks pop the last wrapper when they exit.
+    wrappers = connections[PRIMARY].execute_wrappers
+    if _mark_writes not in wrappers:
+        wrappers.insert(0, _mark_writes)
+
+
+def replica_lag(alias):
+    """
+    Seconds the replica is behind the primary, cached for
+    INVENTORY_REPLICA_LAG_CHECK_INTERVAL seconds. Unreachable replicas
+    report infinite lag.
+    """
+    interval = getattr(settings, "INVENTORY_REPLICA_LAG_CHECK_INTERVAL", 5)
+    checked_at, lag = _replica_lag.get(alias, (None, 0.0))
+    now = time.monotonic()
+    if checked_at is not None and now - checked_at < interval:
+        return lag
+
+    connection = connections[alias]
+    try:
+        if connection.vendor == "postgresql":
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "SELECT COALESCE(EXTRACT(EPOCH FROM "
+                    "now() - pg_last_xact_replay_timestamp()), 0)"
+                )
+                lag = float(cursor.fetchone()[0])
+        else:
+            lag = 0.0
+    except DatabaseError:
+        lag = float("inf")
+    _replica_lag[alias] = (now, lag)
+    return lag
+
+
 class InventoryAppRouter:
+    """
+    Route the inventory app to inventory_db, spreading reads over the
+    replicas in INVENTORY_DB_REPLICAS ({alias: weight}) round-robin.
+
+    Reads go to the primary once the current request has written, inside
+    use_primary(), and while the client carries the pin cookie set by
+    InventoryPrimaryPinMiddleware. Writes outside a request do not pin later
+    reads. Replicas lagging more than INVENTORY_REPLICA_MAX_LAG seconds are
+    skipped.
+    """
+
+    def __init__(self):
+        self._replicas = None
+        self._rotation = None
+
     def db_for_read(self, model, **hints):
-        if model.meta.app_label == "inventory":
-            return "inventory_db"
+        if model._meta.app_label == "inventory":
+            if _primary_pinned():
+                return PRIMARY
+            return self._next_replica()
         return None
 
     def db_for_write(self, model, **hints):
-        if model.meta.app_label == "inventory":
-            return "inventory_db"
+        if model._meta.app_label == "inventory":
+            _watch_writes()
+            return PRIMARY
         return None
 
     def allow_relation(self, obj1, obj2, **hints):
@@ -16,5 +140,67 @@ class InventoryAppRouter:
 
     def allow_migrate(self, db, app_label, model_name=None, **hints):
         if app_label == "inventory":
-            return "inventory_db"
+            return db == PRIMARY
         return None
+
+    def _next_replica(self):
+        replicas = getattr(settings, "INVENTORY_DB_REPLICAS", {})
+        if not replicas:
+            return PRIMARY
+
+        if replicas != self._replicas:
+            self._replicas = dict(replicas)
+            self._rotation = itertools.cycle(
+                [alias for alias, weight in replicas.items() for _ in range(weight)]
+            )
+
+        max_lag = getattr(settings, "INVENTORY_REPLICA_MAX_LAG", None)
+        for _ in range(sum(replicas.values())):
+            alias = next(self._rotation)
+            if max_lag is None or replica_lag(alias) <= max_lag:
+                return alias
+        return PRIMARY
+
+
+class InventoryPrimaryPinMiddleware:
+    """
+    Scope the primary pin to one request, and keep the client on the primary
+    for INVENTORY_PRIMARY_PIN_SECONDS after each request that wrote, so it
+    reads its own writes while the replicas catch up. A request wrote when it
+    ran anything but a read on the primary; merely routing a query there,
+    as the admin does to render a change form, does not count.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        scope = _PinScope(pinned=PIN_COOKIE in request.COOKIES)
+        token = _pin_scope.set(scope)
+        try:
+            response = self.get_response(request)
+        finally:
+            _pin_scope.reset(token)
+        return self._pin_client(response, scope.wrote)
+
+    async def __acall__(self, request):
+        scope = _PinScope(pinned=PIN_COOKIE in request.COOKIES)
+        token = _pin_scope.set(scope)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _pin_scope.reset(token)
+        return self._pin_client(response, scope.wrote)
+
+    def _pin_client(self, response, wrote):
+        pin_seconds = getattr(settings, "INVENTORY_PRIMARY_PIN_SECONDS", 5)
+        if wrote and pin_seconds:
+            response.set_cookie(PIN_COOKIE, "1", max_age=pin_seconds, httponly=True)
+        return response
@@ -1,4 +1,9 @@
+import os
+
 import pytest
+from django.test.utils import setup_databases, teardown_databases
+
+import schema_snapshot
 
 
 def pytest_collection_modifyitems(items):
@@ -8,3 +13,45 @@ def pytest_collection_modifyitems(items):
 
         if "structure" in item.name:
             item.add_marker(pytest.mark.model_structure)
+
+
+@pytest.fixture(scope="session")
+def django_db_setup(
+    request,
+    django_test_environment,
+    django_db_blocker,
+    django_db_keepdb,
+    django_db_createdb,
+    django_db_modify_db_settings,
+):
+    """
+    Test databases restored from a cached schema snapshot (see
+    schema_snapshot), rebuilt by --create-db. --reuse-db and
+    INVENTORY_TEST_SCHEMA_SNAPSHOT=0 fall back to pytest-django's setup.
+    Migrations are disabled by MIGRATION_MODULES in core.test_settings.
+    """
+    verbosity = request.config.option.verbose
+    cache = getattr(request.config, "cache", None)
+    use_snapshot = (
+        cache is not None
+        and not django_db_keepdb
+        and os.getenv("INVENTORY_TEST_SCHEMA_SNAPSHOT", "1") != "0"
+    )
+
+    with django_db_blocker.unblock():
+        if use_snapshot:
+            db_cfg = schema_snapshot.setup_databases(
+                cache.mkdir("schema-snapshots"), verbosity, django_db_createdb
+            )
+        else:
+            db_cfg = setup_databases(
+                verbosity=verbosity,
+                interactive=False,
+                keepdb=django_db_keepdb and not django_db_createdb,
+            )
+
+    yield
+
+    if not django_db_keepdb:
+        with django_db_blocker.unblock():
+            teardown_databases(db_cfg, verbosity=verbosity)
@@ -0,0 +1,58 @@
+import pytest
+from django.contrib.auth.models import User
+from django.db import connections
+from django.test.utils import CaptureQueriesContext
+
+from inventory.models import Category, Product
+
+pytestmark = pytest.mark.django_db(databases=["django_db", "inventory_db"])
+
+
+@pytest.fixture
+def admin_client(client):
+    user = User.objects.create_superuser("admin", "admin@example.com", "password")
+    client.force_login(user)
+    return client
+
+
+def changelist_queries(client, url):
+    with CaptureQueriesContext(
+        connections["inventory_db"]
+    ) as inventory, CaptureQueriesContext(connections["django_db"]) as django:
+        response = client.get(url)
+    assert response.status_code == 200
+    return len(inventory.captured_queries) + len(django.captured_queries)
+
+
+def create_categories(count, start=0):
+    parent = Category.objects.create(name=f"parent-{start}", level=0)
+    for i in range(count):
+        Category.objects.create(name=f"child-{start + i}", parent=parent, level=1)
+
+
+def create_products(count, start=0):
+    for i in range(start, start + count):
+        category = Category.objects.create(name=f"category-{i}", level=0)
+        Product.objects.create(pid=str(i), name=f"product-{i}", category=category)
+
+
+def test_category_changelist_query_count_is_constant(admin_client):
+    url = "/admin/inventory/category/"
+    create_categories(3)
+    small = changelist_queries(admin_client, url)
+
+    create_categories(20, start=3)
+    large = changelist_queries(admin_client, url)
+
+    assert small == large
+
+
+def test_product_changelist_query_count_is_constant(admin_client):
+    url = "/admin/inventory/product/"
+    create_products(3)
+    small = changelist_queries(admin_client, url)
+
+    create_products(20, start=3)
+    large = changelist_queries(admin_client, url)
+
+    assert small == large
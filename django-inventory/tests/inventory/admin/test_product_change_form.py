@@ -0,0 +1,209 @@
+import io
+from decimal import Decimal
+
+import pytest
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connections
+from django.test.utils import CaptureQueriesContext
+from PIL import Image
+
+from inventory.models import Category, Product, ProductImage, ProductLine
+
+pytestmark = pytest.mark.django_db(databases=["django_db", "inventory_db"])
+
+LINES = "productline_set"
+
+
+@pytest.fixture
+def admin_client(client):
+    user = User.objects.create_superuser("admin", "admin@example.com", "password")
+    client.force_login(user)
+    return client
+
+
+def create_product(lines, images_per_line, pid="p1"):
+    category = Category.objects.create(name=f"category-{pid}", level=0)
+    product = Product.objects.create(
+        pid=pid,
+        name=f"product-{pid}",
+        description="tee",
+        is_active=True,
+        category=category,
+    )
+    for order in range(1, lines + 1):
+        line = ProductLine.objects.create(
+            product=product,
+            price="9.99",
+            order=order,
+            weight=1.0,
+            stock_qty=order,
+            is_active=True,
+        )
+        for image_order in range(1, images_per_line + 1):
+            ProductImage.objects.create(
+                product_line=line,
+                url=f"{pid}-{order}-{image_order}.jpg",
+                alternative_text=f"image {image_order}",
+                order=image_order,
+            )
+    return product
+
+
+def management(prefix, total, initial):
+    return {
+        f"{prefix}-TOTAL_FORMS": str(total),
+        f"{prefix}-INITIAL_FORMS": str(initial),
+        f"{prefix}-MIN_NUM_FORMS": "0",
+        f"{prefix}-MAX_NUM_FORMS": "1000",
+    }
+
+
+def change_data(product):
+    """The change form of ``product`` as the browser posts it, unedited."""
+    data = {
+        "pid": product.pid,
+        "name": product.name,
+        "slug": product.slug,
+        "description": product.description or "",
+        "stock_status": product.stock_status,
+        "category": str(product.category_id or ""),
+        "seasonal_event": "",
+    }
+    if product.is_active:
+        data["is_active"] = "on"
+    lines = list(product.productline_set.order_by("pk"))
+    data.update(management(LINES, len(lines), len(lines)))
+    for i, line in enumerate(lines):
+        prefix = f"{LINES}-{i}"
+        data.update(
+            {
+                f"{prefix}-id": str(line.pk),
+                f"{prefix}-product": str(product.pk),
+                f"{prefix}-price": str(line.price),
+                f"{prefix}-sku": str(line.sku),
+                # Fields with callable defaults post their initial value too.
+                f"initial-{prefix}-sku": str(line.sku),
+                f"{prefix}-stock_qty": str(line.stock_qty),
+                f"{prefix}-order": str(line.order),
+                f"{prefix}-weight": str(line.weight),
+            }
+        )
+        if line.is_active:
+            data[f"{prefix}-is_active"] = "on"
+        images = list(line.productimage_set.order_by("pk"))
+        images_prefix = f"{prefix}-productimage_set"
+        data.update(management(images_prefix, len(images), len(images)))
+        for j, image in enumerate(images):
+            data.update(
+                {
+                    f"{images_prefix}-{j}-id": str(image.pk),
+                    f"{images_prefix}-{j}-product_line": str(line.pk),
+                    f"{images_prefix}-{j}-alternative_text": image.alternative_text,
+                    f"{images_prefix}-{j}-order": str(image.order),
+                }
+            )
+    return data
+
+
+def count_queries(request):
+    with CaptureQueriesContext(
+        connections["inventory_db"]
+    ) as inventory, CaptureQueriesContext(connections["django_db"]) as django:
+        response = request()
+    queries = len(inventory.captured_queries) + len(django.captured_queries)
+    return response, queries
+
+
+def url(product):
+    return f"/admin/inventory/product/{product.pk}/change/"
+
+
+def test_change_form_loads_lines_and_images_in_constant_queries(admin_client):
+    small = create_product(lines=2, images_per_line=2, pid="small")
+    large = create_product(lines=12, images_per_line=5, pid="large")
+
+    admin_client.get(url(small))
+    response, small_queries = count_queries(lambda: admin_client.get(url(small)))
+    assert response.status_code == 200
+    response, large_queries = count_queries(lambda: admin_client.get(url(large)))
+    assert response.status_code == 200
+
+    assert small_queries == large_queries
+
+
+def test_unchanged_inlines_are_not_written(admin_client):
+    small = create_product(lines=2, images_per_line=2, pid="small")
+    large = create_product(lines=12, images_per_line=5, pid="large")
+    small_data, large_data = change_data(small), change_data(large)
+
+    admin_client.post(url(small), small_data)
+    response, small_queries = count_queries(
+        lambda: admin_client.post(url(small), small_data)
+    )
+    assert response.status_code == 302
+    response, large_queries = count_queries(
+        lambda: admin_client.post(url(large), large_data)
+    )
+    assert response.status_code == 302
+
+    assert small_queries == large_queries
+
+
+def test_changed_inlines_are_saved_in_bulk(admin_client, settings, tmp_path):
+    settings.MEDIA_ROOT = tmp_path
+    settings.INVENTORY_IMAGE_DERIVATIVES_ON_SAVE = False
+    upload = io.BytesIO()
+    Image.new("RGB", (8, 8), "red").save(upload, "PNG")
+    product = create_product(lines=3, images_per_line=2)
+    lines = list(product.productline_set.order_by("pk"))
+    dropped = lines[0].productimage_set.order_by("pk").first()
+    data = change_data(product)
+    for i in range(len(lines)):
+        data[f"{LINES}-{i}-price"] = "19.99"
+    data[f"{LINES}-0-productimage_set-0-DELETE"] = "on"
+    data[f"{LINES}-2-DELETE"] = "on"
+    # A new line with one image.
+    data[f"{LINES}-TOTAL_FORMS"] = "4"
+    data.update(
+        {
+            f"{LINES}-3-product": str(product.pk),
+            f"{LINES}-3-price": "5.00",
+            f"{LINES}-3-sku": "5f0f4c5e-3c8e-4a39-9b7b-1f0e5d8a9c10",
+            f"{LINES}-3-stock_qty": "2",
+            f"{LINES}-3-order": "4",
+            f"{LINES}-3-weight": "0.5",
+            f"{LINES}-3-is_active": "on",
+        }
+    )
+    data.update(management(f"{LINES}-3-productimage_set", 1, 0))
+    data[f"{LINES}-3-productimage_set-0-alternative_text"] = "new"
+    data[f"{LINES}-3-productimage_set-0-order"] = "1"
+    data[f"{LINES}-3-productimage_set-0-url"] = SimpleUploadedFile(
+        "new.png", upload.getvalue(), content_type="image/png"
+    )
+
+    response = admin_client.post(url(product), data)
+
+    assert response.status_code == 302
+    prices = dict(product.productline_set.values_list("order", "price"))
+    assert prices == {1: Decimal("19.99"), 2: Decimal("19.99"), 4: Decimal("5.00")}
+    assert not ProductImage.objects.filter(pk=dropped.pk).exists()
+    new_line = product.productline_set.get(order=4)
+    assert new_line.is_active
+    (image,) = new_line.productimage_set.all()
+    assert image.alternative_text == "new"
+    assert (tmp_path / image.url.name).exists()
+    assert product.listing.price == Decimal("5.00")
+
+
+def test_bulk_saved_lines_refresh_the_listing(admin_client):
+    product = create_product(lines=2, images_per_line=1)
+    data = change_data(product)
+    data[f"{LINES}-1-price"] = "3.50"
+
+    response = admin_client.post(url(product), data)
+
+    assert response.status_code == 302
+    product.listing.refresh_from_db()
+    assert product.listing.price == Decimal("3.50")
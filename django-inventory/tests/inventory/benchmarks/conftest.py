@@ -0,0 +1,133 @@
+"""
+Benchmark fixtures. Every benchmark in a module shares one synthetic catalog,
+generated inside a transaction that is rolled back after the module.
+
+INVENTORY_BENCH_SCALE multiplies the catalog size (1 by default, small
+enough for the regular suite) and INVENTORY_BENCH_REPORT names a JSON file
+the measurements are written to, for comparison between commits; they are
+also listed in pytest's terminal summary. Run with
+TEST_DB_ENGINE=postgresql to measure against Postgres.
+"""
+
+import json
+import os
+import statistics
+import subprocess
+import time
+import tracemalloc
+from pathlib import Path
+
+import pytest
+from django.db import connections, transaction
+from django.test.utils import CaptureQueriesContext
+
+from inventory.synthetic import CatalogGenerator
+
+SCALE = float(os.getenv("INVENTORY_BENCH_SCALE", "1"))
+SEED = 1234
+RESULTS = pytest.StashKey[dict]()
+
+
+def catalog_sizes(scale=SCALE):
+    return {
+        "categories": max(1, int(30 * scale)),
+        "category_depth": 3,
+        "product_types": max(1, int(10 * scale)),
+        "products": max(1, int(200 * scale)),
+        "lines_per_product": 3,
+        "attributes": 5,
+        "values_per_attribute": 10,
+        "attributes_per_line": 3,
+        "images_per_line": 2,
+    }
+
+
+def _commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+@pytest.fixture(scope="session")
+def bench_report(request):
+    results = request.config.stash.setdefault(RESULTS, {})
+    yield results
+
+    path = os.getenv("INVENTORY_BENCH_REPORT")
+    if path and results:
+        Path(path).write_text(
+            json.dumps(
+                {
+                    "commit": _commit(),
+                    "database": connections["inventory_db"].vendor,
+                    "scale": SCALE,
+                    "sizes": catalog_sizes(),
+                    "results": results,
+                },
+                indent=2,
+                sort_keys=True,
+            )
+        )
+
+
+def pytest_terminal_summary(terminalreporter, config):
+    results = config.stash.get(RESULTS, None)
+    if results:
+        terminalreporter.section("benchmarks")
+        for name, result in sorted(results.items()):
+            terminalreporter.write_line(f"{name}: {result}")
+
+
+@pytest.fixture(scope="module")
+def synthetic_catalog(django_db_setup, django_db_blocker):
+    with django_db_blocker.unblock(), transaction.atomic(using="inventory_db"):
+        try:
+            generator = CatalogGenerator(seed=SEED, using="inventory_db")
+            yield generator.generate(**catalog_sizes())
+        finally:
+            transaction.set_rollback(True, using="inventory_db")
+
+
+@pytest.fixture
+def measure(bench_report):
+    """
+    measure(name, operation) runs ``operation`` once to warm up, once counting
+    inventory_db and django_db queries, ``repeat`` times for wall time and
+    once under tracemalloc for peak memory, and records the result.
+    """
+
+    def run(name, operation, repeat=5):
+        operation()
+        with CaptureQueriesContext(
+            connections["inventory_db"]
+        ) as inventory, CaptureQueriesContext(connections["django_db"]) as django:
+            operation()
+        # Read now: the next request_started resets the query logs.
+        queries = len(inventory.captured_queries) + len(django.captured_queries)
+
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            operation()
+            timings.append(time.perf_counter() - started)
+
+        tracemalloc.start()
+        try:
+            operation()
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+        result = {
+            "queries": queries,
+            "seconds_min": min(timings),
+            "seconds_median": statistics.median(timings),
+            "peak_memory_bytes": peak,
+        }
+        bench_report[name] = result
+        return result
+
+    return run
@@ -0,0 +1,70 @@
+"""
+Query time and memory footprint of the autocomplete PrefixIndex, built from
+synthetic completions rather than the database: 100,000 of them times
+INVENTORY_BENCH_SCALE (so 10 measures a million), with the footprint also
+reported per million entries.
+"""
+
+import os
+import random
+import tracemalloc
+
+import pytest
+
+from inventory.autocomplete import KINDS, PrefixIndex
+
+pytestmark = [
+    pytest.mark.benchmark,
+    pytest.mark.django_db(databases=["inventory_db"]),
+]
+
+ENTRIES = max(1, int(100_000 * float(os.getenv("INVENTORY_BENCH_SCALE", "1"))))
+SEED = 1234
+WORDS = [
+    "linen", "cotton", "shirt", "dress", "boot", "sneaker", "canvas", "wool",
+    "jacket", "summer", "winter", "classic", "slim", "crimson", "navy", "oxford",
+]  # fmt: skip
+
+
+def synthetic_entries(count, seed=SEED):
+    rng = random.Random(seed)
+    for pk in range(count):
+        words = rng.choices(WORDS, k=rng.randint(1, 3))
+        yield KINDS[pk % len(KINDS)], pk, f"{' '.join(words)} {pk}".capitalize()
+
+
+@pytest.fixture(scope="module")
+def index():
+    return PrefixIndex(synthetic_entries(ENTRIES))
+
+
+def test_prefix_index_memory(bench_report):
+    tracemalloc.start()
+    try:
+        index = PrefixIndex(synthetic_entries(ENTRIES))
+        retained, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    result = {
+        "entries": len(index),
+        "retained_bytes": retained,
+        "bytes_per_million_entries": retained * 1_000_000 // len(index),
+        "index_bytes": index.memory_bytes(),
+    }
+    bench_report["autocomplete.memory"] = result
+    # Everything retained is the index itself: its strings and arrays.
+    assert result["index_bytes"] <= retained
+
+
+def test_prefix_queries(index, measure):
+    rng = random.Random(SEED)
+    prefixes = [rng.choice(WORDS)[: rng.randint(1, 5)] for _ in range(1000)]
+
+    def queries():
+        for prefix in prefixes:
+            index.complete(prefix, limit=10)
+
+    result = measure("autocomplete.1000_prefix_queries", queries)
+    assert result["queries"] == 0
+    assert len(index.complete("cot", limit=10)) == 10
@@ -0,0 +1,108 @@
+"""
+Query count, wall time and memory of the core catalog operations on a
+synthetic catalog (see conftest.py). Query counts are held to the budgets
+below, which do not depend on the catalog size; times and memory are only
+reported.
+"""
+
+import itertools
+
+import pytest
+from django.contrib.auth.models import User
+from django.core.cache import cache
+
+from inventory.cache import get_product_detail
+from inventory.catalog import iter_catalog
+from inventory.facets import facet_search
+from inventory.management.commands.import_catalog import CatalogImporter
+from inventory.models import Category, Product, ProductLine
+
+pytestmark = [
+    pytest.mark.benchmark,
+    pytest.mark.django_db(databases=["django_db", "inventory_db"]),
+]
+
+BUDGETS = {
+    "api.listing_page": 1,
+    "api.product_list_page": 1,
+    "product_detail.cold": 4,
+    "admin.product_changelist": 6,
+    "import.100_products": 32,
+    "stock.reserve_release_20_skus": 10,
+    "facets.cold_search": 1,
+}
+
+
+def check(result, name):
+    assert result["queries"] <= BUDGETS[name]
+
+
+def test_listing_pages(synthetic_catalog, client, measure):
+    category = Category.objects.filter(level=2).first()
+
+    for name, url in (
+        ("api.listing_page", f"/api/listing/?category={category.id}&limit=50"),
+        ("api.product_list_page", f"/api/products/?category={category.id}&limit=50"),
+    ):
+        check(measure(name, lambda: client.get(url)), name)
+
+
+def test_product_detail(synthetic_catalog, measure):
+    product_id = Product.objects.order_by("id").values_list("id", flat=True)[10]
+
+    def cold_detail():
+        cache.clear()
+        get_product_detail(product_id)
+
+    check(measure("product_detail.cold", cold_detail), "product_detail.cold")
+
+
+def test_admin_changelist(synthetic_catalog, client, measure):
+    user = User.objects.create_superuser("bench", "bench@example.com", "password")
+    client.force_login(user)
+
+    name = "admin.product_changelist"
+    check(measure(name, lambda: client.get("/admin/inventory/product/")), name)
+
+
+def test_bulk_import(synthetic_catalog, measure):
+    first_ids = Product.objects.order_by("id").values("id")[:100]
+    records = list(iter_catalog(Product.objects.filter(id__in=first_ids)))
+    runs = itertools.count()
+
+    def import_copy():
+        run = next(runs)
+        copies = []
+        for record in records:
+            copy = {**record, "pid": f"{record['pid']}-copy-{run}"}
+            copy["name"] = f"{record['name']} copy {run}"
+            copy["slug"] = None
+            copy["lines"] = [{**line, "sku": None} for line in record["lines"]]
+            copies.append(copy)
+        CatalogImporter("inventory_db", batch_size=100).run(copies)
+
+    check(measure("import.100_products", import_copy), "import.100_products")
+
+
+def test_stock_reserve_and_release(synthetic_catalog, measure):
+    quantities = {
+        sku: 1
+        for sku in ProductLine.objects.filter(stock_qty__gte=100)
+        .order_by("id")
+        .values_list("sku", flat=True)[:20]
+    }
+
+    def reserve_and_release():
+        ProductLine.objects.reserve(quantities)
+        ProductLine.objects.release(quantities)
+
+    name = "stock.reserve_release_20_skus"
+    check(measure(name, reserve_and_release), name)
+
+
+def test_facet_search(synthetic_catalog, measure):
+    def cold_search():
+        cache.clear()
+        facet_search({"synthetic-attribute-0": ["value-1", "value-2"]})
+
+    check(measure("facets.cold_search", cold_search), "facets.cold_search")
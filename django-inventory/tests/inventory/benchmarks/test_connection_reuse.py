@@ -0,0 +1,77 @@
+import time
+
+import pytest
+from django.core.signals import request_finished, request_started
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+from inventory.models import Product
+
+REQUESTS = 50
+
+
+def simulate_requests(max_age):
+    """Run REQUESTS request cycles of one catalog query against inventory_db."""
+    connection = connections["inventory_db"]
+    connection.close()
+    connection.settings_dict["CONN_MAX_AGE"] = max_age
+
+    connects = []
+
+    def count(sender, connection, **kwargs):
+        if connection.alias == "inventory_db":
+            connects.append(1)
+
+    connection_created.connect(count)
+    started = time.perf_counter()
+    try:
+        for _ in range(REQUESTS):
+            request_started.send(sender=None)
+            Product.objects.exists()
+            request_finished.send(sender=None)
+    finally:
+        connection_created.disconnect(count)
+    return (time.perf_counter() - started) / REQUESTS * 1000, len(connects)
+
+
+@pytest.mark.django_db(transaction=True, databases=["inventory_db"])
+def test_persistent_connections_skip_per_request_handshake(bench_report):
+    connection = connections["inventory_db"]
+    if connection.vendor != "postgresql":
+        pytest.skip("connection setup cost is only meaningful on PostgreSQL")
+    if "pool" in connection.settings_dict["OPTIONS"]:
+        pytest.skip("DB_POOL_MODE=pool manages connection reuse itself")
+
+    configured = connection.settings_dict["CONN_MAX_AGE"]
+    try:
+        per_request_ms, per_request_connects = simulate_requests(max_age=0)
+        persistent_ms, persistent_connects = simulate_requests(max_age=60)
+    finally:
+        connection.settings_dict["CONN_MAX_AGE"] = configured
+
+    bench_report["connections.reuse"] = {
+        "per_request_ms": per_request_ms,
+        "persistent_ms": persistent_ms,
+    }
+    assert per_request_connects == REQUESTS
+    assert persistent_connects == 1
+
+
+@pytest.mark.django_db(transaction=True, databases=["inventory_db"])
+def test_pooled_connections_skip_per_request_handshake(bench_report):
+    connection = connections["inventory_db"]
+    if "pool" not in connection.settings_dict["OPTIONS"]:
+        pytest.skip("run with DB_POOL_MODE=pool against PostgreSQL")
+
+    # Checkouts count as connections to Django; the pool's own statistics
+    # tell how many server connections it actually opened.
+    opened = connection.pool.get_stats().get("connections_num", 0)
+    pooled_ms, checkouts = simulate_requests(max_age=0)
+    opened = connection.pool.get_stats().get("connections_num", 0) - opened
+
+    bench_report["connections.pool"] = {
+        "per_request_ms": pooled_ms,
+        "opened": opened,
+    }
+    assert checkouts == REQUESTS
+    assert opened <= connection.settings_dict["OPTIONS"]["pool"]["max_size"]
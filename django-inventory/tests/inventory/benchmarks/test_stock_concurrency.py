@@ -0,0 +1,63 @@
+import threading
+import time
+
+import pytest
+from django.db import OperationalError, connections
+
+from inventory.models import InsufficientStock, Product, ProductLine
+
+THREADS = 8
+ATTEMPTS_PER_THREAD = 10
+STOCK = 50
+
+
+@pytest.mark.django_db(transaction=True, databases=["inventory_db"])
+def test_concurrent_reservations_never_oversell(bench_report):
+    product = Product.objects.create(pid="HOT", name="hot")
+    line = ProductLine.objects.create(
+        product=product, price="1.00", stock_qty=STOCK, order=1, weight=1.0
+    )
+    reserved, rejected, errors = [], [], []
+    start = threading.Barrier(THREADS)
+
+    def checkout():
+        start.wait()
+        try:
+            for _ in range(ATTEMPTS_PER_THREAD):
+                while True:
+                    try:
+                        ProductLine.objects.reserve({line.sku: 1})
+                    except InsufficientStock:
+                        rejected.append(1)
+                    except OperationalError:
+                        # SQLite serialises writers; Postgres never gets here.
+                        continue
+                    else:
+                        reserved.append(1)
+                    break
+        except Exception as exc:  # pragma: no cover - surfaced below
+            errors.append(exc)
+        finally:
+            connections.close_all()
+
+    threads = [threading.Thread(target=checkout) for _ in range(THREADS)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    line.refresh_from_db()
+    product.refresh_from_db()
+    bench_report["stock.concurrent_reservations"] = {
+        "threads": THREADS,
+        "attempts": THREADS * ATTEMPTS_PER_THREAD,
+        "seconds": elapsed,
+        "per_second": THREADS * ATTEMPTS_PER_THREAD / elapsed,
+    }
+    assert not errors
+    assert len(reserved) == STOCK
+    assert len(rejected) == THREADS * ATTEMPTS_PER_THREAD - STOCK
+    assert line.stock_qty == 0
+    assert product.stock_status == Product.OUT_OF_STOCK
@@ -0,0 +1,82 @@
+import io
+import json
+
+import pytest
+from django.core.management import call_command
+from django.db import connections
+from django.test.utils import CaptureQueriesContext
+
+from inventory.catalog import iter_catalog, read_csv, read_jsonl
+from inventory.models import (
+    Attribute,
+    AttributeValue,
+    Category,
+    Product,
+    ProductImage,
+    ProductLine,
+)
+
+pytestmark = pytest.mark.django_db(databases=["inventory_db"])
+
+
+@pytest.fixture
+def catalog():
+    category = Category.objects.create(name="Shirts", slug="shirts", level=0)
+    colour = Attribute.objects.create(name="colour")
+    red = AttributeValue.objects.create(attribute=colour, attribute_value="red")
+    for i in range(5):
+        product = Product.objects.create(pid=f"P{i}", name=f"p{i}", category=category)
+        for order in (2, 1):
+            line = ProductLine.objects.create(
+                product=product, price="5.00", order=order, weight=1.0
+            )
+            line.attribute_values.add(red)
+            ProductImage.objects.create(
+                product_line=line, url=f"{i}-{order}.jpg", alternative_text="x", order=1
+            )
+
+
+def test_iter_catalog_nests_related_rows(catalog):
+    records = list(iter_catalog())
+
+    assert [record["pid"] for record in records] == [f"P{i}" for i in range(5)]
+    first = records[0]
+    assert first["category"] == "shirts"
+    assert [line["order"] for line in first["lines"]] == [1, 2]
+    assert first["lines"][0]["attributes"] == {"colour": "red"}
+    assert first["lines"][0]["images"] == [
+        {"url": "0-1.jpg", "alternative_text": "x", "order": 1}
+    ]
+
+
+def test_iter_catalog_queries_per_chunk(catalog):
+    with CaptureQueriesContext(connections["inventory_db"]) as ctx:
+        records = list(iter_catalog(chunk_size=2))
+
+    assert len(records) == 5
+    # three chunks of four queries and the final empty keyset page
+    assert len(ctx.captured_queries) == 3 * 4 + 1
+
+
+@pytest.mark.parametrize(
+    "file_format, reader", [("jsonl", read_jsonl), ("csv", read_csv)]
+)
+def test_export_round_trips_through_reader(catalog, tmp_path, file_format, reader):
+    path = tmp_path / f"catalog.{file_format}"
+
+    call_command("export_catalog", str(path), stderr=io.StringIO())
+
+    with path.open(newline="") as stream:
+        records = list(reader(stream))
+    assert len(records) == 5
+    assert len(records[0]["lines"]) == 2
+    assert records[0]["lines"][0]["attributes"] == {"colour": "red"}
+
+
+def test_export_to_stdout():
+    Product.objects.create(pid="P1", name="p1")
+    out = io.StringIO()
+
+    call_command("export_catalog", stdout=out)
+
+    assert json.loads(out.getvalue())["pid"] == "P1"
@@ -0,0 +1,112 @@
+import io
+
+import pytest
+from django.core.management import CommandError, call_command
+from django.db.models import F
+
+from inventory.models import (
+    Category,
+    CategoryClosure,
+    Product,
+    ProductImage,
+    ProductLine,
+    ProductLine_AttributeValue,
+    ProductListing,
+)
+
+pytestmark = pytest.mark.django_db(databases=["inventory_db"])
+
+OPTIONS = {
+    "products": 120,
+    "lines_per_product": 2,
+    "images_per_line": 2,
+    "categories": 40,
+    "category_depth": 3,
+    "attributes": 4,
+    "values_per_attribute": 5,
+    "attributes_per_line": 2,
+    "batch_size": 50,
+}
+
+
+def generate(**options):
+    out = io.StringIO()
+    call_command("generate_catalog", stdout=out, stderr=io.StringIO(), **options)
+    return dict(line.split(": ") for line in out.getvalue().splitlines())
+
+
+def test_generates_every_table():
+    counts = generate(**OPTIONS)
+
+    assert counts["products"] == "120"
+    assert ProductLine.objects.count() == 240
+    assert ProductImage.objects.count() == 480
+    assert ProductLine_AttributeValue.objects.count() == 480
+    assert (
+        ProductListing.objects.count() == Product.objects.filter(is_active=True).count()
+    )
+    assert CategoryClosure.objects.filter(depth=0).count() == 40
+
+
+def test_category_levels_follow_the_tree():
+    generate(**OPTIONS)
+
+    assert set(Category.objects.values_list("level", flat=True)) == {0, 1, 2}
+    assert not Category.objects.filter(level=0, parent__isnull=False).exists()
+    assert (
+        not Category.objects.exclude(level=0)
+        .exclude(parent__level=F("level") - 1)
+        .exists()
+    )
+
+
+def test_same_seed_same_catalog():
+    generate(prefix="first", seed=7, **OPTIONS)
+    generate(prefix="second", seed=7, **OPTIONS)
+
+    def lines(prefix):
+        return list(
+            ProductLine.objects.filter(product__pid__startswith=f"{prefix}-")
+            .order_by("id")
+            .values_list("price", "stock_qty", "is_active", "weight")
+        )
+
+    assert lines("first") == lines("second")
+
+
+def test_batch_size_does_not_change_the_catalog():
+    generate(prefix="first", seed=7, **OPTIONS)
+    generate(prefix="second", seed=7, **{**OPTIONS, "batch_size": 7})
+
+    def catalog(prefix):
+        return list(
+            ProductLine.objects.filter(product__pid__startswith=f"{prefix}-")
+            .order_by("id", "attribute_values__attribute_value")
+            .values_list(
+                "product__is_active",
+                "price",
+                "stock_qty",
+                "attribute_values__attribute_value",
+            )
+        )
+
+    assert catalog("first") == catalog("second")
+
+
+def test_leaves_rows_it_did_not_generate_alone():
+    category = Category.objects.create(name="kept", slug="kept", level=0)
+    CategoryClosure.objects.filter(descendant=category).delete()
+    product = Product.objects.create(pid="kept", name="kept", is_active=True)
+    ProductListing.objects.filter(product=product).delete()
+
+    generate(**OPTIONS)
+
+    assert not CategoryClosure.objects.filter(descendant=category).exists()
+    assert not ProductListing.objects.filter(product=product).exists()
+
+
+def test_refuses_to_reuse_a_prefix():
+    generate(**OPTIONS)
+
+    with pytest.raises(CommandError):
+        generate(**OPTIONS)
@@ -0,0 +1,40 @@
+import io
+
+import pytest
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from PIL import Image
+
+from inventory.models import Product, ProductImage, ProductImageDerivative, ProductLine
+
+pytestmark = pytest.mark.django_db(databases=["inventory_db"])
+
+
+@pytest.fixture
+def images(settings, tmp_path):
+    settings.MEDIA_ROOT = tmp_path
+    settings.INVENTORY_IMAGE_DERIVATIVES_ON_SAVE = False
+    product = Product.objects.create(pid="p1", name="tee")
+    line = ProductLine.objects.create(product=product, price="1.00", order=1, weight=1)
+    for order in range(1, 6):
+        buffer = io.BytesIO()
+        Image.new("RGB", (64, 48), "blue").save(buffer, "JPEG")
+        image = ProductImage(product_line=line, alternative_text="", order=order)
+        image.url.save(f"tee-{order}.jpg", ContentFile(buffer.getvalue()))
+
+
+def test_backfill_in_parallel_then_incrementally(images):
+    out = io.StringIO()
+    call_command("generate_image_derivatives", workers=2, batch_size=2, stdout=out)
+
+    assert "images: 5" in out.getvalue()
+    assert ProductImageDerivative.objects.count() == 15
+
+    out = io.StringIO()
+    call_command("generate_image_derivatives", workers=2, stdout=out)
+    assert out.getvalue() == ""
+
+    out = io.StringIO()
+    call_command("generate_image_derivatives", workers=1, force=True, stdout=out)
+    assert "derivatives: 15" in out.getvalue()
+    assert ProductImageDerivative.objects.count() == 15
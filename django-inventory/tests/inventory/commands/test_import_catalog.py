@@ -0,0 +1,174 @@
+import json
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.db import connections
+from django.test.utils import CaptureQueriesContext
+
+from inventory.models import (
+    AttributeValue,
+    Category,
+    Product,
+    ProductImage,
+    ProductLine,
+    ProductSearch,
+)
+
+pytestmark = pytest.mark.django_db(databases=["inventory_db"])
+
+
+def product_record(i, lines=2):
+    return {
+        "pid": f"P{i}",
+        "name": f"Product {i}",
+        "category": "shirts",
+        "is_active": True,
+        "lines": [
+            {
+                "price": "9.99",
+                "stock_qty": 5,
+                "order": order,
+                "weight": 0.5,
+                "attributes": {"Colour": "red", "size": str(order)},
+                "images": [{"url": f"p{i}-{order}.jpg", "alternative_text": "front"}],
+            }
+            for order in range(1, lines + 1)
+        ],
+    }
+
+
+def write_jsonl(path, records):
+    path.write_text("\n".join(json.dumps(record) for record in records))
+    return path
+
+
+def import_queries(path, **options):
+    with CaptureQueriesContext(connections["inventory_db"]) as ctx:
+        call_command("import_catalog", str(path), stdout=StringIO(), **options)
+    return len(ctx.captured_queries)
+
+
+def test_import_jsonl_resolves_relations(tmp_path):
+    shirts = Category.objects.create(name="Shirts", slug="shirts", level=0)
+    path = write_jsonl(tmp_path / "catalog.jsonl", [product_record(1)])
+
+    call_command("import_catalog", str(path), stdout=StringIO())
+
+    product = Product.objects.get(pid="P1")
+    assert product.slug == "product-1"
+    assert product.category == shirts
+    assert ProductLine.objects.filter(product=product).count() == 2
+    assert ProductImage.objects.filter(product_line__product=product).count() == 2
+    line = ProductLine.objects.get(product=product, order=1)
+    assert {str(value) for value in line.attribute_values.all()} == {
+        "colour: red",
+        "size: 1",
+    }
+    assert ProductSearch.objects.get(product=product).attributes == "1 2 red"
+
+
+def test_import_csv_groups_rows_by_pid(tmp_path):
+    path = tmp_path / "catalog.csv"
+    path.write_text(
+        "pid,name,category,is_active,line_price,line_order,line_weight,attributes,images\n"
+        "P1,Shirt,,true,10.00,1,0.3,colour=red;size=m,a.jpg|front;b.jpg|back\n"
+        "P1,Shirt,,true,10.00,2,0.3,colour=blue;size=m,\n"
+        "P2,Shoe,,false,20.00,1,1.2,,\n"
+    )
+
+    call_command("import_catalog", str(path), stdout=StringIO())
+
+    assert Product.objects.count() == 2
+    assert Product.objects.get(pid="P1").is_active is True
+    assert ProductLine.objects.filter(product__pid="P1").count() == 2
+    assert ProductImage.objects.count() == 2
+    assert AttributeValue.objects.count() == 3
+
+
+def test_import_skips_existing_products_and_lines(tmp_path):
+    path = write_jsonl(tmp_path / "catalog.jsonl", [product_record(1)])
+    record = product_record(1)
+    for order, line in enumerate(record["lines"]):
+        line["sku"] = f"00000000-0000-0000-0000-00000000000{order}"
+    write_jsonl(path, [record])
+
+    call_command("import_catalog", str(path), stdout=StringIO())
+    call_command("import_catalog", str(path), stdout=StringIO())
+
+    assert Product.objects.count() == 1
+    assert ProductLine.objects.count() == 2
+
+
+def test_import_query_count_independent_of_record_count(tmp_path):
+    Category.objects.create(name="Shirts", slug="shirts", level=0)
+    # The first import also creates the attributes and their values.
+    import_queries(write_jsonl(tmp_path / "warm.jsonl", [product_record(100)]))
+    small = import_queries(
+        write_jsonl(tmp_path / "small.jsonl", [product_record(i) for i in range(2)]),
+        batch_size=100,
+    )
+    large = import_queries(
+        write_jsonl(
+            tmp_path / "large.jsonl", [product_record(i) for i in range(2, 50)]
+        ),
+        batch_size=100,
+    )
+
+    assert large == small
+
+
+def test_import_suffixes_taken_slugs(tmp_path):
+    Product.objects.create(pid="OLD", name="Old shirt", slug="shirt")
+    records = [
+        {"pid": "P1", "name": "Shirt"},
+        {"pid": "P2", "name": "shirt!"},
+        {"pid": "P3", "name": "Other", "slug": "shirt"},
+    ]
+    path = write_jsonl(tmp_path / "catalog.jsonl", records)
+
+    call_command("import_catalog", str(path), stdout=StringIO())
+
+    assert dict(
+        Product.objects.filter(pid__startswith="P").values_list("pid", "slug")
+    ) == {"P1": "shirt-2", "P2": "shirt-3", "P3": "shirt-4"}
+
+
+def test_import_keeps_the_first_record_of_a_repeated_pid_or_sku(tmp_path):
+    sku = "00000000-0000-0000-0000-000000000001"
+    first = product_record(1, lines=1)
+    first["lines"][0]["sku"] = sku
+    repeat = dict(product_record(1, lines=1), name="Renamed")
+    other = product_record(2, lines=1)
+    other["lines"][0]["sku"] = sku
+    path = write_jsonl(tmp_path / "catalog.jsonl", [first, repeat, other])
+
+    call_command("import_catalog", str(path), stdout=StringIO())
+
+    assert list(Product.objects.values_list("pid", "name")) == [
+        ("P1", "Product 1"),
+        ("P2", "Product 2"),
+    ]
+    assert list(ProductLine.objects.values_list("product__pid", flat=True)) == ["P1"]
+
+
+def test_import_skips_new_products_with_a_taken_name(tmp_path):
+    Product.objects.create(pid="OLD", name="Product 1")
+    path = write_jsonl(
+        tmp_path / "catalog.jsonl",
+        [
+            product_record(1, lines=1),
+            product_record(2, lines=1),
+            dict(product_record(3, lines=1), name="Product 2"),
+        ],
+    )
+    out = StringIO()
+
+    call_command("import_catalog", str(path), stdout=out)
+
+    assert list(Product.objects.order_by("pid").values_list("pid", "name")) == [
+        ("OLD", "Product 1"),
+        ("P2", "Product 2"),
+    ]
+    assert list(ProductLine.objects.values_list("product__pid", flat=True)) == ["P2"]
+    assert "duplicate names: 2" in out.getvalue().splitlines()
@@ -0,0 +1,53 @@
+import csv
+import io
+
+import pytest
+from django.core.management import call_command
+
+from inventory.models import Category, Product, ProductLine
+
+pytestmark = pytest.mark.django_db(databases=["inventory_db"])
+
+
+@pytest.fixture
+def products():
+    shoes = Category.objects.create(name="Shoes", slug="shoes", level=0)
+    for pid, stock_qty in (("p1", 0), ("p2", 2), ("p3", 9)):
+        product = Product.objects.create(
+            pid=pid, name=f"boot {pid}", category=shoes, is_active=True
+        )
+        ProductLine.objects.create(
+            product=product,
+            price="1.00",
+            order=1,
+            weight=1,
+            stock_qty=stock_qty,
+            is_active=True,
+        )
+
+
+def test_refresh_stock_status(products):
+    Product.objects.update(stock_status=Product.OUT_OF_STOCK)
+    out = io.StringIO()
+
+    call_command("refresh_stock_status", full=True, batch_size=1, stdout=out)
+
+    assert out.getvalue().strip() == "products updated: 2"
+    assert Product.objects.filter(stock_status=Product.IN_STOCK).count() == 2
+
+    out = io.StringIO()
+    call_command("refresh_stock_status", stdout=out)
+    assert out.getvalue().strip() == "products updated: 0"
+
+
+def test_low_stock_report(products):
+    out = io.StringIO()
+
+    call_command("low_stock_report", threshold=2, stdout=out)
+
+    rows = list(csv.DictReader(io.StringIO(out.getvalue())))
+    assert [(row["pid"], row["stock_qty"], row["category"]) for row in rows] == [
+        ("p1", "0", "Shoes"),
+        ("p2", "2", "Shoes"),
+    ]
+    assert rows[0]["threshold"] == "2"
@@ -0,0 +1,151 @@
+import pytest
+from django.core.cache import cache
+from django.db import connections
+from django.forms import ValidationError
+from django.test.utils import CaptureQueriesContext
+
+from inventory.cache import get_category_tree, get_product_detail
+from inventory.models import Category, CategoryClosure, Product
+from inventory.signals import bulk_upserted
+
+pytestmark = pytest.mark.django_db(databases=["inventory_db"])
+
+
+def test_product_upsert_is_a_constant_number_of_statements(monkeypatch):
+    products = [Product(pid=str(i), name=f"Shirt {i}") for i in range(250)]
+    # Only the upsert's own statements count, not those of the read models
+    # refreshed from bulk_upserted.
+    batches = []
+    monkeypatch.setattr(bulk_upserted, "receivers", [])
+    bulk_upserted.connect(
+        lambda sender, pks, **kwargs: batches.append(len(pks)), weak=False
+    )
+
+    with CaptureQueriesContext(connections["inventory_db"]) as ctx:
+        Product.objects.upsert(products, batch_size=50)
+
+    statements = [q["sql"].split()[0] for q in ctx.captured_queries]
+    # Per batch: the slug lookup and the upsert.
+    assert statements.count("INSERT") == 5
+    assert statements.count("SELECT") == 5
+    assert not {"UPDATE", "DELETE"} & set(statements)
+    assert batches == [50] * 5
+    assert Product.objects.count() == 250
+    assert Product.objects.get(pid="7").slug == "shirt-7"
+
+
+def test_product_slug_collisions_get_deterministic_suffixes():
+    Product.objects.create(pid="old", name="Tee", slug="tee")
+    Product.objects.create(pid="older", name="Tee 2", slug="tee-2")
+
+    Product.objects.upsert(
+        [
+            Product(pid="a", name="TEE!"),
+            Product(pid="b", name="Tee?"),
+            Product(pid="c", name="Cap", slug="tee-4"),
+        ]
+    )
+
+    slugs = dict(Product.objects.values_list("pid", "slug"))
+    assert (slugs["a"], slugs["b"], slugs["c"]) == ("tee-3", "tee-5", "tee-4")
+
+
+def test_product_upsert_updates_existing_rows_and_keeps_their_slug():
+    product = Product.objects.create(pid="p1", name="Old name", is_active=False)
+
+    Product.objects.upsert([Product(pid="p1", name="New name", is_active=True)])
+
+    product.refresh_from_db()
+    assert (product.name, product.slug, product.is_active) == (
+        "New name",
+        "old-name",
+        True,
+    )
+    assert Product.objects.count() == 1
+
+
+def test_product_upsert_invalidates_cached_details(django_capture_on_commit_callbacks):
+    cache.clear()
+    product = Product.objects.create(pid="p1", name="before")
+    assert get_product_detail(product.id)["name"] == "before"
+
+    with django_capture_on_commit_callbacks(execute=True, using="inventory_db"):
+        Product.objects.upsert([Product(pid="p1", name="after")])
+
+    assert get_product_detail(product.id)["name"] == "after"
+
+
+def test_category_upsert_maintains_the_closure(django_capture_on_commit_callbacks):
+    cache.clear()
+    root = Category.objects.create(name="clothes", slug="clothes", is_active=True)
+    get_category_tree()
+
+    with django_capture_on_commit_callbacks(execute=True, using="inventory_db"):
+        Category.objects.upsert(
+            [
+                Category(name="clothes", slug="clothes", is_active=True),
+                Category(name="Shirts", parent=root, is_active=True),
+                Category(name="Shirts", parent=root, is_active=True),
+            ]
+        )
+
+    assert Category.objects.count() == 3
+    assert sorted(Category.objects.values_list("slug", flat=True)) == [
+        "clothes",
+        "shirts",
+        "shirts-2",
+    ]
+    assert CategoryClosure.objects.filter(ancestor=root, depth=1).count() == 2
+    assert len(get_category_tree()[0]["children"]) == 2
+
+
+def test_category_upsert_only_links_new_and_moved_categories():
+    root = Category.objects.create(name="clothes", slug="clothes")
+    shoes = Category.objects.create(name="shoes", slug="shoes")
+    boots = Category.objects.create(name="boots", slug="boots", parent=shoes)
+    untouched = set(CategoryClosure.objects.values_list("pk", flat=True))
+
+    with CaptureQueriesContext(connections["inventory_db"]) as ctx:
+        Category.objects.upsert(
+            [
+                Category(name="shoes", slug="shoes", parent=root),
+                Category(name="sandals", slug="sandals", parent=shoes),
+                Category(name="flip flops", slug="flip-flops"),
+            ]
+        )
+
+    assert not any(
+        q["sql"].startswith('DELETE FROM "inventory_category_closure"')
+        and "WHERE" not in q["sql"]
+        for q in ctx.captured_queries
+    )
+    sandals = Category.objects.get(slug="sandals")
+    flip_flops = Category.objects.get(slug="flip-flops")
+    assert list(Category.objects.ancestors(boots).values_list("slug", flat=True)) == [
+        "clothes",
+        "shoes",
+    ]
+    assert list(
+        Category.objects.ancestors(sandals, include_self=True).values_list(
+            "slug", flat=True
+        )
+    ) == ["clothes", "shoes", "sandals"]
+    assert CategoryClosure.objects.filter(descendant=flip_flops).count() == 1
+    assert untouched & set(CategoryClosure.objects.values_list("pk", flat=True))
+
+
+def test_category_upsert_rejects_cycles_and_rolls_back_the_batch():
+    root = Category.objects.create(name="clothes", slug="clothes")
+    shirts = Category.objects.create(name="shirts", slug="shirts", parent=root)
+
+    with pytest.raises(ValidationError):
+        Category.objects.upsert(
+            [
+                Category(name="hats", slug="hats", parent=root),
+                Category(name="clothes", slug="clothes", parent=shirts),
+            ]
+        )
+
+    assert not Category.objects.filter(slug="hats").exists()
+    assert Category.objects.get(slug="clothes").parent_id is None
+    assert Category.objects.descendants(root).get() == shirts
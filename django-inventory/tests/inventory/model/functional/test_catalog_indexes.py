@@ -0,0 +1,84 @@
+import pytest
+from django.db import connections
+
+from inventory.models import Category, Product, ProductImage, ProductLine
+
+pytestmark = pytest.mark.django_db(databases=["inventory_db"])
+
+
+@pytest.fixture
+def seeded():
+    Category.objects.bulk_create(
+        Category(name=f"c{i}", slug=f"c{i}", level=0, is_active=i % 4 == 0)
+        for i in range(40)
+    )
+    categories = list(Category.objects.values_list("id", flat=True))
+    Product.objects.bulk_create(
+        Product(
+            pid=str(i),
+            name=f"p{i}",
+            slug=f"p{i}",
+            category_id=categories[i % len(categories)],
+            is_active=i % 2 == 0,
+            stock_status=Product.IN_STOCK if i % 3 else Product.OUT_OF_STOCK,
+        )
+        for i in range(300)
+    )
+    products = list(Product.objects.values_list("id", flat=True))
+    ProductLine.objects.bulk_create(
+        ProductLine(
+            product_id=product_id,
+            price="1.00",
+            order=order,
+            weight=1.0,
+            is_active=order != 0,
+        )
+        for product_id in products
+        for order in range(4)
+    )
+    ProductImage.objects.bulk_create(
+        ProductImage(product_line_id=line_id, url=f"{line_id}.jpg", order=order)
+        for line_id in ProductLine.objects.values_list("id", flat=True)
+        for order in range(2)
+    )
+    with connections["inventory_db"].cursor() as cursor:
+        cursor.execute("ANALYZE")
+    return products
+
+
+def test_active_lines_of_product_use_partial_index(seeded):
+    plan = (
+        ProductLine.objects.filter(product_id=seeded[0], is_active=True)
+        .order_by("order")
+        .explain()
+    )
+
+    assert "product_line_active_order_idx" in plan
+
+
+def test_active_products_per_category_use_partial_index(seeded):
+    category = Category.objects.first()
+    plan = Product.objects.filter(category=category, is_active=True).explain()
+
+    assert "product_active_category_idx" in plan
+
+
+def test_stock_status_filter_uses_index(seeded):
+    plan = Product.objects.filter(
+        stock_status=Product.OUT_OF_STOCK, is_active=True
+    ).explain()
+
+    assert "product_stock_status_idx" in plan
+
+
+def test_images_of_line_use_order_index(seeded):
+    line = ProductLine.objects.first()
+    plan = ProductImage.objects.filter(product_line=line).order_by("order").explain()
+
+    assert "product_image_order_idx" in plan
+
+
+def test_active_children_use_partial_index(seeded):
+    plan = Category.objects.filter(parent=None, is_active=True).explain()
+
+    assert "category_active_children_idx" in plan
@@ -0,0 +1,92 @@
+import pytest
+from django.db import connections
+from django.forms import ValidationError
+from django.test.utils import CaptureQueriesContext
+
+from inventory.models import Category, CategoryClosure, Product
+
+pytestmark = pytest.mark.django_db(databases=["inventory_db"])
+
+
+@pytest.fixture
+def tree():
+    root = Category.objects.create(name="Root", level=0)
+    clothing = Category.objects.create(name="Clothing", parent=root, level=1)
+    shirts = Category.objects.create(name="Shirts", parent=clothing, level=2)
+    shoes = Category.objects.create(name="Shoes", parent=root, level=1)
+    return root, clothing, shirts, shoes
+
+
+def test_model_tree_descendants(tree):
+    root, clothing, shirts, shoes = tree
+
+    assert set(Category.objects.descendants(root)) == {clothing, shirts, shoes}
+    assert set(Category.objects.descendants(clothing, include_self=True)) == {
+        clothing,
+        shirts,
+    }
+    assert not Category.objects.descendants(shirts).exists()
+
+
+def test_model_tree_ancestors_ordered_from_root(tree):
+    root, clothing, shirts, _ = tree
+
+    assert list(Category.objects.ancestors(shirts)) == [root, clothing]
+    assert list(Category.objects.ancestors(shirts, include_self=True)) == [
+        root,
+        clothing,
+        shirts,
+    ]
+
+
+def test_model_tree_products_in_subtree_single_query(tree):
+    root, clothing, shirts, shoes = tree
+    tee = Product.objects.create(pid="1", name="Tee", category=shirts)
+    Product.objects.create(pid="2", name="Boot", category=shoes)
+
+    with CaptureQueriesContext(connections["inventory_db"]) as ctx:
+        products = list(Category.objects.products_in_subtree(clothing))
+
+    assert products == [tee]
+    assert len(ctx.captured_queries) == 1
+
+
+def test_model_tree_reparent_moves_subtree(tree):
+    root, clothing, shirts, shoes = tree
+
+    clothing.parent = shoes
+    clothing.save()
+
+    assert list(Category.objects.ancestors(shirts)) == [root, shoes, clothing]
+    assert set(Category.objects.descendants(shoes)) == {clothing, shirts}
+
+
+def test_model_tree_reparent_below_descendant_rejected(tree):
+    _, clothing, shirts, _ = tree
+
+    clothing.parent = shirts
+    with pytest.raises(ValidationError):
+        clothing.save()
+
+
+def test_model_tree_delete_leaf_removes_links(tree):
+    _, _, shirts, _ = tree
+
+    shirts.delete()
+
+    assert not CategoryClosure.objects.filter(descendant_id=shirts.id).exists()
+
+
+def test_model_tree_rebuild_matches_incremental(tree):
+    expected = set(
+        CategoryClosure.objects.values_list("ancestor_id", "descendant_id", "depth")
+    )
+
+    CategoryClosure.objects.rebuild()
+
+    assert (
+        set(
+            CategoryClosure.objects.values_list("ancestor_id", "descendant_id", "depth")
+        )
+        == expected
+    )
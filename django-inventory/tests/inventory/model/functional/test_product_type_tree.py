@@ -0,0 +1,104 @@
+import pytest
+from django.db import connections
+from django.forms import ValidationError
+from django.test.utils import CaptureQueriesContext
+
+from inventory.models import (
+    Product,
+    Product_ProductType,
+    ProductType,
+    ProductTypeClosure,
+)
+
+pytestmark = pytest.mark.django_db(databases=["inventory_db"])
+
+
+@pytest.fixture
+def tree():
+    apparel = ProductType.objects.create(name="Apparel")
+    tops = ProductType.objects.create(name="Tops", parent=apparel)
+    tees = ProductType.objects.create(name="Tees", parent=tops)
+    footwear = ProductType.objects.create(name="Footwear", parent=apparel)
+    return apparel, tops, tees, footwear
+
+
+def levels():
+    return dict(ProductType.objects.values_list("name", "level"))
+
+
+def test_model_type_tree_level_derived_from_parent(tree):
+    apparel, *_ = tree
+    orphan = ProductType.objects.create(name="Orphan", level=7)
+    orphan.parent = apparel
+    orphan.level = 9
+    orphan.save()
+
+    assert levels() == {
+        "Apparel": 0,
+        "Tops": 1,
+        "Tees": 2,
+        "Footwear": 1,
+        "Orphan": 1,
+    }
+
+
+def test_model_type_tree_descendants_and_ancestors(tree):
+    apparel, tops, tees, footwear = tree
+
+    assert set(ProductType.objects.descendants(apparel)) == {tops, tees, footwear}
+    assert not ProductType.objects.descendants(tees).exists()
+    assert list(ProductType.objects.ancestors(tees, include_self=True)) == [
+        apparel,
+        tops,
+        tees,
+    ]
+
+
+def test_model_type_tree_products_in_subtree_single_query(tree):
+    apparel, tops, tees, footwear = tree
+    tee = Product.objects.create(pid="1", name="Tee")
+    boot = Product.objects.create(pid="2", name="Boot")
+    Product_ProductType.objects.create(product=tee, product_type=tops)
+    Product_ProductType.objects.create(product=tee, product_type=tees)
+    Product_ProductType.objects.create(product=boot, product_type=footwear)
+
+    with CaptureQueriesContext(connections["inventory_db"]) as ctx:
+        products = list(ProductType.objects.products_in_subtree(tops))
+
+    assert products == [tee]
+    assert len(ctx.captured_queries) == 1
+    assert set(ProductType.objects.products_in_subtree(apparel)) == {tee, boot}
+
+
+def test_model_type_tree_reparent_moves_subtree_and_levels(tree):
+    apparel, tops, tees, footwear = tree
+
+    tops.parent = footwear
+    tops.save()
+
+    assert list(ProductType.objects.ancestors(tees)) == [apparel, footwear, tops]
+    assert levels() == {"Apparel": 0, "Tops": 2, "Tees": 3, "Footwear": 1}
+
+    tops.parent = None
+    tops.save()
+
+    assert levels() == {"Apparel": 0, "Tops": 0, "Tees": 1, "Footwear": 1}
+
+
+def test_model_type_tree_reparent_below_descendant_rejected(tree):
+    _, tops, tees, _ = tree
+
+    tops.parent = tees
+    with pytest.raises(ValidationError):
+        tops.save()
+
+
+def test_model_type_tree_rebuild_matches_incremental(tree):
+    rows = ProductTypeClosure.objects.values_list(
+        "ancestor_id", "descendant_id", "depth"
+    )
+    expected = set(rows)
+
+    ProductTypeClosure.objects.rebuild()
+
+    assert set(rows) == expected
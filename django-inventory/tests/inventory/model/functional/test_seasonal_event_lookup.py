@@ -0,0 +1,107 @@
+from datetime import timedelta
+
+import pytest
+from django.db import connections
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from inventory import events
+from inventory.events import EventSchedule, current_events
+from inventory.models import Product, SeasonalEvent
+
+pytestmark = pytest.mark.django_db(databases=["inventory_db"])
+
+DAY = timedelta(days=1)
+
+
+@pytest.fixture
+def now():
+    return timezone.now().replace(microsecond=0)
+
+
+@pytest.fixture
+def season(now):
+    make = SeasonalEvent.objects.create
+    return {
+        "past": make(name="past", start_date=now - 10 * DAY, end_date=now - 5 * DAY),
+        "sale": make(name="sale", start_date=now - DAY, end_date=now + DAY),
+        "week": make(name="week", start_date=now - 2 * DAY, end_date=now + 5 * DAY),
+        "next": make(name="next", start_date=now + 3 * DAY, end_date=now + 4 * DAY),
+    }
+
+
+@pytest.fixture(autouse=True)
+def fresh_snapshot():
+    events._snapshot = None
+    yield
+    events._snapshot = None
+
+
+def names(queryset):
+    return sorted(event.name for event in queryset)
+
+
+def test_active_at_is_half_open(season, now):
+    sale = season["sale"]
+
+    assert names(SeasonalEvent.objects.active_at(now)) == ["sale", "week"]
+    assert "sale" in names(SeasonalEvent.objects.active_at(sale.start_date))
+    assert "sale" not in names(SeasonalEvent.objects.active_at(sale.end_date))
+
+
+def test_overlapping_windows(season, now):
+    assert names(SeasonalEvent.objects.overlapping(now + 2 * DAY, now + 6 * DAY)) == [
+        "next",
+        "week",
+    ]
+    assert names(SeasonalEvent.objects.overlapping(now - 5 * DAY, now - 3 * DAY)) == []
+
+
+def test_products_in_season(season, now):
+    Product.objects.create(pid="1", name="on sale", seasonal_event=season["sale"])
+    Product.objects.create(pid="2", name="later", seasonal_event=season["next"])
+    Product.objects.create(pid="3", name="no event")
+
+    assert [p.name for p in Product.objects.in_season(now)] == ["on sale"]
+    assert sorted(p.name for p in Product.objects.in_season(now, now + 10 * DAY)) == [
+        "later",
+        "on sale",
+    ]
+
+
+def test_schedule_matches_the_database(season, now):
+    schedule = EventSchedule(
+        SeasonalEvent.objects.values(*events.EVENT_FIELDS).order_by("?")
+    )
+
+    for hours in range(-12 * 24, 7 * 24, 7):
+        moment = now + timedelta(hours=hours)
+        assert sorted(e["name"] for e in schedule.active_at(moment)) == names(
+            SeasonalEvent.objects.active_at(moment)
+        )
+    window = (now + 2 * DAY, now + 6 * DAY)
+    assert [e["name"] for e in schedule.overlapping(*window)] == ["week", "next"]
+    assert schedule.next_boundary(now) == now + DAY
+
+
+def test_current_events_turn_over_without_queries(season, now, monkeypatch):
+    current_events()
+
+    later = now + 3 * DAY + timedelta(hours=1)
+    monkeypatch.setattr(events.timezone, "now", lambda: later)
+    with CaptureQueriesContext(connections["inventory_db"]) as ctx:
+        active = current_events()
+
+    assert [event["name"] for event in active] == ["week", "next"]
+    assert ctx.captured_queries == []
+
+
+def test_current_events_reload_after_a_change(
+    season, now, django_capture_on_commit_callbacks
+):
+    assert [event["name"] for event in current_events()] == ["week", "sale"]
+
+    with django_capture_on_commit_callbacks(execute=True, using="inventory_db"):
+        SeasonalEvent.objects.filter(name="sale").delete()
+
+    assert [event["name"] for event in current_events()] == ["week"]
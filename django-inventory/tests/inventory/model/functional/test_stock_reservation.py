@@ -0,0 +1,133 @@
+import pytest
+from django.db import connections
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+
+from inventory.models import (
+    InsufficientStock,
+    Product,
+    ProductLine,
+    ProductQuerySet,
+    StockControl,
+)
+
+pytestmark = pytest.mark.django_db(databases=["inventory_db"])
+
+
+@pytest.fixture
+def product():
+    return Product.objects.create(pid="P1", name="p1", stock_status=Product.IN_STOCK)
+
+
+def make_line(product, stock_qty, order=1):
+    return ProductLine.objects.create(
+        product=product,
+        price="1.00",
+        stock_qty=stock_qty,
+        order=order,
+        weight=1.0,
+        is_active=True,
+    )
+
+
+def test_reserve_decrements_many_skus_in_one_statement(product):
+    first = make_line(product, 5)
+    second = make_line(product, 3, order=2)
+
+    with CaptureQueriesContext(connections["inventory_db"]) as ctx:
+        ProductLine.objects.reserve({first.sku: 2, second.sku: 3})
+
+    updates = [q for q in ctx.captured_queries if q["sql"].startswith("UPDATE")]
+    assert len(updates) == 1  # the product stays in stock, so is not written
+    first.refresh_from_db()
+    second.refresh_from_db()
+    assert (first.stock_qty, second.stock_qty) == (3, 0)
+
+
+def test_reserve_is_all_or_nothing(product):
+    first = make_line(product, 5)
+    second = make_line(product, 1, order=2)
+
+    with pytest.raises(InsufficientStock) as exc:
+        ProductLine.objects.reserve({first.sku: 2, second.sku: 2})
+
+    assert exc.value.keys == [second.sku]
+    first.refresh_from_db()
+    assert first.stock_qty == 5
+
+
+def test_reserve_reports_only_the_keys_short_of_stock(product):
+    exact = make_line(product, 2)
+    short = make_line(product, 1, order=2)
+
+    with pytest.raises(InsufficientStock) as exc:
+        ProductLine.objects.reserve({exact.sku: 2, short.sku: 2})
+
+    assert exc.value.keys == [short.sku]
+    exact.refresh_from_db()
+    assert exact.stock_qty == 2
+
+
+@override_settings(
+    INVENTORY_DB_REPLICAS={"inventory_replica_1": 1}, INVENTORY_REPLICA_MAX_LAG=None
+)
+def test_reserve_runs_on_the_primary_before_anything_wrote(product):
+    line = make_line(product, 2)
+    assert ProductLine.objects.all().db == "inventory_replica_1"
+    with pytest.raises(InsufficientStock):
+        ProductLine.objects.reserve({line.sku: 3})
+    ProductLine.objects.reserve({line.sku: 2})
+
+    line.refresh_from_db(using="inventory_db")
+    assert line.stock_qty == 0
+
+
+def test_reserve_rejects_non_positive_quantities(product):
+    line = make_line(product, 5)
+
+    with pytest.raises(ValueError):
+        ProductLine.objects.reserve({line.sku: 0})
+
+
+def test_reserve_last_unit_marks_product_out_of_stock(product):
+    line = make_line(product, 1)
+
+    ProductLine.objects.reserve({line.sku: 1})
+    product.refresh_from_db()
+    assert product.stock_status == Product.OUT_OF_STOCK
+
+    ProductLine.objects.release({line.sku: 1})
+    product.refresh_from_db()
+    assert product.stock_status == Product.IN_STOCK
+
+
+def test_stock_control_reserve_keyed_by_product(product):
+    StockControl.objects.create(stock_product=product, stock_qty=2, name="main")
+
+    StockControl.objects.reserve({product.id: 2})
+
+    assert StockControl.objects.get(stock_product=product).stock_qty == 0
+    product.refresh_from_db()
+    assert product.stock_status == Product.OUT_OF_STOCK
+
+    with pytest.raises(InsufficientStock):
+        StockControl.objects.reserve({product.id: 1})
+
+
+def test_reserve_writes_no_product_whose_status_holds(product, monkeypatch):
+    line = make_line(product, 5)
+    rewritten = []
+    refresh = ProductQuerySet.refresh_stock_status
+
+    def counting_refresh(self):
+        rewritten.append(refresh(self))
+        return rewritten[-1]
+
+    monkeypatch.setattr(ProductQuerySet, "refresh_stock_status", counting_refresh)
+
+    ProductLine.objects.reserve({line.sku: 2})
+    ProductLine.objects.reserve({line.sku: 3})
+
+    assert rewritten == [1]
+    product.refresh_from_db()
+    assert product.stock_status == Product.OUT_OF_STOCK
@@ -0,0 +1,199 @@
+import threading
+
+import pytest
+from django.core.cache import cache
+from django.db import connections
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from inventory import autocomplete
+from inventory.autocomplete import PrefixIndex, get_prefix_index
+from inventory.cache import bump_sequence
+from inventory.models import Attribute, AttributeValue, Category, Product
+
+pytestmark = pytest.mark.django_db(databases=["inventory_db"])
+
+
+@pytest.fixture(autouse=True)
+def fresh_index():
+    cache.clear()
+    autocomplete._snapshot = None
+    yield
+    autocomplete._snapshot = None
+    cache.clear()
+
+
+@pytest.fixture
+def catalog():
+    shirts = Category.objects.create(name="Shirts", level=0, is_active=True)
+    Category.objects.create(name="Shoes", level=0)
+    colour = Attribute.objects.create(name="colour")
+    AttributeValue.objects.create(attribute=colour, attribute_value="Sherbet")
+    for pid, name, active in (
+        ("p1", "Shirt Dress", True),
+        ("p2", "shirt", True),
+        ("p3", "Shield", False),
+    ):
+        Product.objects.create(pid=pid, name=name, category=shirts, is_active=active)
+
+
+def texts(results):
+    return [text for _, _, text in results]
+
+
+def test_completions_are_case_insensitive_and_alphabetical():
+    index = PrefixIndex(
+        [
+            ("product", 1, "Shirt Dress"),
+            ("product", 2, "shirt"),
+            ("category", 3, "Shirts"),
+            ("value", 4, "silk"),
+            ("product", 5, "Boot"),
+        ]
+    )
+
+    assert texts(index.complete("SHI")) == ["shirt", "Shirt Dress", "Shirts"]
+    assert texts(index.complete("shi", limit=2)) == ["shirt", "Shirt Dress"]
+    assert index.complete("shi", kinds=["category"]) == [("category", 3, "Shirts")]
+    assert index.complete("x") == []
+    assert index.complete("  ") == []
+
+
+def test_add_and_discard_keep_the_order():
+    index = PrefixIndex([("product", 1, "Boot"), ("product", 2, "Sandal")])
+
+    index.add("category", 7, "boots")
+    index.add("product", 3, "Boot")
+    index.discard("product", 1, "Boot")
+    index.discard("product", 9, "Sandal")
+
+    assert index.complete("b") == [("product", 3, "Boot"), ("category", 7, "boots")]
+    assert len(index) == 3
+
+
+def test_queries_never_see_a_change_half_applied():
+    index = PrefixIndex([("product", pk, f"boot {pk}") for pk in range(1000)])
+    done = threading.Event()
+
+    def churn():
+        while not done.is_set():
+            index.add("category", 5000, "boot 0")
+            index.discard("category", 5000, "boot 0")
+
+    thread = threading.Thread(target=churn)
+    thread.start()
+    try:
+        for _ in range(2000):
+            for kind, pk, text in index.complete("boot", limit=3):
+                assert text == "boot 0" if pk == 5000 else text == f"boot {pk}"
+    finally:
+        done.set()
+        thread.join()
+    assert len(index) == 1000
+
+
+def test_saves_leaving_indexed_fields_alone_skip_the_index(catalog, monkeypatch):
+    def unexpected(*args):
+        raise AssertionError("indexed text looked up")
+
+    monkeypatch.setattr(autocomplete, "_stored_text", unexpected)
+    monkeypatch.setattr(autocomplete, "_update_on_commit", unexpected)
+    product = Product.objects.get(pid="p1")
+    product.description = "linen"
+
+    product.save(update_fields=["description"])
+
+
+def test_saves_of_unchanged_indexed_text_skip_the_lookup(catalog, monkeypatch):
+    looked_up = []
+    stored_text = autocomplete._stored_text
+
+    def counting_stored_text(*args):
+        looked_up.append(args)
+        return stored_text(*args)
+
+    monkeypatch.setattr(autocomplete, "_stored_text", counting_stored_text)
+    product = Product.objects.get(pid="p1")
+
+    product.description = "linen"
+    product.save()
+    assert not looked_up
+
+    product.name = "Linen Dress"
+    product.save()
+    product.save()
+    assert len(looked_up) == 1
+
+
+def test_index_holds_active_products_and_categories_and_all_values(catalog):
+    assert texts(get_prefix_index().complete("sh", limit=20)) == [
+        "Sherbet",
+        "shirt",
+        "Shirt Dress",
+        "Shirts",
+    ]
+
+
+def test_changes_are_applied_in_place(catalog, django_capture_on_commit_callbacks):
+    index = get_prefix_index()
+    product = Product.objects.get(pid="p2")
+
+    with django_capture_on_commit_callbacks(execute=True, using="inventory_db"):
+        product.name = "Shawl"
+        product.save()
+        shield = Product.objects.get(pid="p3")
+        shield.is_active = True
+        shield.save()
+        Category.objects.get(name="Shirts").delete()
+
+    with CaptureQueriesContext(connections["inventory_db"]) as ctx:
+        assert get_prefix_index() is index
+        assert texts(index.complete("sh")) == [
+            "Shawl",
+            "Sherbet",
+            "Shield",
+            "Shirt Dress",
+        ]
+    assert not ctx.captured_queries
+
+
+def test_changes_elsewhere_are_not_adopted_by_local_updates(
+    catalog, django_capture_on_commit_callbacks
+):
+    index = get_prefix_index()
+    Product.objects.filter(pid="p3").update(is_active=True)
+    bump_sequence("autocomplete", "all")
+
+    with django_capture_on_commit_callbacks(execute=True, using="inventory_db"):
+        product = Product.objects.get(pid="p2")
+        product.name = "Shawl"
+        product.save()
+
+    assert get_prefix_index() is not index
+    assert {"Shawl", "Shield"} <= set(texts(get_prefix_index().complete("sh")))
+
+
+def test_changes_elsewhere_reload_the_index(catalog, settings):
+    settings.INVENTORY_AUTOCOMPLETE_RECHECK_SECONDS = 0
+    index = get_prefix_index()
+
+    Product.objects.filter(pid="p3").update(is_active=True)
+    bump_sequence("autocomplete", "all")
+
+    assert get_prefix_index() is not index
+    assert "Shield" in texts(get_prefix_index().complete("sh"))
+
+
+def test_autocomplete_endpoint(client, catalog):
+    url = reverse("inventory:autocomplete")
+    client.get(url, {"q": "sh"})
+
+    with CaptureQueriesContext(connections["inventory_db"]) as ctx:
+        response = client.get(url, {"q": "shi", "kind": "product", "limit": 1})
+
+    shirt = Product.objects.get(pid="p2")
+    assert response.json() == {
+        "results": [{"kind": "product", "id": shirt.pk, "text": "shirt"}]
+    }
+    assert not ctx.captured_queries
+    assert client.get(url, {"q": "sh", "kind": "brand"}).status_code == 400
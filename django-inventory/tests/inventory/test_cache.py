@@ -0,0 +1,169 @@
+import pytest
+from django.core.cache import cache
+from django.db import connections
+from django.test.utils import CaptureQueriesContext
+
+from inventory.cache import get_category_tree, get_or_build, get_product_detail
+from inventory.models import (
+    Attribute,
+    AttributeValue,
+    Category,
+    Product,
+    ProductImage,
+    ProductLine,
+)
+
+pytestmark = pytest.mark.django_db(databases=["inventory_db"])
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+    yield
+    cache.clear()
+
+
+@pytest.fixture
+def commit(django_capture_on_commit_callbacks):
+    def run(action):
+        with django_capture_on_commit_callbacks(execute=True, using="inventory_db"):
+            action()
+
+    return run
+
+
+@pytest.fixture
+def product():
+    product = Product.objects.create(pid="P1", name="p1")
+    line = ProductLine.objects.create(
+        product=product, price="2.00", stock_qty=3, order=1, weight=1.0
+    )
+    ProductImage.objects.create(product_line=line, url="a.jpg", order=1)
+    return product
+
+
+def queries(func):
+    with CaptureQueriesContext(connections["inventory_db"]) as ctx:
+        result = func()
+    return result, len(ctx.captured_queries)
+
+
+def test_product_detail_served_from_cache(product):
+    first, _ = queries(lambda: get_product_detail(product.id))
+    second, count = queries(lambda: get_product_detail(product.id))
+
+    assert first == second
+    assert second["lines"][0]["images"][0]["url"] == "a.jpg"
+    assert count == 0
+
+
+def test_product_detail_invalidated_by_line_change(product, commit):
+    get_product_detail(product.id)
+    line = ProductLine.objects.get(product=product)
+
+    line.price = "3.00"
+    commit(line.save)
+
+    assert str(get_product_detail(product.id)["lines"][0]["price"]) == "3.00"
+
+
+def test_product_detail_invalidated_by_attribute_values(product, commit):
+    get_product_detail(product.id)
+    line = ProductLine.objects.get(product=product)
+    colour = Attribute.objects.create(name="colour")
+    red = AttributeValue.objects.create(attribute=colour, attribute_value="red")
+
+    commit(lambda: line.attribute_values.add(red))
+    assert get_product_detail(product.id)["lines"][0]["attributes"] == {"colour": "red"}
+
+    red.attribute_value = "crimson"
+    commit(red.save)
+    assert get_product_detail(product.id)["lines"][0]["attributes"] == {
+        "colour": "crimson"
+    }
+
+
+def test_product_detail_invalidated_by_stock_reservation(product, commit):
+    get_product_detail(product.id)
+    line = ProductLine.objects.get(product=product)
+
+    commit(lambda: ProductLine.objects.reserve({line.sku: 3}))
+
+    detail = get_product_detail(product.id)
+    assert detail["lines"][0]["stock_qty"] == 0
+    assert detail["stock_status"] == Product.OUT_OF_STOCK
+
+
+def test_category_tree_nested_and_invalidated(commit):
+    root = Category.objects.create(name="root", level=0, is_active=True)
+    child = Category.objects.create(name="child", level=1, parent=root, is_active=True)
+    other = Category.objects.create(name="other", level=0, is_active=True)
+
+    tree = get_category_tree()
+    assert [node["name"] for node in tree] == ["other", "root"]
+    assert [node["name"] for node in tree[1]["children"]] == ["child"]
+    assert get_category_tree(root.id)[0]["children"][0]["id"] == child.id
+
+    child.parent = other
+    commit(child.save)
+
+    assert get_category_tree(root.id)[0]["children"] == []
+    assert get_category_tree(other.id)[0]["children"][0]["id"] == child.id
+
+
+def test_get_or_build_serves_stale_value_while_refresh_is_locked():
+    get_or_build("key", lambda: "old", timeout=60)
+    value, _ = cache.get("key")
+    cache.set("key", (value, 0), 60)  # past its refresh time
+    cache.add("key:lock", 1, 10)  # another caller is rebuilding
+
+    assert get_or_build("key", lambda: "new", timeout=60) == "old"
+
+    cache.delete("key:lock")
+    assert get_or_build("key", lambda: "new", timeout=60) == "new"
+
+
+def test_get_or_build_leaves_anothers_lock_after_waiting(settings):
+    settings.INVENTORY_CACHE_LOCK_TIMEOUT = 0.1
+    cache.add("key:lock", 1, 10)  # another caller is rebuilding, slowly
+
+    assert get_or_build("key", lambda: "built", timeout=60) == "built"
+    assert cache.get("key:lock") == 1
+
+
+def test_new_child_invalidates_its_ancestors_subtrees(commit):
+    root = Category.objects.create(name="root", level=0, is_active=True)
+    child = Category.objects.create(name="child", parent=root, level=1, is_active=True)
+    assert get_category_tree(root.id)[0]["children"][0]["children"] == []
+
+    grandchild = Category(name="grandchild", parent=child, level=2, is_active=True)
+    commit(grandchild.save)
+
+    assert [
+        node["id"] for node in get_category_tree(root.id)[0]["children"][0]["children"]
+    ] == [grandchild.id]
+
+
+def test_reparenting_invalidates_the_new_parents_subtree(commit):
+    old = Category.objects.create(name="old", level=0, is_active=True)
+    new = Category.objects.create(name="new", level=0, is_active=True)
+    child = Category.objects.create(name="child", parent=old, level=1, is_active=True)
+    assert get_category_tree(new.id)[0]["children"] == []
+
+    child.parent = new
+    commit(child.save)
+
+    assert [node["id"] for node in get_category_tree(new.id)[0]["children"]] == [
+        child.id
+    ]
+    assert get_category_tree(old.id)[0]["children"] == []
+
+
+def test_get_or_build_keeps_a_lock_taken_after_its_own_expired():
+    def slow_build():
+        cache.delete("key:lock")  # this caller's lock timed out...
+        cache.add("key:lock", "other", 10)  # ...and another caller took over
+        return "built"
+
+    assert get_or_build("key", slow_build, timeout=60) == "built"
+    assert cache.get("key:lock") == "other"
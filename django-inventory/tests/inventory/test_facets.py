@@ -0,0 +1,113 @@
+import pytest
+from django.core.cache import cache
+from django.db import connections
+from django.test.utils import CaptureQueriesContext
+
+from inventory.facets import FacetIndex, facet_search
+from inventory.models import Attribute, AttributeValue, Category, Product, ProductLine
+
+pytestmark = pytest.mark.django_db(databases=["inventory_db"])
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+    yield
+    cache.clear()
+
+
+@pytest.fixture
+def catalog():
+    root = Category.objects.create(name="root", level=0)
+    shirts = Category.objects.create(name="shirts", level=1, parent=root)
+    shoes = Category.objects.create(name="shoes", level=1, parent=root)
+    values = {}
+    for name, options in {"colour": ["red", "blue"], "size": ["s", "m"]}.items():
+        attribute = Attribute.objects.create(name=name)
+        for option in options:
+            values[name, option] = AttributeValue.objects.create(
+                attribute=attribute, attribute_value=option
+            )
+
+    lines = {}
+    variants = [
+        (shirts, "red", "s"),
+        (shirts, "red", "m"),
+        (shirts, "blue", "m"),
+        (shoes, "red", "m"),
+    ]
+    for number, (category, colour, size) in enumerate(variants):
+        product = Product.objects.create(
+            pid=str(number), name=f"p{number}", category=category, is_active=True
+        )
+        line = ProductLine.objects.create(
+            product=product, price="1.00", order=1, weight=1.0, is_active=True
+        )
+        line.attribute_values.add(values["colour", colour], values["size", size])
+        lines[category.name, colour, size] = line.id
+    return root, shirts, lines
+
+
+def test_facet_search_ands_attributes_and_ors_values(catalog):
+    root, _, lines = catalog
+
+    result = facet_search({"colour": ["red"], "size": ["m"]}, category=root)
+
+    assert sorted(result.line_ids) == sorted(
+        [lines["shirts", "red", "m"], lines["shoes", "red", "m"]]
+    )
+    assert result.count == 2
+
+    result = facet_search({"colour": ["red", "blue"], "size": ["m"]}, category=root)
+    assert result.count == 3
+
+
+def test_facet_counts_ignore_own_attribute_filter(catalog):
+    _, shirts, _ = catalog
+
+    result = facet_search({"colour": ["red"]}, category=shirts)
+
+    assert result.facets == {
+        "colour": {"red": 2, "blue": 1},
+        "size": {"s": 1, "m": 1},
+    }
+
+
+def test_facet_search_scopes_to_category_subtree(catalog):
+    _, shirts, lines = catalog
+
+    result = facet_search({}, category=shirts)
+
+    assert result.count == 3
+    assert lines["shoes", "red", "m"] not in result.line_ids
+
+
+def test_facet_search_costs_one_query_then_none(catalog):
+    root, _, _ = catalog
+    with CaptureQueriesContext(connections["inventory_db"]) as ctx:
+        facet_search({"colour": ["red"]}, category=root)
+        facet_search({"size": ["s"]}, category=root)
+        facet_search({"colour": ["blue"], "size": ["m"]}, category=root)
+
+    assert len(ctx.captured_queries) == 1
+
+
+def test_facet_index_rebuilt_after_membership_change(
+    catalog, django_capture_on_commit_callbacks
+):
+    root, _, lines = catalog
+    assert facet_search({"size": ["s"]}, category=root).count == 1
+
+    line = ProductLine.objects.get(id=lines["shirts", "blue", "m"])
+    small = AttributeValue.objects.get(attribute__name="size", attribute_value="s")
+    with django_capture_on_commit_callbacks(execute=True, using="inventory_db"):
+        line.attribute_values.add(small)
+
+    assert facet_search({"size": ["s"]}, category=root).count == 2
+
+
+def test_facet_index_keeps_lines_without_attributes():
+    index = FacetIndex([(1, None, None, None), (2, 10, "colour", "red")])
+
+    assert index.search({}).line_ids == [1, 2]
+    assert index.search({"colour": ["red"]}).line_ids == [2]
@@ -0,0 +1,142 @@
+import io
+
+import pytest
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import DatabaseError
+from PIL import Image
+
+from inventory.images import (
+    DerivativeGenerator,
+    generate_derivatives,
+    pending_images,
+    render,
+)
+from inventory.models import Product, ProductImage, ProductImageDerivative, ProductLine
+
+pytestmark = pytest.mark.django_db(databases=["inventory_db"])
+
+
+def png(width, height, mode="RGB", colour="red"):
+    buffer = io.BytesIO()
+    Image.new(mode, (width, height), colour).save(buffer, "PNG")
+    return buffer.getvalue()
+
+
+@pytest.fixture(autouse=True)
+def media(settings, tmp_path):
+    settings.MEDIA_ROOT = tmp_path
+    settings.INVENTORY_IMAGE_DERIVATIVES = {"thumbnail": 40, "listing": 120}
+    return tmp_path
+
+
+@pytest.fixture
+def line():
+    product = Product.objects.create(pid="p1", name="tee")
+    return ProductLine.objects.create(product=product, price="1.00", order=1, weight=1)
+
+
+def add_image(line, name, data, order=1):
+    image = ProductImage(product_line=line, alternative_text="tee", order=order)
+    image.url.save(name, ContentFile(data))
+    return image
+
+
+def test_render_fits_each_box_without_upscaling():
+    rendered = render(png(300, 150), {"zoom": 1000, "listing": 120, "thumbnail": 40})
+
+    assert {kind: size for kind, (_, *size) in rendered.items()} == {
+        "zoom": [300, 150],
+        "listing": [120, 60],
+        "thumbnail": [40, 20],
+    }
+    with Image.open(io.BytesIO(rendered["thumbnail"][0])) as thumbnail:
+        assert thumbnail.format == "WEBP"
+
+
+def test_render_keeps_transparency():
+    data, _, _ = render(png(10, 10, "RGBA", (255, 0, 0, 0)), {"thumbnail": 5})[
+        "thumbnail"
+    ]
+
+    with Image.open(io.BytesIO(data)) as image:
+        assert image.mode == "RGBA"
+
+
+def test_generation_is_incremental(line):
+    image = add_image(line, "tee.png", png(200, 200))
+    add_image(line, "broken.png", b"not an image", order=2)
+
+    counts = generate_derivatives(workers=1)
+
+    assert (counts["images"], counts["derivatives"], counts["failed"]) == (1, 2, 1)
+    thumbnail = image.derivatives.get(kind="thumbnail")
+    assert (thumbnail.width, thumbnail.height) == (40, 40)
+    assert default_storage.exists(thumbnail.file.name)
+    assert list(pending_images()) != [image]
+    assert generate_derivatives(workers=1)["images"] == 0
+
+
+def test_replacing_the_original_rerenders_and_removes_old_files(line):
+    image = add_image(line, "tee.png", png(200, 100))
+    generate_derivatives(workers=1)
+    old_name = image.derivatives.get(kind="listing").file.name
+
+    image.url.save("tee-v2.png", ContentFile(png(100, 200)))
+
+    assert list(pending_images()) == [image]
+    generate_derivatives(workers=1)
+    listing = image.derivatives.get(kind="listing")
+    assert (listing.width, listing.height, listing.source_name) == (
+        60,
+        120,
+        image.url.name,
+    )
+    assert not default_storage.exists(old_name)
+    assert ProductImageDerivative.objects.count() == 2
+
+
+def test_saving_an_image_renders_after_commit(
+    line, settings, django_capture_on_commit_callbacks
+):
+    with django_capture_on_commit_callbacks(execute=True, using="inventory_db"):
+        image = add_image(line, "tee.png", png(80, 80))
+    assert image.derivatives.count() == 0
+
+    settings.INVENTORY_IMAGE_DERIVATIVES_ON_SAVE = True
+    with django_capture_on_commit_callbacks(execute=True, using="inventory_db"):
+        image.save()
+
+    assert image.derivatives.count() == 2
+
+
+def test_render_failures_after_commit_are_logged(
+    line, settings, monkeypatch, caplog, django_capture_on_commit_callbacks
+):
+    settings.INVENTORY_IMAGE_DERIVATIVES_ON_SAVE = True
+
+    def unavailable(*args, **kwargs):
+        raise ConnectionError("storage unavailable")
+
+    monkeypatch.setattr(DerivativeGenerator, "process_batch", unavailable)
+    with django_capture_on_commit_callbacks(execute=True, using="inventory_db"):
+        add_image(line, "tee.png", png(80, 80))
+
+    assert "Rendering derivatives of images" in caplog.text
+
+
+def test_failed_replacement_keeps_the_current_files(line, monkeypatch):
+    image = add_image(line, "tee.png", png(200, 100))
+    generate_derivatives(workers=1)
+    current = {d.file.name for d in image.derivatives.all()}
+
+    def failing(self, rows):
+        raise DatabaseError("replacement failed")
+
+    monkeypatch.setattr(DerivativeGenerator, "_replace_rows", failing)
+    with pytest.raises(DatabaseError):
+        generate_derivatives(workers=1, force=True)
+
+    assert {d.file.name for d in image.derivatives.all()} == current
+    assert all(default_storage.exists(name) for name in current)
+    assert len(default_storage.listdir(f"derivatives/{image.pk}")[1]) == 2
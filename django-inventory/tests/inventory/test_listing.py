@@ -0,0 +1,129 @@
+import io
+from decimal import Decimal
+
+import pytest
+from django.core.management import call_command
+from django.db import connections
+from django.test.utils import CaptureQueriesContext
+
+from inventory.listing import refresh_listing
+from inventory.models import (
+    Category,
+    Product,
+    ProductImage,
+    ProductLine,
+    ProductListing,
+)
+
+pytestmark = pytest.mark.django_db(databases=["inventory_db"])
+
+
+@pytest.fixture(autouse=True)
+def no_derivatives(settings):
+    settings.INVENTORY_IMAGE_DERIVATIVES_ON_SAVE = False
+
+
+@pytest.fixture
+def product():
+    category = Category.objects.create(name="shirts", slug="shirts", level=0)
+    product = Product.objects.create(
+        pid="p1", name="tee", category=category, is_active=True
+    )
+    for order, price in ((1, "9.00"), (2, "5.00")):
+        line = ProductLine.objects.create(
+            product=product, price=price, order=order, weight=1, is_active=True
+        )
+        for image_order in (2, 1):
+            ProductImage.objects.create(
+                product_line=line,
+                url=f"{price}-{image_order}.jpg",
+                alternative_text="",
+                order=image_order,
+            )
+    return product
+
+
+def card(product):
+    return ProductListing.objects.values(
+        "name", "category_slug", "price", "image", "stock_status"
+    ).get(product=product)
+
+
+def test_listing_holds_the_cheapest_line_and_its_first_image(product):
+    assert card(product) == {
+        "name": "tee",
+        "category_slug": "shirts",
+        "price": Decimal("5.00"),
+        "image": "5.00-1.jpg",
+        "stock_status": Product.OUT_OF_STOCK,
+    }
+
+
+def test_listing_follows_changes(product, django_capture_on_commit_callbacks):
+    cheapest = product.productline_set.get(price="5.00")
+    cheapest.is_active = False
+    cheapest.save()
+    assert card(product)["price"] == Decimal("9.00")
+
+    product.category.name = "tees"
+    product.category.slug = "tees"
+    product.category.save()
+    assert card(product)["category_slug"] == "tees"
+
+    line = product.productline_set.get(price="9.00")
+    line.stock_qty = 3
+    line.save()
+    with django_capture_on_commit_callbacks(execute=True, using="inventory_db"):
+        ProductLine.objects.reserve({line.sku: 1})
+    assert card(product)["stock_status"] == Product.IN_STOCK
+
+    product.is_active = False
+    product.save()
+    assert not ProductListing.objects.exists()
+
+
+def test_stock_moves_leave_the_listing_alone_until_the_status_flips(
+    product, django_capture_on_commit_callbacks
+):
+    line = product.productline_set.get(price="9.00")
+    line.stock_qty = 3
+    line.save()
+    Product.objects.filter(pk=product.pk).refresh_stock_status()
+
+    with CaptureQueriesContext(connections["inventory_db"]) as ctx:
+        with django_capture_on_commit_callbacks(execute=True, using="inventory_db"):
+            ProductLine.objects.reserve({line.sku: 1})
+            ProductLine.objects.release({line.sku: 1})
+
+    assert not [
+        q for q in ctx.captured_queries if "inventory_product_listing" in q["sql"]
+    ]
+
+
+def test_refresh_overwrites_rows_in_place(product):
+    with CaptureQueriesContext(connections["inventory_db"]) as ctx:
+        refresh_listing([product.pk], "inventory_db")
+
+    assert not [q for q in ctx.captured_queries if q["sql"].startswith("DELETE")]
+    assert card(product)["image"] == "5.00-1.jpg"
+
+
+def test_rebuild_command_restores_the_table(product):
+    ProductListing.objects.all().delete()
+    Product.objects.create(pid="p2", name="hidden")
+
+    out = io.StringIO()
+    call_command("rebuild_product_listing", batch_size=1, stdout=out)
+
+    assert out.getvalue().strip() == "listings: 1"
+    assert card(product)["image"] == "5.00-1.jpg"
+
+
+def test_listing_api_is_one_query(client, product):
+    with CaptureQueriesContext(connections["inventory_db"]) as ctx:
+        body = client.get(
+            f"/api/listing/?category={product.category_id}&fields=name,price"
+        ).json()
+
+    assert body["results"] == [{"id": product.id, "name": "tee", "price": "5.00"}]
+    assert len(ctx.captured_queries) == 1
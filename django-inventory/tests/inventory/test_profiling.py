@@ -0,0 +1,86 @@
+import logging
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.db import connections
+from django.urls import reverse
+
+from inventory.models import Category, Product
+from inventory.profiling import QueryProfile, fingerprint
+
+pytestmark = pytest.mark.django_db(databases=["inventory_db", "django_db"])
+
+
+@pytest.fixture
+def products():
+    category = Category.objects.create(name="clothes", level=0, is_active=True)
+    return [
+        Product.objects.create(pid=f"p{i}", name=f"tee {i}", category=category)
+        for i in range(3)
+    ]
+
+
+def test_fingerprint_ignores_arguments():
+    assert fingerprint("SELECT * FROM t WHERE id IN (%s, %s, %s) AND a = 'x'") == (
+        fingerprint("SELECT *  FROM t WHERE id IN (%s) AND a = 'y'")
+    )
+    assert fingerprint("SELECT * FROM t1 WHERE id = 10") == (
+        "SELECT * FROM t1 WHERE id = ?"
+    )
+
+
+def test_profile_counts_repeated_shapes_per_alias(products):
+    profile = QueryProfile(slowest=2)
+
+    with connections["inventory_db"].execute_wrapper(profile):
+        for product in products:
+            Product.objects.filter(pk=product.pk).exists()
+        Category.objects.count()
+
+    summary = profile.summary(duplicates=3)["inventory_db"]
+    assert summary["queries"] == 4
+    assert [d["count"] for d in summary["duplicates"]] == [3]
+    assert len(summary["slowest"]) == 2
+    durations = [s["duration_ms"] for s in summary["slowest"]]
+    assert durations == sorted(durations, reverse=True)
+
+
+def test_middleware_off_by_default(client, products, settings):
+    settings.INVENTORY_QUERY_PROFILE_RATE = 0
+
+    response = client.get(reverse("inventory:product-list"))
+
+    assert response.status_code == 200
+    assert not response.has_header("Server-Timing")
+
+
+def test_middleware_reports_sampled_requests(client, products, settings, caplog):
+    settings.INVENTORY_QUERY_PROFILE_RATE = 1
+
+    with caplog.at_level(logging.INFO, logger="inventory.profiling"):
+        response = client.get(reverse("inventory:product-list"))
+
+    assert response["Server-Timing"].startswith("db-inventory_db;dur=")
+    (record,) = caplog.records
+    assert record.status == 200
+    assert record.path == reverse("inventory:product-list")
+    assert record.databases["inventory_db"]["queries"] >= 1
+    # The wrappers are gone once the request is over.
+    assert not any(
+        isinstance(wrapper, QueryProfile)
+        for wrapper in connections["inventory_db"].execute_wrappers
+    )
+
+
+def test_middleware_profiles_async_views(async_client, products, settings, caplog):
+    settings.INVENTORY_QUERY_PROFILE_RATE = 1
+
+    with caplog.at_level(logging.INFO, logger="inventory.profiling"):
+        response = async_to_sync(async_client.get)(
+            reverse("inventory:product-detail", args=[products[0].pk])
+        )
+
+    assert response.status_code == 200
+    assert "db-inventory_db;dur=" in response["Server-Timing"]
+    (record,) = caplog.records
+    assert record.databases["inventory_db"]["queries"] >= 1
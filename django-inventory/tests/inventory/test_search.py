@@ -0,0 +1,203 @@
+import io
+from types import SimpleNamespace
+
+import pytest
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connections
+from django.test.utils import CaptureQueriesContext
+
+from inventory.models import (
+    Attribute,
+    AttributeValue,
+    Category,
+    Product,
+    ProductLine,
+    ProductSearch,
+)
+from inventory import search
+from inventory.search import SearchIndex
+
+pytestmark = pytest.mark.django_db(databases=["inventory_db"])
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+    yield
+    cache.clear()
+
+
+@pytest.fixture
+def catalog():
+    shirts = Category.objects.create(name="shirts", slug="shirts", level=0)
+    shoes = Category.objects.create(name="shoes", slug="shoes", level=0)
+    colour = Attribute.objects.create(name="colour")
+    red = AttributeValue.objects.create(attribute=colour, attribute_value="crimson")
+    products = {}
+    for pid, name, category, description in (
+        ("p1", "linen shirt", shirts, "breezy summer wear"),
+        ("p2", "oxford shirt", shirts, "a shirt for the office"),
+        ("p3", "canvas sneaker", shoes, "goes with a linen shirt"),
+        ("p4", "leather boot", shoes, "winter ready"),
+    ):
+        products[pid] = Product.objects.create(
+            pid=pid,
+            name=name,
+            category=category,
+            description=description,
+            is_active=True,
+        )
+    line = ProductLine.objects.create(
+        product=products["p4"], price="80.00", order=1, weight=1
+    )
+    line.attribute_values.add(red)
+    return products
+
+
+def names(results):
+    return [product.name for product in results]
+
+
+def test_documents_follow_product_category_and_attribute_changes(catalog):
+    boot = catalog["p4"]
+    assert ProductSearch.objects.values(
+        "name", "category", "attributes", "description"
+    ).get(product=boot) == {
+        "name": "leather boot",
+        "category": "shoes",
+        "attributes": "crimson",
+        "description": "winter ready",
+    }
+
+    shoes = boot.category
+    shoes.name = "footwear"
+    shoes.save()
+    line = boot.productline_set.get()
+    line.attribute_values.clear()
+
+    document = ProductSearch.objects.get(product=boot)
+    assert (document.category, document.attributes) == ("footwear", "")
+
+
+def test_inactive_products_have_no_document(catalog):
+    boot = catalog["p4"]
+    boot.is_active = False
+    boot.save()
+
+    assert not ProductSearch.objects.filter(product=boot).exists()
+    assert Product.objects.search("boot") == []
+
+
+def test_search_ranks_name_matches_first(catalog):
+    results = Product.objects.search("shirt")
+
+    assert names(results) == ["oxford shirt", "linen shirt", "canvas sneaker"]
+    assert results[0].rank > results[1].rank > results[2].rank
+
+
+def test_search_matches_every_word(catalog):
+    assert names(Product.objects.search("linen shirt")) == [
+        "linen shirt",
+        "canvas sneaker",
+    ]
+    assert names(Product.objects.search("crimson boot")) == ["leather boot"]
+    assert Product.objects.search("crimson shirt") == []
+
+
+def test_search_tolerates_typos(catalog):
+    assert names(Product.objects.search("sneakr")) == ["canvas sneaker"]
+
+
+def test_search_paginates_in_one_query(catalog):
+    Product.objects.search("shirt")
+
+    with CaptureQueriesContext(connections["inventory_db"]) as ctx:
+        first = Product.objects.search("shirt", page=1, per_page=2)
+        second = Product.objects.search("shirt", page=2, per_page=2)
+
+    assert names(first) + names(second) == [
+        "oxford shirt",
+        "linen shirt",
+        "canvas sneaker",
+    ]
+    assert len(ctx.captured_queries) == 2
+
+
+def test_search_narrows_to_the_queryset(catalog):
+    shoes = catalog["p3"].category
+
+    results = Product.objects.filter(category=shoes).search("shirt")
+
+    assert names(results) == ["canvas sneaker"]
+
+
+def test_scoped_search_looks_past_out_of_scope_matches(catalog, monkeypatch):
+    boot = catalog["p4"]
+    # Better matches than the boot, none of them in the searched queryset.
+    matches = [(pk, 2.0) for pk in range(10**6, 10**6 + 1500)] + [(boot.pk, 1.0)]
+    index = SimpleNamespace(search=lambda text: matches)
+    monkeypatch.setattr(search, "get_search_index", lambda using: index)
+
+    results = Product.objects.filter(category=boot.category).search("boot")
+
+    assert names(results) == ["leather boot"]
+    assert results[0].rank == 1.0
+
+
+def test_saves_leaving_document_fields_alone_keep_the_document(catalog):
+    boot = catalog["p4"]
+    ProductSearch.objects.filter(product=boot).update(name="stale")
+
+    boot.stock_status = Product.IN_STOCK
+    boot.save(update_fields=["stock_status", "updated_at"])
+    assert ProductSearch.objects.get(product=boot).name == "stale"
+
+    boot.save(update_fields=["name"])
+    assert ProductSearch.objects.get(product=boot).name == "leather boot"
+
+
+def test_category_saves_leaving_the_name_alone_keep_the_documents(catalog):
+    boot = catalog["p4"]
+    ProductSearch.objects.filter(product=boot).update(category="stale")
+
+    boot.category.is_active = False
+    boot.category.save(update_fields=["is_active"])
+    assert ProductSearch.objects.get(product=boot).category == "stale"
+
+    boot.category.save(update_fields=["name"])
+    assert ProductSearch.objects.get(product=boot).category == "shoes"
+
+
+def test_refresh_overwrites_documents_in_place(catalog):
+    boot = catalog["p4"]
+    ProductSearch.objects.filter(product=boot).update(name="stale")
+
+    with CaptureQueriesContext(connections["inventory_db"]) as ctx:
+        search.refresh_search([boot.pk], "inventory_db")
+
+    assert not [q for q in ctx.captured_queries if q["sql"].startswith("DELETE")]
+    assert ProductSearch.objects.get(product=boot).name == "leather boot"
+
+
+def test_index_scores_by_field_weight():
+    index = SearchIndex(
+        [
+            (1, "red", "", "", ""),
+            (2, "", "", "", "red"),
+            (3, "", "red", "", ""),
+        ]
+    )
+
+    assert [pk for pk, _ in index.search("red")] == [1, 3, 2]
+    assert index.search("blue") == []
+
+
+def test_rebuild_command_restores_the_documents(catalog):
+    ProductSearch.objects.all().delete()
+    out = io.StringIO()
+
+    call_command("rebuild_product_search", batch_size=1, stdout=out)
+
+    assert out.getvalue().strip() == "search documents: 4"
+    assert ProductSearch.objects.count() == 4
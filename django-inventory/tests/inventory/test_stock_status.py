@@ -0,0 +1,164 @@
+from datetime import timedelta
+
+import pytest
+from django.db import connections
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from inventory.models import (
+    Category,
+    Product,
+    ProductLine,
+    ProductListing,
+    StockControl,
+    Watermark,
+)
+from inventory.stock import WATERMARK, low_stock, recompute_stock_status
+
+pytestmark = pytest.mark.django_db(databases=["inventory_db"])
+
+
+@pytest.fixture
+def catalog():
+    clothing = Category.objects.create(name="Clothing", slug="clothing", level=0)
+    shirts = Category.objects.create(
+        name="Shirts", slug="shirts", parent=clothing, level=1
+    )
+    shoes = Category.objects.create(name="Shoes", slug="shoes", level=0)
+    products = {}
+    for pid, category, stock in (
+        ("p1", clothing, [8]),
+        ("p2", shirts, [3, 0]),
+        ("p3", shoes, [4]),
+        ("p4", shoes, [0]),
+    ):
+        product = Product.objects.create(
+            pid=pid, name=pid, category=category, is_active=True
+        )
+        for order, stock_qty in enumerate(stock, 1):
+            ProductLine.objects.create(
+                product=product,
+                price="10.00",
+                order=order,
+                weight=1,
+                stock_qty=stock_qty,
+                is_active=True,
+            )
+        products[pid] = product
+    recompute_stock_status(full=True)
+    return products
+
+
+def status(pid):
+    return Product.objects.values_list("stock_status", flat=True).get(pid=pid)
+
+
+def age(products, seconds=3600):
+    Product.objects.filter(pid__in=products).update(
+        updated_at=timezone.now() - timedelta(seconds=seconds)
+    )
+
+
+def test_full_run_fixes_drift_in_one_update(catalog):
+    Product.objects.filter(pid__in=["p1", "p4"]).update(stock_status=Product.IN_STOCK)
+    Product.objects.filter(pid="p2").update(stock_status=Product.OUT_OF_STOCK)
+
+    with CaptureQueriesContext(connections["inventory_db"]) as ctx:
+        assert recompute_stock_status(full=True) == 2
+
+    updates = [
+        query["sql"]
+        for query in ctx.captured_queries
+        if query["sql"].startswith('UPDATE "inventory_product"')
+    ]
+    assert len(updates) == 1
+    assert [status(pid) for pid in ("p1", "p2", "p3", "p4")] == [
+        Product.IN_STOCK,
+        Product.IN_STOCK,
+        Product.IN_STOCK,
+        Product.OUT_OF_STOCK,
+    ]
+    assert recompute_stock_status(full=True) == 0
+
+
+def test_back_ordered_products_keep_their_status(catalog):
+    Product.objects.filter(pid="p4").update(stock_status=Product.BACKORDERED)
+
+    assert recompute_stock_status(full=True) == 0
+    assert status("p4") == Product.BACKORDERED
+
+
+def test_stock_of_inactive_lines_does_not_count(catalog):
+    line = catalog["p3"].productline_set.get()
+    line.is_active = False
+    line.save()
+
+    assert recompute_stock_status() == 1
+    assert status("p3") == Product.OUT_OF_STOCK
+
+
+def test_incremental_run_only_checks_products_touched_since(catalog, settings):
+    settings.INVENTORY_STOCK_WATERMARK_OVERLAP = 0
+    age(catalog)
+    Product.objects.filter(pid="p1").update(stock_status=Product.OUT_OF_STOCK)
+
+    assert recompute_stock_status() == 0
+    assert status("p1") == Product.OUT_OF_STOCK
+
+    line = catalog["p3"].productline_set.get()
+    line.stock_qty = 0
+    line.save()
+    StockControl.objects.create(stock_product=catalog["p4"], stock_qty=2)
+
+    assert recompute_stock_status() == 2
+    assert (status("p3"), status("p4")) == (Product.OUT_OF_STOCK, Product.IN_STOCK)
+    assert Watermark.objects.get(name=WATERMARK).value <= timezone.now()
+    assert recompute_stock_status(full=True) == 1
+
+
+def test_overlap_revisits_products_touched_just_before_the_last_run(catalog, settings):
+    settings.INVENTORY_STOCK_WATERMARK_OVERLAP = 60
+    age(["p1"], seconds=30)
+    Product.objects.filter(pid="p1").update(stock_status=Product.OUT_OF_STOCK)
+
+    assert recompute_stock_status() == 1
+
+
+def test_recompute_refreshes_the_listing(catalog, django_capture_on_commit_callbacks):
+    ProductLine.objects.filter(product=catalog["p3"]).update(stock_qty=0)
+
+    with django_capture_on_commit_callbacks(execute=True, using="inventory_db"):
+        recompute_stock_status(full=True)
+
+    assert ProductListing.objects.get(product=catalog["p3"]).stock_status == (
+        Product.OUT_OF_STOCK
+    )
+
+
+def test_low_stock_uses_the_nearest_category_threshold(catalog):
+    rows = low_stock(threshold=4, thresholds={"clothing": 10, "shirts": 2})
+
+    assert [(row["pid"], row["stock_qty"], row["threshold"]) for row in rows] == [
+        ("p2", 0, 2),
+        ("p4", 0, 4),
+        ("p3", 4, 4),
+        ("p1", 8, 10),
+    ]
+    assert list(
+        low_stock(threshold=0, thresholds={}).values_list("pid", flat=True)
+    ) == [
+        "p2",
+        "p4",
+    ]
+
+
+def test_low_stock_skips_inactive_lines_and_products(catalog, settings):
+    settings.INVENTORY_LOW_STOCK_THRESHOLD = 3
+    Product.objects.filter(pid="p4").update(is_active=False)
+    ProductLine.objects.filter(product=catalog["p2"], stock_qty=0).update(
+        is_active=False
+    )
+
+    rows = low_stock()
+
+    assert [(row["pid"], row["category"]) for row in rows] == [("p2", "Shirts")]
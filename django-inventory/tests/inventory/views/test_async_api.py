@@ -0,0 +1,88 @@
+import asyncio
+import uuid
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.core.cache import cache
+
+from inventory.cache import aget_product_detail, get_product_detail
+from inventory.catalog import aget_record, iter_catalog
+from inventory.models import Category, Product, ProductLine, StockControl
+
+pytestmark = pytest.mark.django_db(databases=["inventory_db"])
+
+
+@pytest.fixture
+def catalog():
+    root = Category.objects.create(name="clothes", level=0, is_active=True)
+    Category.objects.create(name="shirts", level=1, parent=root, is_active=True)
+    Category.objects.create(name="shoes", level=1, parent=root, is_active=True)
+    Category.objects.create(name="hidden", level=1, parent=root)
+    product = Product.objects.create(pid="p1", name="tee", category=root)
+    line = ProductLine.objects.create(
+        product=product, price="9.99", order=1, weight=1.0, stock_qty=4
+    )
+    StockControl.objects.create(stock_product=product, stock_qty=7, name="tee")
+    return root, product, line
+
+
+def test_async_record_matches_sync_export(catalog):
+    _, product, _ = catalog
+
+    record = async_to_sync(aget_record)(product.id)
+
+    assert record == next(iter_catalog(Product.objects.filter(pk=product.id)))
+    assert async_to_sync(aget_record)(999999) is None
+
+
+def test_async_product_detail_shares_the_sync_cache_entry(catalog):
+    cache.clear()
+    _, product, _ = catalog
+
+    detail = async_to_sync(aget_product_detail)(product.id)
+
+    assert detail["lines"][0]["stock_qty"] == 4
+    assert get_product_detail(product.id) == detail
+
+
+def test_async_helpers_gather(catalog):
+    root, product, line = catalog
+
+    async def lookups():
+        return await asyncio.gather(
+            Category.objects.achildren(root),
+            ProductLine.objects.astock([line.sku, uuid.uuid4()]),
+            StockControl.objects.astock([product.id]),
+        )
+
+    children, line_stock, product_stock = async_to_sync(lookups)()
+
+    assert [child["name"] for child in children] == ["shirts", "shoes"]
+    assert line_stock == {str(line.sku): 4}
+    assert product_stock == {str(product.id): 7}
+
+
+def test_async_views(async_client, catalog):
+    cache.clear()
+    root, product, line = catalog
+
+    async def requests():
+        return await asyncio.gather(
+            async_client.get(f"/api/products/{product.id}/"),
+            async_client.get(f"/api/categories/{root.id}/children/"),
+            async_client.get(f"/api/stock/?sku={line.sku}&product={product.id}"),
+            async_client.get("/api/categories/999999/children/"),
+            async_client.get("/api/stock/?sku=nope"),
+        )
+
+    detail, children, stock, missing, bad = async_to_sync(requests)()
+
+    assert detail.json()["pid"] == "p1"
+    assert children.json()["name"] == "clothes"
+    assert len(children.json()["children"]) == 2
+    assert stock.json() == {
+        "lines": {str(line.sku): 4},
+        "products": {str(product.id): 7},
+    }
+    assert missing.status_code == 404
+    assert bad.status_code == 400
@@ -0,0 +1,102 @@
+import pytest
+from django.core.cache import cache
+from django.db import connections
+from django.test.utils import CaptureQueriesContext
+
+from inventory.models import Category, Product, ProductLine
+
+pytestmark = pytest.mark.django_db(databases=["inventory_db"])
+
+
+@pytest.fixture
+def products():
+    category = Category.objects.create(name="shirts", level=0)
+    Product.objects.bulk_create(
+        Product(
+            pid=str(i),
+            name=f"p{i}",
+            slug=f"p{i}",
+            category=category if i % 2 else None,
+            is_active=True,
+        )
+        for i in range(25)
+    )
+    return category
+
+
+def walk(client, url):
+    pages, queries = [], []
+    while url:
+        with CaptureQueriesContext(connections["inventory_db"]) as ctx:
+            body = client.get(url).json()
+        pages.append(body["results"])
+        queries.append([query["sql"] for query in ctx.captured_queries])
+        url = body["next"] and f"/api/products/?limit=10&cursor={body['next']}"
+    return pages, queries
+
+
+def test_product_list_keyset_pages_cover_everything_once(client, products):
+    pages, queries = walk(client, "/api/products/?limit=10")
+
+    assert [len(page) for page in pages] == [10, 10, 5]
+    ids = [row["id"] for page in pages for row in page]
+    assert ids == sorted(set(ids)) and len(ids) == 25
+    assert all(len(page_queries) == 1 for page_queries in queries)
+    assert "OFFSET" not in " ".join(queries[-1])
+
+
+def test_product_list_sparse_fields_narrow_the_select(client, products):
+    with CaptureQueriesContext(connections["inventory_db"]) as ctx:
+        body = client.get("/api/products/?fields=name,stock_status&limit=2").json()
+
+    assert body["results"][0].keys() == {"id", "name", "stock_status"}
+    sql = ctx.captured_queries[0]["sql"]
+    assert '"description"' not in sql and '"pid"' not in sql
+
+
+def test_product_list_filters_by_category_subtree(client, products):
+    child = Category.objects.create(name="tees", level=1, parent=products)
+    Product.objects.create(pid="child", name="child", category=child)
+
+    body = client.get(f"/api/products/?category={products.id}&limit=100").json()
+
+    assert len(body["results"]) == 13
+
+
+@pytest.mark.parametrize(
+    "query",
+    [
+        "fields=name,secret",
+        "cursor=!!!",
+        "limit=zero",
+        "limit=0",
+        "active=maybe",
+        "category=x",
+        "category=%C2%B2",
+    ],
+)
+def test_product_list_rejects_bad_parameters(client, products, query):
+    response = client.get(f"/api/products/?{query}")
+
+    assert response.status_code == 400
+    assert "error" in response.json()
+
+
+def test_product_line_and_category_lists(client, products):
+    product = Product.objects.first()
+    ProductLine.objects.create(product=product, price="2.50", order=1, weight=1.0)
+
+    lines = client.get(f"/api/product-lines/?product={product.id}").json()
+    categories = client.get("/api/categories/?fields=name").json()
+
+    assert lines["results"][0]["price"] == "2.50"
+    assert categories["results"] == [{"id": products.id, "name": "shirts"}]
+
+
+def test_product_detail_payload_and_404(client, products):
+    cache.clear()
+    product = Product.objects.first()
+
+    assert client.get(f"/api/products/{product.id}/").json()["pid"] == product.pid
+    assert client.get("/api/products/999999/").status_code == 404
+    assert client.post("/api/products/").status_code == 405
@@ -0,0 +1,169 @@
+from collections import Counter
+
+import pytest
+from asgiref.sync import async_to_sync, iscoroutinefunction, sync_to_async
+from django.contrib.auth.models import User
+from django.http import HttpResponse
+from django.test import RequestFactory, override_settings
+
+from inventory.models import Category
+from routers import inventory_router
+from routers.inventory_router import (
+    PIN_COOKIE,
+    InventoryAppRouter,
+    InventoryPrimaryPinMiddleware,
+    use_primary,
+)
+
+REPLICAS = {"inventory_replica_1": 2, "inventory_replica_2": 1}
+
+writes = pytest.mark.django_db(databases=["inventory_db"])
+
+
+def write():
+    Category.objects.create(name="shirts", slug="shirts", level=0)
+
+
+@pytest.fixture
+def router():
+    return InventoryAppRouter()
+
+
+def test_router_sends_inventory_models_to_inventory_db(router):
+    assert router.db_for_read(Category) == "inventory_db"
+    assert router.db_for_write(Category) == "inventory_db"
+    assert router.db_for_read(User) is None
+    assert router.db_for_write(User) is None
+
+
+@pytest.mark.parametrize(
+    "db, app_label, expected",
+    [
+        ("inventory_db", "inventory", True),
+        ("django_db", "inventory", False),
+        ("inventory_replica_1", "inventory", False),
+        ("inventory_db", "auth", None),
+    ],
+)
+def test_router_allow_migrate_returns_booleans(router, db, app_label, expected):
+    assert router.allow_migrate(db, app_label) is expected
+
+
+@override_settings(INVENTORY_DB_REPLICAS=REPLICAS, INVENTORY_REPLICA_MAX_LAG=None)
+def test_router_spreads_reads_by_weight(router):
+    reads = Counter(router.db_for_read(Category) for _ in range(30))
+
+    assert reads == {"inventory_replica_1": 20, "inventory_replica_2": 10}
+
+
+@writes
+@override_settings(INVENTORY_DB_REPLICAS=REPLICAS, INVENTORY_REPLICA_MAX_LAG=None)
+def test_router_pins_reads_after_write_within_a_request(router):
+    def view(request):
+        before = router.db_for_read(Category)
+        write()
+        return HttpResponse(f"{before} {router.db_for_read(Category)}")
+
+    response = InventoryPrimaryPinMiddleware(view)(RequestFactory().post("/"))
+
+    before, after = response.content.decode().split()
+    assert (before != "inventory_db", after) == (True, "inventory_db")
+
+
+@writes
+@override_settings(INVENTORY_DB_REPLICAS=REPLICAS, INVENTORY_REPLICA_MAX_LAG=None)
+def test_writes_outside_a_scope_pin_nothing(router):
+    write()
+
+    assert router.db_for_read(Category) != "inventory_db"
+
+
+@override_settings(INVENTORY_DB_REPLICAS=REPLICAS, INVENTORY_REPLICA_MAX_LAG=None)
+def test_use_primary_forces_primary_reads(router):
+    with use_primary():
+        assert router.db_for_read(Category) == "inventory_db"
+
+    assert router.db_for_read(Category) != "inventory_db"
+
+
+@writes
+@override_settings(INVENTORY_DB_REPLICAS=REPLICAS, INVENTORY_REPLICA_MAX_LAG=None)
+def test_writes_in_use_primary_still_pin_the_client(router):
+    def view(request):
+        with use_primary():
+            write()
+        return HttpResponse(router.db_for_read(Category))
+
+    response = InventoryPrimaryPinMiddleware(view)(RequestFactory().post("/"))
+
+    assert response.content == b"inventory_db"
+    assert PIN_COOKIE in response.cookies
+
+
+@override_settings(INVENTORY_DB_REPLICAS=REPLICAS, INVENTORY_REPLICA_MAX_LAG=1)
+def test_router_skips_lagging_replicas(router, monkeypatch):
+    lag = {"inventory_replica_1": 30.0, "inventory_replica_2": 0.0}
+    monkeypatch.setattr(inventory_router, "replica_lag", lag.get)
+
+    assert {router.db_for_read(Category) for _ in range(6)} == {"inventory_replica_2"}
+
+    lag["inventory_replica_2"] = 30.0
+    assert router.db_for_read(Category) == "inventory_db"
+
+
+@writes
+@override_settings(INVENTORY_DB_REPLICAS=REPLICAS, INVENTORY_REPLICA_MAX_LAG=None)
+def test_middleware_pins_client_after_write(router):
+    def writing_view(request):
+        Category.objects.all().delete()
+        write()
+        return HttpResponse()
+
+    def reading_view(request):
+        return HttpResponse(router.db_for_read(Category))
+
+    factory = RequestFactory()
+    response = InventoryPrimaryPinMiddleware(writing_view)(factory.post("/"))
+    assert PIN_COOKIE in response.cookies
+
+    assert router.db_for_read(Category) != "inventory_db"
+
+    request = factory.get("/")
+    request.COOKIES[PIN_COOKIE] = "1"
+    response = InventoryPrimaryPinMiddleware(reading_view)(request)
+    assert response.content == b"inventory_db"
+    assert PIN_COOKIE not in response.cookies
+
+    request = factory.post("/")
+    request.COOKIES[PIN_COOKIE] = "1"
+    response = InventoryPrimaryPinMiddleware(writing_view)(request)
+    assert PIN_COOKIE in response.cookies
+
+
+@writes
+@override_settings(INVENTORY_DB_REPLICAS=REPLICAS, INVENTORY_REPLICA_MAX_LAG=None)
+def test_middleware_runs_natively_around_async_views(router):
+    async def writing_view(request):
+        await sync_to_async(write)()
+        return HttpResponse()
+
+    middleware = InventoryPrimaryPinMiddleware(writing_view)
+    response = async_to_sync(middleware)(RequestFactory().post("/"))
+
+    assert iscoroutinefunction(middleware)
+    assert PIN_COOKIE in response.cookies
+    assert router.db_for_read(Category) != "inventory_db"
+
+
+@writes
+@override_settings(INVENTORY_DB_REPLICAS=REPLICAS, INVENTORY_REPLICA_MAX_LAG=None)
+def test_primary_reads_do_not_pin_the_client(router):
+    def view(request):
+        # The admin reads its change form through the write database.
+        Category.objects.db_manager(router.db_for_write(Category)).exists()
+        return HttpResponse(router.db_for_read(Category))
+
+    response = InventoryPrimaryPinMiddleware(view)(RequestFactory().get("/"))
+
+    assert response.content != b"inventory_db"
+    assert PIN_COOKIE not in response.cookies
@@ -0,0 +1,230 @@
+"""
+Test databases restored from a schema snapshot instead of being migrated.
+
+The first run builds each test database the usual way and keeps a copy of
+it, keyed by a hash of the migration files and model state: a file in the
+pytest cache for SQLite, a template database for PostgreSQL. Later runs, and
+every pytest-xdist worker after the first, restore that copy into their own
+test database, so migrations are only replayed when the schema changed.
+Other backends are created the usual way.
+"""
+
+import hashlib
+import os
+import sqlite3
+import sys
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+import django
+from django.apps import apps
+from django.conf import settings
+from django.db import connections
+from django.db.migrations.loader import MigrationLoader
+from django.db.migrations.state import ProjectState
+from django.db.migrations.writer import MigrationWriter
+from django.test.utils import get_unique_databases_and_mirrors
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+def schema_key():
+    """
+    Hash of everything the test schema is built from: the Django version,
+    the migration files on disk and the state of every model, serialized the
+    way makemigrations writes it.
+    """
+    digest = hashlib.sha256(django.get_version().encode())
+    loader = MigrationLoader(None, ignore_no_migrations=True)
+    for key in sorted(loader.disk_migrations):
+        module = sys.modules[type(loader.disk_migrations[key]).__module__]
+        digest.update(Path(module.__file__).read_bytes())
+
+    state = ProjectState.from_apps(apps)
+    for key in sorted(state.models):
+        model = state.models[key]
+        digest.update(repr(key).encode())
+        for name, field in model.fields.items():
+            digest.update(f"{name}={MigrationWriter.serialize(field)[0]}".encode())
+        digest.update(MigrationWriter.serialize(model.options)[0].encode())
+    return digest.hexdigest()[:16]
+
+
+class SqliteSnapshot:
+    """A copy of the test database in ``directory``, taken with the backup API."""
+
+    def __init__(self, connection, directory, key):
+        self.connection = connection
+        self.directory = Path(directory)
+        self.path = self.directory / f"{connection.alias}-{key}.sqlite3"
+
+    def exists(self):
+        return self.path.exists()
+
+    def save(self):
+        self.connection.ensure_connection()
+        partial = self.path.with_suffix(f".{os.getpid()}.tmp")
+        target = sqlite3.connect(partial)
+        try:
+            self.connection.connection.backup(target)
+        finally:
+            target.close()
+        os.replace(partial, self.path)
+        for stale in self.directory.glob(f"{self.connection.alias}-*.sqlite3"):
+            if stale != self.path:
+                stale.unlink(missing_ok=True)
+
+    def restore(self, verbosity):
+        creation = self.connection.creation
+        test_name = creation._create_test_db(verbosity, autoclobber=True, keepdb=False)
+        _use_test_name(self.connection, test_name)
+        self.connection.ensure_connection()
+        source = sqlite3.connect(self.path)
+        try:
+            source.backup(self.connection.connection)
+        finally:
+            source.close()
+
+
+class PostgresSnapshot:
+    """A template database the test database is created from."""
+
+    def __init__(self, connection, directory, key):
+        self.connection = connection
+        self.name = f"test_{connection.settings_dict['NAME']}_{key}"[:63]
+
+    def exists(self):
+        with self.connection.creation._nodb_cursor() as cursor:
+            cursor.execute("SELECT 1 FROM pg_database WHERE datname = %s", [self.name])
+            return cursor.fetchone() is not None
+
+    def save(self):
+        # A template must have no other sessions while it is copied.
+        self.connection.close()
+        self._execute(f"DROP DATABASE IF EXISTS {self._quote(self.name)}")
+        self._execute(
+            f"CREATE DATABASE {self._quote(self.name)} "
+            f"TEMPLATE {self._quote(self.connection.settings_dict['NAME'])}"
+        )
+
+    def restore(self, verbosity):
+        test_name = self.connection.creation._get_test_db_name()
+        self.connection.close()
+        self._execute(f"DROP DATABASE IF EXISTS {self._quote(test_name)}")
+        self._execute(
+            f"CREATE DATABASE {self._quote(test_name)} "
+            f"TEMPLATE {self._quote(self.name)}"
+        )
+        _use_test_name(self.connection, test_name)
+        self.connection.ensure_connection()
+
+    def _execute(self, sql):
+        with self.connection.creation._nodb_cursor() as cursor:
+            cursor.execute(sql)
+
+    def _quote(self, name):
+        return self.connection.ops.quote_name(name)
+
+
+SNAPSHOTS = {"sqlite": SqliteSnapshot, "postgresql": PostgresSnapshot}
+
+
+def _use_test_name(connection, test_name):
+    connection.close()
+    settings.DATABASES[connection.alias]["NAME"] = test_name
+    connection.settings_dict["NAME"] = test_name
+
+
+def _lock(file):
+    if fcntl is not None:
+        fcntl.flock(file, fcntl.LOCK_EX)
+        return
+    # msvcrt.locking() only retries for ten seconds; a build takes longer.
+    file.seek(0)
+    while True:
+        try:
+            msvcrt.locking(file.fileno(), msvcrt.LK_NBLCK, 1)
+            return
+        except OSError:
+            time.sleep(0.1)
+
+
+def _unlock(file):
+    if fcntl is not None:
+        fcntl.flock(file, fcntl.LOCK_UN)
+    else:
+        file.seek(0)
+        msvcrt.locking(file.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+@contextmanager
+def _locked(path):
+    """Hold an exclusive lock on ``path`` so one xdist worker builds at a time."""
+    with open(path, "a+") as lock:
+        _lock(lock)
+        try:
+            yield
+        finally:
+            _unlock(lock)
+
+
+def create_test_db(connection, directory, key, verbosity=0, rebuild=False):
+    """
+    Create the test database of ``connection`` from its snapshot, building
+    the database and the snapshot first when there is none or ``rebuild``.
+    """
+    snapshot_class = SNAPSHOTS.get(connection.vendor)
+    if snapshot_class is None:
+        return connection.creation.create_test_db(verbosity, autoclobber=True)
+
+    snapshot = snapshot_class(connection, directory, key)
+    with _locked(Path(directory) / f"{connection.alias}.lock"):
+        if rebuild or not snapshot.exists():
+            connection.creation.create_test_db(verbosity, autoclobber=True)
+            snapshot.save()
+            # Saving may have closed the connection to the test database.
+            connection.ensure_connection()
+            return connection.settings_dict["NAME"]
+
+    if verbosity >= 1:
+        connection.creation.log(
+            f"Restoring test database for alias '{connection.alias}' "
+            f"from schema snapshot {key}..."
+        )
+    snapshot.restore(verbosity)
+    connection._test_serialized_contents = connection.creation.serialize_db_to_string()
+    return connection.settings_dict["NAME"]
+
+
+def setup_databases(directory, verbosity=0, rebuild=False):
+    """
+    django.test.utils.setup_databases() going through the snapshots; the
+    result is what teardown_databases() expects.
+    """
+    key = schema_key()
+    test_databases, mirrored_aliases = get_unique_databases_and_mirrors()
+
+    old_names = []
+    for db_name, aliases in test_databases.values():
+        first_alias = None
+        for alias in aliases:
+            connection = connections[alias]
+            old_names.append((connection, db_name, first_alias is None))
+            if first_alias is None:
+                first_alias = alias
+                create_test_db(connection, directory, key, verbosity, rebuild)
+            else:
+                connection.creation.set_as_test_mirror(
+                    connections[first_alias].settings_dict
+                )
+
+    for alias, mirror_alias in mirrored_aliases.items():
+        connections[alias].creation.set_as_test_mirror(
+            connections[mirror_alias].settings_dict
+        )
+    return old_names
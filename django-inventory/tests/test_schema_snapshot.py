@@ -0,0 +1,67 @@
+import sqlite3
+from types import SimpleNamespace
+
+import pytest
+from django.db import connections
+
+from inventory.models import Product
+import schema_snapshot
+from schema_snapshot import SqliteSnapshot, schema_key
+
+
+def test_schema_key_is_stable():
+    assert schema_key() == schema_key()
+
+
+def test_schema_key_follows_model_state(monkeypatch):
+    key = schema_key()
+    field = Product._meta.get_field("name")
+    monkeypatch.setattr(field, "max_length", field.max_length + 1)
+
+    assert schema_key() != key
+
+
+@pytest.mark.django_db(databases=["inventory_db"])
+def test_sqlite_snapshot_copies_schema_and_drops_stale(tmp_path):
+    connection = connections["inventory_db"]
+    if connection.vendor != "sqlite":
+        pytest.skip("SQLite snapshots only")
+    stale = tmp_path / "inventory_db-old.sqlite3"
+    stale.touch()
+
+    snapshot = SqliteSnapshot(connection, tmp_path, "new")
+    assert not snapshot.exists()
+    snapshot.save()
+
+    assert snapshot.exists()
+    assert not stale.exists()
+    copy = sqlite3.connect(snapshot.path)
+    try:
+        tables = {
+            name
+            for (name,) in copy.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'table'"
+            )
+        }
+    finally:
+        copy.close()
+    assert Product._meta.db_table in tables
+
+
+def test_lock_falls_back_to_msvcrt_without_fcntl(tmp_path, monkeypatch):
+    calls = []
+    failures = iter([OSError("locked elsewhere")])
+
+    def locking(fd, mode, size):
+        calls.append(mode)
+        if mode == "NBLCK" and (error := next(failures, None)):
+            raise error
+
+    msvcrt = SimpleNamespace(LK_NBLCK="NBLCK", LK_UNLCK="UNLCK", locking=locking)
+    monkeypatch.setattr(schema_snapshot, "fcntl", None)
+    monkeypatch.setattr(schema_snapshot, "msvcrt", msvcrt, raising=False)
+    monkeypatch.setattr(schema_snapshot.time, "sleep", lambda seconds: None)
+
+    with schema_snapshot._locked(tmp_path / "db.lock"):
+        assert calls == ["NBLCK", "NBLCK"]
+    assert calls[-1] == "UNLCK"